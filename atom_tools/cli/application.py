@@ -1,18 +1,22 @@
 """
 Base console application.
 """
+import cProfile
 import logging
 import sys
 from importlib import import_module
 from typing import Callable
 
 from cleo.application import Application as BaseApplication
+from cleo.commands.command import Command as BaseCommand
 from cleo.events.console_command_event import ConsoleCommandEvent
 from cleo.events.console_events import COMMAND
 from cleo.events.event import Event
 from cleo.events.event_dispatcher import EventDispatcher
 from cleo.io.inputs.argv_input import ArgvInput
+from cleo.io.inputs.definition import Definition
 from cleo.io.inputs.input import Input
+from cleo.io.inputs.option import Option
 from cleo.io.io import IO
 from cleo.io.outputs.output import Output
 from cleo.io.outputs.stream_output import StreamOutput
@@ -21,6 +25,7 @@ from atom_tools import __version__
 from atom_tools.cli.command_loader import CommandLoader
 from atom_tools.cli.commands.command import Command
 from atom_tools.cli.logging_config import ATOM_TOOLS_FILTER, IOFormatter, IOHandler
+from atom_tools.lib import profiling
 
 
 def load_command(name: str) -> Callable[[], Command]:
@@ -53,10 +58,12 @@ def load_command(name: str) -> Callable[[], Command]:
 
 COMMANDS = [
     'convert',
+    'convert-batch',
     'filter',
     'query-endpoints',
     'check-reachable',
     'validate-lines',
+    'serve',
 ]
 
 
@@ -97,6 +104,46 @@ class Application(BaseApplication):
 
         return IO(input, output, error_output)
 
+    @property
+    def _default_definition(self) -> Definition:
+        definition = super()._default_definition
+        definition.add_option(Option(
+            '--timings',
+            flag=True,
+            description='Print the wall time, CPU time and peak memory of each phase of the command.',
+        ))
+        definition.add_option(Option(
+            '--profile',
+            flag=False,
+            description='Write cProfile statistics for the command to this file (implies --timings).',
+        ))
+        return definition
+
+    def _run_command(self, command: BaseCommand, io: IO) -> int:
+        profile_file = io.input.parameter_option('--profile')
+        if not profile_file and not io.input.has_parameter_option('--timings'):
+            return super()._run_command(command, io)
+        profiling.enable()
+        profiler = cProfile.Profile() if profile_file else None
+        try:
+            with profiling.phase(command.name or 'command'):
+                if profiler:
+                    profiler.enable()
+                try:
+                    return super()._run_command(command, io)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            profiling.disable()
+            io.write_error_line(f'\n{profiling.format_phases(profiling.get_phases())}')
+            # Only commands that ran queries have imported them, and with them JMESPath.
+            if queries := sys.modules.get('atom_tools.lib.queries'):
+                io.write_error_line(str(queries.cache_info()))
+            if profiler:
+                profiler.dump_stats(profile_file)
+                io.write_error_line(f'Profile written to {profile_file}.')
+
     @staticmethod
     def register_command_loggers(event: Event, event_name: str, _: EventDispatcher) -> None:  # pylint: disable=unused-argument
         """
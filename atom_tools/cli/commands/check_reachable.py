@@ -1,12 +1,15 @@
 # pylint: disable=R0801
 """Query Reachables Command for the atom-tools CLI."""
+import json
 import logging
+import sys
+from contextlib import nullcontext
 
 from cleo.helpers import option
 
 from atom_tools.cli.commands.command import Command
 from atom_tools.lib.slices import AtomSlice
-from atom_tools.lib.utils import check_reachable
+from atom_tools.lib.utils import check_reachable, check_reachable_batch, read_reachable_queries
 
 
 logger = logging.getLogger(__name__)
@@ -50,6 +53,28 @@ class CheckReachableCommand(Command):
             'Filename with line number to search for in the format of <filename>:<linenumber>',
             flag=False,
         ),
+        option(
+            'lazy',
+            None,
+            'Memory-map the slice and decode one reachable at a time. Use for slices larger than '
+            'the available memory.',
+        ),
+        option(
+            'batch',
+            'b',
+            'File of queries to check, one per line, or - to read from stdin. Each line is a JSON '
+            'object with a pkg or location key, or pkg=<package_name>:<version> or '
+            'location=<filename>:<linenumber>.',
+            flag=False,
+        ),
+        option(
+            'format',
+            'f',
+            'Output format of batch results: ndjson (one result per line, written as each query '
+            'is checked) or json (a single array).',
+            flag=False,
+            default='ndjson',
+        ),
     ]
     help = """Checks for reachable flows for a pkg:version or file:linenumber in an atom slice."""
 
@@ -60,5 +85,16 @@ class CheckReachableCommand(Command):
         """
         Executes the query command and performs the search.
         """
-        atom_slice = AtomSlice(self.option('input-slice'))
-        print(check_reachable(atom_slice.content, self.option('pkg'), self.option('location')))
+        if self.option('format') not in {'json', 'ndjson'}:
+            raise ValueError(f'Unknown output format: {self.option("format")}')
+        atom_slice = AtomSlice(self.option('input-slice'), lazy=self.option('lazy'))
+        if not (batch := self.option('batch')):
+            print(check_reachable(atom_slice.content, self.option('pkg'), self.option('location')))
+            return
+        with nullcontext(sys.stdin) if batch == '-' else open(batch, 'r', encoding='utf-8') as f:
+            results = check_reachable_batch(atom_slice.content, read_reachable_queries(f))
+            if self.option('format') == 'json':
+                print(json.dumps(list(results), indent=2))
+                return
+            for result in results:
+                print(json.dumps(result), flush=True)
@@ -8,7 +8,10 @@ import sys
 from cleo.helpers import option
 
 from atom_tools.cli.commands.command import Command
-from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.cache import get_cache
+from atom_tools.lib.converter import SUPPORTED_TYPES, OpenAPI
+from atom_tools.lib.incremental import convert_incremental
+from atom_tools.lib.line_index import EndpointIndex
 from atom_tools.lib.utils import export_json
 
 logger = logging.getLogger(__name__)
@@ -74,19 +77,40 @@ class ConvertCommand(Command):
             'The server url to be included in the server object.',
             flag=False,
             default=os.getenv("OPENAPI_SERVER_URL")
-        )
+        ),
+        option(
+            'incremental',
+            None,
+            'Cache file of the paths created for each file of the slice. When it exists, only '
+            'files whose slice entries changed since it was written are converted again.',
+            flag=False,
+        ),
+        option(
+            'endpoint-index',
+            None,
+            'Also write an index of the endpoints by call line number to this file, for use with '
+            'query-endpoints.',
+            flag=False,
+        ),
+        option(
+            'cache-dir',
+            None,
+            'Directory in which to cache conversion results by slice content, shared with '
+            'query-endpoints. Defaults to the ATOM_TOOLS_CACHE_DIR environment variable.',
+            flag=False,
+            default=os.getenv('ATOM_TOOLS_CACHE_DIR'),
+        ),
     ]
     help = """The convert command converts an atom slice to a different format.
 Currently supports creating an OpenAPI 3.x document based on a usages slice."""
-    loggers = ['atom_tools.lib.converter', 'atom_tools.lib.regex_utils', 'atom_tools.lib.slices',
-               'atom_tools.lib.utils']
+    loggers = ['atom_tools.lib.cache', 'atom_tools.lib.converter', 'atom_tools.lib.incremental',
+               'atom_tools.lib.regex_utils', 'atom_tools.lib.slices', 'atom_tools.lib.utils']
 
     def handle(self):
         """
         Executes the convert command and performs the conversion.
         """
-        supported_types = {'java', 'jar', 'python', 'py', 'javascript', 'js', 'typescript', 'ts', "ruby", "rb", "scala", "sbt"}
-        if self.option('type') not in supported_types:
+        if self.option('type') not in SUPPORTED_TYPES:
             raise ValueError(f'Unknown origin type: {self.option("type")}')
         match self.option('format'):
             case 'openapi3.1.0' | 'openapi3.0.1':
@@ -95,12 +119,22 @@ Currently supports creating an OpenAPI 3.x document based on a usages slice."""
                     self.option('type'),
                     self.option('input-slice'),
                     self.option('semantics-slice'),
+                    get_cache(self.option('cache-dir')),
                 )
 
-                if not (result := converter.endpoints_to_openapi(self.option('server'))):
+                if cache_file := self.option('incremental'):
+                    incremental = convert_incremental(converter, cache_file)
+                    logger.info(incremental.summary())
+                    result = converter.paths_to_openapi(incremental.paths, self.option('server'))
+                else:
+                    result = converter.endpoints_to_openapi(self.option('server'))
+                if not result:
                     logging.warning('No results produced!')
                     sys.exit(1)
                 export_json(result, self.option('output-file'), 4)
                 logger.info(f'OpenAPI document written to {self.option("output-file")}.')
+                if index_file := self.option('endpoint-index'):
+                    EndpointIndex.from_openapi(result).save(index_file)
+                    logger.info(f'Endpoint index written to {index_file}.')
             case _:
                 raise ValueError(f'Unknown destination format: {self.option("format")}')
@@ -0,0 +1,151 @@
+"""
+Batch Convert Command for the atom-tools CLI.
+"""
+import logging
+import os
+import sys
+import time
+
+from cleo.helpers import option
+
+from atom_tools.cli.commands.command import Command
+from atom_tools.lib.batch import (
+    common_dir,
+    convert_slices,
+    find_slices,
+    merge_openapi_documents,
+    output_path,
+)
+from atom_tools.lib.converter import SUPPORTED_TYPES
+from atom_tools.lib.utils import export_json
+
+logger = logging.getLogger(__name__)
+
+
+class ConvertBatchCommand(Command):
+    """
+    This command handles the conversion of many atom slices to OpenAPI documents in parallel.
+
+    Attributes:
+        name (str): The name of the command.
+        description (str): The description of the command.
+        options (list): The list of options for the command.
+        help (str): The help message for the command.
+
+    Methods:
+        handle: Executes the command and performs the conversions.
+    """
+
+    name = 'convert-batch'
+    description = 'Convert many atom usages slices to OpenAPI documents in parallel.'
+    options = [
+        option(
+            'format',
+            'f',
+            'Destination format',
+            flag=False,
+            default='openapi3.1.0',
+        ),
+        option(
+            'input-slices',
+            'i',
+            'Usages slice file, directory to search for usages slices or glob pattern. May be '
+            'specified multiple times. A semantics slice in the same directory (with usages '
+            'replaced by semantics in its name) is used when present.',
+            flag=False,
+            multiple=True,
+        ),
+        option(
+            'type',
+            't',
+            'Origin type of source on which the atom slices were generated.',
+            flag=False,
+            default='java',
+        ),
+        option(
+            'output-file',
+            'o',
+            'Name of the OpenAPI document written for each slice.',
+            flag=False,
+            default=os.getenv("OPENAPI_FILENAME", "openapi.json"),
+        ),
+        option(
+            'output-dir',
+            'd',
+            'Directory to write the documents to. Defaults to the directory of each slice.',
+            flag=False,
+        ),
+        option(
+            'merge',
+            'm',
+            'Also write a single document containing the paths of all the slices to this file.',
+            flag=False,
+        ),
+        option(
+            'workers',
+            'w',
+            'Number of worker processes. Defaults to the number of CPUs.',
+            flag=False,
+        ),
+        option(
+            'server',
+            's',
+            'The server url to be included in the server object.',
+            flag=False,
+            default=os.getenv("OPENAPI_SERVER_URL")
+        )
+    ]
+    help = """The convert-batch command converts many usages slices to OpenAPI 3.x documents using
+a pool of worker processes and reports the time taken for each slice."""
+    loggers = ['atom_tools.lib.batch', 'atom_tools.lib.converter', 'atom_tools.lib.regex_utils',
+               'atom_tools.lib.slices', 'atom_tools.lib.utils',
+               'atom_tools.cli.commands.convert_batch']
+
+    def handle(self):
+        """
+        Executes the batch convert command and performs the conversions.
+        """
+        if self.option('type') not in SUPPORTED_TYPES:
+            raise ValueError(f'Unknown origin type: {self.option("type")}')
+        if self.option('format') not in {'openapi3.1.0', 'openapi3.0.1'}:
+            raise ValueError(f'Unknown destination format: {self.option("format")}')
+        workers = self.option('workers')
+        if workers and not str(workers).isnumeric():
+            raise ValueError('Workers must be a number.')
+        if not (slices := find_slices(self.option('input-slices'))):
+            logger.warning('No usages slices found!')
+            sys.exit(1)
+        base_dir = common_dir(slices)
+        documents = []
+        failed = 0
+        start = time.perf_counter()
+        for result in convert_slices(
+            self.option('format'),
+            self.option('type'),
+            slices,
+            self.option('server'),
+            int(workers) if workers else None,
+        ):
+            if not result.document:
+                failed += 1
+                logger.warning(f'{result.usages}: {result.error} ({result.elapsed:.2f}s)')
+                continue
+            outfile = output_path(
+                result.usages, self.option('output-file'), self.option('output-dir'), base_dir)
+            outfile.parent.mkdir(parents=True, exist_ok=True)
+            export_json(result.document, str(outfile), 4)
+            logger.info(f'{result.usages}: {len(result.document["paths"])} paths in '
+                        f'{result.elapsed:.2f}s written to {outfile}.')
+            if self.option('merge'):
+                documents.append(result.document)
+        logger.info(f'Converted {len(slices) - failed} of {len(slices)} slices in '
+                    f'{time.perf_counter() - start:.2f}s.')
+        if self.option('merge'):
+            export_json(
+                merge_openapi_documents(documents, self.option('format'), self.option('server')),
+                self.option('merge'),
+                4
+            )
+            logger.info(f'Merged OpenAPI document written to {self.option("merge")}.')
+        if failed:
+            sys.exit(1)
@@ -67,6 +67,12 @@ class FilterCommand(Command):
             flag=False,
             default='export',
         ),
+        option(
+            'lazy',
+            None,
+            description='Memory-map the slice and only decode the entries needed. Use for '
+                        'slices larger than the available memory.',
+        ),
     ]
     help = """The filter command filters an atom slice based on specified criteria."""
     loggers = ['atom_tools.lib.filtering', 'atom_tools.lib.utils',
@@ -86,7 +92,8 @@ class FilterCommand(Command):
         cmd, args = 'export', ''
         if self.option('execute') != 'export':
             cmd, args = add_params_to_cmd(self.option('execute'), outfile)
-        filter_runner = Filter(self.option('input-slice'), outfile, self.option('fuzz'))
+        filter_runner = Filter(
+            self.option('input-slice'), outfile, self.option('fuzz'), self.option('lazy'))
         if criteria:
             filters = parse_filters(criteria)
             filter_runner.add_filters(filters)
@@ -1,13 +1,17 @@
 # pylint: disable=R0801
 """Query Endpoints Command for the atom-tools CLI."""
+import json
 import logging
+import os
+from typing import Dict
 
 from cleo.helpers import option
 
 from atom_tools.cli.commands.command import Command
-from atom_tools.lib.converter import OpenAPI
-from atom_tools.lib.filtering import get_ln_range
-from atom_tools.lib.utils import output_endpoints
+from atom_tools.lib.cache import get_cache
+from atom_tools.lib.converter import SUPPORTED_TYPES, OpenAPI
+from atom_tools.lib.filtering import parse_line_filter
+from atom_tools.lib.line_index import EndpointIndex
 
 
 logger = logging.getLogger(__name__)
@@ -38,6 +42,19 @@ class QueryEndpointsCommand(Command):
             flag=False,
             value_required=True,
         ),
+        option(
+            'openapi-file',
+            'o',
+            'An OpenAPI document created by convert to query instead of converting a slice.',
+            flag=False,
+        ),
+        option(
+            'endpoint-index',
+            'x',
+            'An endpoint index written by convert --endpoint-index to query instead of '
+            'converting a slice.',
+            flag=False,
+        ),
         option(
             'type',
             't',
@@ -48,38 +65,56 @@ class QueryEndpointsCommand(Command):
         option(
             'filter-lines',
             'f',
-            'Filter endpoints by line number or range.',
+            'Filter endpoints by line number or range, optionally in a file, e.g. 50-70 or '
+            'routes/server.ts:50-70.',
             flag=False,
         ),
         option(
             'sparse',
             's',
             'Only display names; do not include path and line numbers.',
-        )
+        ),
+        option(
+            'cache-dir',
+            None,
+            'Directory in which to cache conversion results by slice content, shared with '
+            'convert. Defaults to the ATOM_TOOLS_CACHE_DIR environment variable.',
+            flag=False,
+            default=os.getenv('ATOM_TOOLS_CACHE_DIR'),
+        ),
     ]
     help = """The query command can be used to return endpoint results directly to the console. """
-    loggers = ['atom_tools.lib.converter', 'atom_tools.lib.regex_utils', 'atom_tools.lib.slices',
-               'atom_tools.lib.utils']
+    loggers = ['atom_tools.lib.cache', 'atom_tools.lib.converter', 'atom_tools.lib.line_index',
+               'atom_tools.lib.regex_utils', 'atom_tools.lib.slices', 'atom_tools.lib.utils']
 
     def handle(self):
         """
         Executes the query command and performs the conversion.
         """
-        supported_types = {'java', 'jar', 'python', 'py', 'javascript', 'js', 'typescript', 'ts'}
-        if self.option('type') not in supported_types:
+        if index_file := self.option('endpoint-index'):
+            index = EndpointIndex.load(index_file)
+        elif openapi_file := self.option('openapi-file'):
+            with open(openapi_file, 'r', encoding='utf-8') as f:
+                index = EndpointIndex.from_openapi(json.load(f))
+        else:
+            index = EndpointIndex.from_openapi(self._convert())
+        if not index.endpoints:
+            logger.warning('No results produced!')
+            print('')
+        else:
+            file_name, line_filter = None, ()
+            if self.option('filter-lines'):
+                file_name, line_filter = parse_line_filter(self.option('filter-lines'))
+            output = index.output(self.option('sparse'), line_filter, file_name)
+            print(output)
+
+    def _convert(self) -> Dict:
+        if self.option('type') not in SUPPORTED_TYPES:
             raise ValueError(f'Unknown origin type: {self.option("type")}')
         converter = OpenAPI(
             'openapi3.1.0',
             self.option('type'),
             self.option('input-slice'),
+            cache=get_cache(self.option('cache-dir')),
         )
-        result = converter.endpoints_to_openapi('')
-        if not result.get('paths'):
-            logger.warning('No results produced!')
-            print('')
-        else:
-            line_filter = ()
-            if self.option('filter-lines'):
-                line_filter = get_ln_range(self.option('filter-lines'))
-            output = output_endpoints(result, self.option('sparse'), line_filter)
-            print(output)
+        return converter.endpoints_to_openapi('')
@@ -0,0 +1,101 @@
+# pylint: disable=R0801
+"""Serve Command for the atom-tools CLI."""
+import logging
+
+from cleo.helpers import option
+
+from atom_tools.cli.commands.command import Command
+from atom_tools.lib.server import SERVER_SLICES, SliceService, SliceStore, create_server
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServeCommand(Command):
+    """
+    This command starts a server answering requests against slices held in memory.
+
+    Attributes:
+        name (str): The name of the command.
+        description (str): The description of the command.
+        options (list): The list of options for the command.
+        help (str): The help message for the command.
+
+    Methods:
+        handle: Executes the command and runs the server until interrupted.
+    """
+
+    name = 'serve'
+    description = ('Answer convert, filter, query-endpoints and check-reachable requests over '
+                   'JSON-RPC, keeping slices loaded between requests.')
+    options = [
+        option(
+            'host',
+            None,
+            'Address to listen on.',
+            flag=False,
+            default='127.0.0.1',
+        ),
+        option(
+            'port',
+            'p',
+            'Port to listen on.',
+            flag=False,
+            default='8080',
+        ),
+        option(
+            'socket',
+            'u',
+            'Listen on this Unix socket instead of a TCP port.',
+            flag=False,
+        ),
+        option(
+            'max-slices',
+            'm',
+            'Maximum number of slices kept loaded. The default can be set with the '
+            'ATOM_TOOLS_SERVER_SLICES environment variable.',
+            flag=False,
+            default=str(SERVER_SLICES),
+        ),
+        option(
+            'idle-timeout',
+            None,
+            'Unload slices not used for this many seconds. 0 keeps them until --max-slices is '
+            'reached.',
+            flag=False,
+            default='0',
+        ),
+    ]
+    help = """The serve command answers JSON-RPC 2.0 requests POSTed over HTTP. Slices are loaded
+by the first request naming them and their conversions and indexes are reused by later requests."""
+    loggers = ['atom_tools.lib.converter', 'atom_tools.lib.filtering',
+               'atom_tools.lib.line_index', 'atom_tools.lib.regex_utils',
+               'atom_tools.lib.server', 'atom_tools.lib.slices', 'atom_tools.lib.utils',
+               'atom_tools.cli.commands.serve']
+
+    def handle(self):
+        """
+        Executes the serve command and runs the server until interrupted.
+        """
+        for name in ('port', 'max-slices'):
+            if not str(self.option(name)).isnumeric():
+                raise ValueError(f'{name} must be a number.')
+        try:
+            idle_timeout = float(self.option('idle-timeout'))
+        except ValueError as e:
+            raise ValueError('idle-timeout must be a number.') from e
+        store = SliceStore(int(self.option('max-slices')), idle_timeout)
+        server = create_server(
+            SliceService(store),
+            self.option('host'),
+            int(self.option('port')),
+            self.option('socket'),
+        )
+        address = self.option('socket') or f'http://{self.option("host")}:{self.option("port")}'
+        logger.info(f'Listening on {address}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info('Shutting down.')
+        finally:
+            server.server_close()
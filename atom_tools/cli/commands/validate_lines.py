@@ -10,6 +10,7 @@ import sys
 from cleo.helpers import option
 
 from atom_tools.cli.commands.command import Command
+from atom_tools.lib.sources import get_source_cache
 from atom_tools.lib.validator import LineValidator
 
 
@@ -72,12 +73,28 @@ class ValidateLinesCommand(Command):
             'j',
             'JSON report file to store invalid lines. Include valid lines as well using -v flag.',
             flag=False,
-        )
+        ),
+        option(
+            'jobs',
+            None,
+            'Number of worker processes to validate source files with.',
+            flag=False,
+            default='1',
+        ),
+        option(
+            'cache-dir',
+            None,
+            'Directory in which to cache the line indexes of source files, so they are reused '
+            'when validating other slices of the same project. Defaults to the '
+            'ATOM_TOOLS_CACHE_DIR environment variable.',
+            flag=False,
+            default=os.getenv('ATOM_TOOLS_CACHE_DIR'),
+        ),
 
     ]
     help = """Validate source file line numbers in an atom usages or reachables slice."""
     loggers = ['atom_tools.lib.validator', 'atom_tools.lib.regex_utils', 'atom_tools.lib.slices',
-               'atom_tools.lib.utils']
+               'atom_tools.lib.sources', 'atom_tools.lib.utils']
 
     def handle(self):
         """
@@ -89,6 +106,9 @@ class ValidateLinesCommand(Command):
         if not str(self.option('interval')).isnumeric():
             self.line('Interval must be an integer.')
             sys.exit(1)
+        if not str(self.option('jobs')).isnumeric() or int(self.option('jobs')) < 1:
+            self.line('Jobs must be a positive integer.')
+            sys.exit(1)
         supported_types = ['java', 'python', 'py', 'javascript', 'js', 'typescript', 'ts']
         if self.option('type') not in supported_types:
             raise ValueError(f'Unknown origin type: {self.option("type")}')
@@ -107,8 +127,14 @@ class ValidateLinesCommand(Command):
             base_path = pathlib.Path.cwd()
             input_slice = base_path / 'slices.json'
         interval = int(self.option('interval'))
-        validator = LineValidator(input_slice, base_path, interval, self.option('type'))
-        validator.validate_line_numbers()
+        validator = LineValidator(
+            input_slice,
+            base_path,
+            interval,
+            self.option('type'),
+            get_source_cache(self.option('cache-dir')),
+        )
+        validator.validate_line_numbers(int(self.option('jobs')))
         summary = validator.get_results()
         print(summary)
         validator.write_report(self.option('report'), summary, self.io.is_verbose())
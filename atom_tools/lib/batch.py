@@ -0,0 +1,193 @@
+"""
+Functions for converting many slices in parallel.
+"""
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Generator, List, Tuple
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.paths import merge_path_objects
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """
+    The result of converting one usages slice.
+
+    Attributes:
+        usages (str): The usages slice file.
+        document (dict): The OpenAPI document, empty if the conversion failed.
+        elapsed (float): Wall time taken in seconds.
+        error (str): The reason the conversion failed.
+    """
+    usages: str
+    document: Dict
+    elapsed: float
+    error: str = ''
+
+
+def common_dir(slices: List[Tuple[str, str | None]]) -> str:
+    """
+    Finds the common directory of usages slices, to pass to output_path.
+
+    Args:
+        slices (list[tuple[str, str]]): Pairs of usages and semantics (or None) slice files.
+
+    Returns:
+        str: The deepest directory containing all the usages slices, with symbolic links resolved.
+    """
+    return os.path.commonpath([str(Path(usages).parent.resolve()) for usages, _ in slices])
+
+
+def convert_slice(
+        dest_format: str, origin_type: str, usages: str, semantics: str | None, server: str
+) -> BatchResult:
+    """
+    Converts a single usages slice to an OpenAPI document.
+
+    Args:
+        dest_format (str): The destination format, e.g. openapi3.1.0
+        origin_type (str): The origin type of the slice.
+        usages (str): The usages slice file.
+        semantics (str): The semantics slice file, if any.
+        server (str): The server url to include in the document.
+
+    Returns:
+        BatchResult: The document and the time taken, or the reason the conversion failed.
+    """
+    start = time.perf_counter()
+    try:
+        converter = OpenAPI(dest_format, origin_type, usages, semantics)
+        document = converter.endpoints_to_openapi(server)
+    except SystemExit:
+        # import_slice exits when the slice cannot be loaded.
+        return BatchResult(usages, {}, time.perf_counter() - start, 'Could not load slice')
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # A failure converting one slice should not stop the rest of the batch.
+        logger.debug(f'Could not convert {usages}', exc_info=True)
+        return BatchResult(usages, {}, time.perf_counter() - start, f'{type(e).__name__}: {e}')
+    return BatchResult(usages, document, time.perf_counter() - start)
+
+
+def convert_slices(  # pylint: disable=too-many-arguments
+        dest_format: str,
+        origin_type: str,
+        slices: List[Tuple[str, str | None]],
+        server: str = '',
+        workers: int | None = None,
+) -> Generator[BatchResult, None, None]:
+    """
+    Converts usages slices to OpenAPI documents using a process pool.
+
+    Args:
+        dest_format (str): The destination format, e.g. openapi3.1.0
+        origin_type (str): The origin type of the slices.
+        slices (list[tuple[str, str]]): Pairs of usages and semantics (or None) slice files.
+        server (str): The server url to include in each document.
+        workers (int): The number of worker processes. Defaults to the number of CPUs. With a
+            single worker, slices are converted in the current process.
+
+    Yields:
+        BatchResult: The result for each slice, in order of completion.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(slices) == 1:
+        for usages, semantics in slices:
+            yield convert_slice(dest_format, origin_type, usages, semantics, server)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(slices))) as executor:
+        futures = [
+            executor.submit(convert_slice, dest_format, origin_type, usages, semantics, server)
+            for usages, semantics in slices
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def find_slices(inputs: List[str]) -> List[Tuple[str, str | None]]:
+    """
+    Finds usages slices and their matching semantics slices.
+
+    Args:
+        inputs (list[str]): Usages slice files, directories to search for files with usages in
+            their name, or glob patterns.
+
+    Returns:
+        list[tuple[str, str]]: Pairs of usages and semantics slice files. The semantics slice is
+            the file in the same directory with usages replaced by semantics in its name.
+    """
+    found: List[str] = []
+    for i in inputs:
+        if os.path.isdir(i):
+            found.extend(str(p) for p in sorted(Path(i).rglob('*usages*.json')))
+        elif glob.has_magic(i):
+            found.extend(sorted(glob.glob(i, recursive=True)))
+        else:
+            found.append(i)
+    slices: List[Tuple[str, str | None]] = []
+    for usages in dict.fromkeys(found):
+        usages_path = Path(usages)
+        semantics = usages_path.parent / usages_path.name.replace('usages', 'semantics')
+        if semantics.is_file() and semantics != usages_path:
+            slices.append((usages, str(semantics)))
+        else:
+            slices.append((usages, None))
+    return slices
+
+
+def merge_openapi_documents(documents: List[Dict], dest_format: str, server: str = '') -> Dict:
+    """
+    Merges the paths of several OpenAPI documents into a single document.
+
+    Args:
+        documents (list[dict]): The documents to merge. Their paths are modified.
+        dest_format (str): The destination format, e.g. openapi3.1.0
+        server (str): The server url to include in the document.
+
+    Returns:
+        dict: The merged document.
+    """
+    paths: Dict = {}
+    for document in documents:
+        paths = merge_path_objects(paths, document.get('paths') or {})
+    output = {
+        'openapi': dest_format.replace('openapi', ''),
+        'info': {'title': 'OpenAPI Specification', 'version': '1.0.0'},
+        'paths': paths
+    }
+    if server:
+        output['servers'] = [{'url': server}]  # type: ignore[list-item]
+    return output
+
+
+def output_path(usages: str, output_file: str, output_dir: str | None, base_dir: str) -> Path:
+    """
+    Determines where to write the document for a usages slice.
+
+    Args:
+        usages (str): The usages slice file.
+        output_file (str): The name of the document, e.g. openapi.json
+        output_dir (str): The directory to write documents to. The layout of the slice
+            directories relative to base_dir is kept. Defaults to the directory of the slice.
+        base_dir (str): The common directory of all the slices, e.g. from common_dir.
+
+    Returns:
+        Path: The document file path. When the slice name is not the default
+            usages.slices.json, the slice name is used as a prefix.
+    """
+    usages_path = Path(usages)
+    name = output_file
+    if usages_path.name != 'usages.slices.json':
+        name = f'{usages_path.stem}-{output_file}'
+    if not output_dir:
+        return usages_path.parent / name
+    relative = usages_path.parent.resolve().relative_to(Path(base_dir).resolve())
+    return Path(output_dir) / relative / name
@@ -0,0 +1,166 @@
+"""
+A cache of conversion results on disk, keyed by the content of the slices converted.
+
+The cache is enabled with the --cache-dir option or the ATOM_TOOLS_CACHE_DIR environment
+variable. Each result is stored in its own file named after a hash of the slice files, the origin
+type and the atom-tools version, so that results are shared between commands (e.g. convert and
+query-endpoints) and invalidated when the slice or atom-tools changes. Once the files in the
+directory exceed ATOM_TOOLS_CACHE_SIZE bytes, the least recently used are removed.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from atom_tools import __version__
+from atom_tools.lib.profiling import timed
+
+
+logger = logging.getLogger(__name__)
+CACHE_DIR = os.getenv('ATOM_TOOLS_CACHE_DIR')
+CACHE_SIZE = int(os.getenv('ATOM_TOOLS_CACHE_SIZE', str(512 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+
+
+class ConversionCache:
+    """
+    A directory of conversion results with least recently used eviction.
+
+    Args:
+        directory (str): The cache directory, which is created if needed.
+        max_size (int): The maximum total size of the cached results in bytes.
+
+    Attributes:
+        hits (int): The number of results found in the cache.
+        misses (int): The number of results not found in the cache.
+    """
+
+    def __init__(self, directory: str | Path, max_size: int = CACHE_SIZE) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Dict | None:
+        """
+        Returns a cached result, marking it as recently used.
+
+        Args:
+            key (str): The key, as returned by cache_key.
+
+        Returns:
+            dict: The result, or None if it is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            self.misses += 1
+            logger.debug(f'Conversion cache miss for {key}.')
+            return None
+        self.hits += 1
+        logger.debug(f'Conversion cache hit for {key}.')
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """
+        Stores a result, then removes the least recently used results if the cache is too large.
+
+        Args:
+            key (str): The key, as returned by cache_key.
+            result (dict): The result, which must be serializable as JSON.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(result, separators=(',', ':')))
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f'Could not write to the conversion cache: {e}')
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used results until the cache fits in max_size."""
+        evict_lru(self.directory, self.max_size, 'conversion cache')
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+
+def evict_lru(directory: Path, max_size: int, name: str) -> int:
+    """
+    Removes the least recently used json files of a cache directory until they fit in max_size.
+
+    Files are marked as used by updating their modification time when they are read.
+
+    Args:
+        directory (Path): The cache directory.
+        max_size (int): The maximum total size of the files in bytes.
+        name (str): The name of the cache, for logging.
+
+    Returns:
+        int: The total size of the remaining files.
+    """
+    entries = []
+    for path in directory.glob('*.json'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(i[1] for i in entries)
+    for _, size, path in sorted(entries, key=lambda i: i[0]):
+        if total <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        logger.debug(f'Evicted {path.name} from the {name}.')
+    return total
+
+
+def get_cache(directory: str | None = None) -> ConversionCache | None:
+    """
+    Returns the conversion cache in the given directory or ATOM_TOOLS_CACHE_DIR.
+
+    Args:
+        directory (str): The cache directory. Defaults to ATOM_TOOLS_CACHE_DIR.
+
+    Returns:
+        ConversionCache: The cache, or None if no directory is configured.
+    """
+    directory = directory or CACHE_DIR
+    return ConversionCache(directory) if directory else None
+
+
+@timed()
+def cache_key(kind: str, origin_type: str | None, *files: str | Path | None) -> str:
+    """
+    Creates a key from the content of slice files.
+
+    Args:
+        kind (str): The kind of result, e.g. paths.
+        origin_type (str): The origin type of the slices.
+        *files (str): The slice files the result was created from. None is allowed for a slice
+            that was not given.
+
+    Returns:
+        str: A hex digest of the atom-tools version, kind, origin type and file contents.
+    """
+    digest = hashlib.sha256(f'{__version__}\0{kind}\0{origin_type}'.encode('utf-8'))
+    for file in files:
+        if file is None:
+            digest.update(b'\0-')
+            continue
+        digest.update(f'\0{os.path.getsize(file)}\0'.encode('utf-8'))
+        with open(file, 'rb') as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
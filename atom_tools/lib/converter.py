@@ -2,15 +2,14 @@
 Classes and functions used to convert slices.
 """
 import contextlib
-import json.encoder
+import copy
 import logging
 import re
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Collection, Dict, List, Tuple
 from urllib.parse import urlparse
 
-import jmespath
-
 from atom_tools.lib.regex_utils import (
     py_helper,
     path_param_repl,
@@ -19,13 +18,32 @@ from atom_tools.lib.regex_utils import (
     fwd_slash_repl,
     OpenAPIRegexCollection
 )
+from atom_tools.lib.cache import ConversionCache, cache_key
+from atom_tools.lib.paths import (
+    PathsAccumulator,
+    merge_path_objects,
+    merge_x_atom,
+)
 from atom_tools.lib.slices import AtomSlice
-from atom_tools.lib.ruby_converter import convert as ruby_convert
-from atom_tools.lib.scala_converter import convert as scala_convert
+from atom_tools.lib.profiling import timed
+from atom_tools.lib.queries import (
+    OBJECT_SLICE_CALLS,
+    OBJECT_SLICE_METHODS,
+    UDT_FIELDS,
+    UDT_PROCEDURES,
+    UDT_ROUTES,
+    iter_search,
+)
 
 logger = logging.getLogger(__name__)
 regex = OpenAPIRegexCollection()
 
+# Origin types that slices can be converted from.
+SUPPORTED_TYPES = {
+    'java', 'jar', 'python', 'py', 'javascript', 'js', 'typescript', 'ts', 'ruby', 'rb', 'scala',
+    'sbt'
+}
+
 exclusions = ['/content-type', '/application/javascript', '/application/json', '/application/text',
               '/application/xml', '/*', '/*/*', '/allow', '/get', '/post', '/xml', '/cookie',
               '/usestrict', '/maxage', '/sessionid']
@@ -82,11 +100,13 @@ class OpenAPI:
             dest_format: str,
             origin_type: str,
             usages: str,
-            semantics: str = None,
+            semantics: str | None = None,
+            cache: ConversionCache | None = None,
     ) -> None:
-        self.usages: AtomSlice = AtomSlice(usages, origin_type)
-        self.semantics: AtomSlice = AtomSlice(semantics, origin_type) if semantics and Path(
-            semantics).exists() else None
+        self.origin_type = origin_type
+        self.usages_file = usages
+        self.semantics_file = semantics if semantics and Path(semantics).exists() else None
+        self.cache = cache
         self.openapi_version = dest_format.replace('openapi', '')
         self.title = f'OpenAPI Specification for {Path(usages).parent.stem}' if Path(
             usages).parent.stem else "OpenAPI Specification"
@@ -95,13 +115,57 @@ class OpenAPI:
         self.regex_param_count = 0
         self.target_line_nums: Dict[str, Dict] = {}
 
+    @cached_property
+    def usages(self) -> AtomSlice:
+        """The usages slice, loaded the first time it is accessed."""
+        return AtomSlice(self.usages_file, self.origin_type)
+
+    @cached_property
+    def semantics(self) -> AtomSlice | None:
+        """The semantics slice if one was given, loaded the first time it is accessed."""
+        return AtomSlice(self.semantics_file, self.origin_type) if self.semantics_file else None
+
+    def with_content(self, content: Dict) -> 'OpenAPI':
+        """
+        Creates a converter for other content from the same usages slice.
+
+        Args:
+            content (dict): The content to convert, e.g. the entries of one file of the slice.
+
+        Returns:
+            OpenAPI: A converter with the settings of this one and none of its state.
+        """
+        converter = copy.copy(self)
+        converter.usages = self.usages.with_content(content)
+        converter.cache = None
+        converter.file_endpoint_map = {}
+        converter.params = {}
+        converter.regex_param_count = 0
+        converter.target_line_nums = {}
+        return converter
+
     def convert_usages(self) -> Dict[str, Dict]:
         """
-        Converts usages to OpenAPI.
+        Converts usages to OpenAPI, using the conversion cache if there is one.
         """
+        if not self.cache:
+            return self._convert_usages()
+        semantics = self.semantics_file if self.origin_type in ('scala', 'sbt') else None
+        key = cache_key('paths', self.origin_type, self.usages_file, semantics)
+        if (paths := self.cache.get(key)) is None:
+            paths = self._convert_usages()
+            self.cache.put(key, paths)
+        return paths
+
+    def _convert_usages(self) -> Dict[str, Dict]:
+        # The Ruby and Scala converters are only imported for their origin types.
         if self.usages.origin_type in ("rb", "ruby"):
+            # pylint: disable-next=import-outside-toplevel
+            from atom_tools.lib.ruby_converter import convert as ruby_convert
             return ruby_convert(self.usages)
         if self.usages.origin_type in ("scala", "sbt"):
+            # pylint: disable-next=import-outside-toplevel
+            from atom_tools.lib.scala_converter import convert as scala_convert
             return scala_convert(self.usages, self.semantics)
         methods = self._process_methods()
         methods = self.methods_to_endpoints(methods)
@@ -168,7 +232,12 @@ class OpenAPI:
         """
         Generates an OpenAPI document with paths from usages.
         """
-        paths_obj = self.convert_usages()
+        return self.paths_to_openapi(self.convert_usages(), server)
+
+    def paths_to_openapi(self, paths_obj: Dict[str, Dict], server: str = '') -> Dict[str, Any]:
+        """
+        Generates an OpenAPI document with the given paths object.
+        """
         output = {
             'openapi': self.openapi_version,
             'info': {'title': self.title, 'version': '1.0.0'},
@@ -179,6 +248,7 @@ class OpenAPI:
 
         return output
 
+    @timed()
     def methods_to_endpoints(self, method_map: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert a method map to a map of endpoints.
@@ -203,6 +273,7 @@ class OpenAPI:
                 new_method_map['file_names'][file_name] = {'resolved_methods': new_resolved}
         return new_method_map
 
+    @timed()
     def populate_endpoints(self, method_map: Dict) -> Dict[str, Any]:
         """
         Populate the endpoints based on the provided method_map.
@@ -213,16 +284,12 @@ class OpenAPI:
             dict: The populated endpoints.
 
         """
-        paths_object: Dict = {}
+        paths = PathsAccumulator()
         for resolved_methods in method_map.values():
             for key, value in resolved_methods.items():
                 for m in value['resolved_methods'].items():
-                    new_path_item = self.create_paths_item(key, m)
-                    if paths_object:
-                        paths_object = merge_path_objects(paths_object, new_path_item)
-                    else:
-                        paths_object = new_path_item
-        return paths_object
+                    paths.add(self.create_paths_item(key, m))
+        return paths.to_dict()
 
     def _add_py_request_methods(self, paths_item_object: Dict) -> Dict:
         """Add default request methods for flask and django"""
@@ -417,23 +484,30 @@ class OpenAPI:
             )
         return params
 
+    @timed()
     def _identify_target_line_nums(self, methods: Dict[str, Any]) -> Dict:
-        file_names = list(methods['file_names'].keys())
-        if not file_names:
-            return {}
-        file_names = [f'fileName==`{i}`' for i in file_names]
-        conditional = '*[?' + ' || '.join(file_names) + (
-            '][].{file_name: fileName, methods: usages[].targetObj[].{resolved_method: '
-            'resolvedMethod || callName || code || name, line_number: lineNumber}}')
-        pattern = jmespath.compile(conditional)  # type: ignore
-        result = pattern.search(self.usages.content)
-        result = {i['file_name']: i['methods'] for i in result if i['methods']}
-        targets: Dict = {i: {} for i in result}
-
-        for k, v in result.items():
-            for i in v:
-                targets[k] = merge_targets(targets[k], {i['resolved_method']: i['line_number']})
+        """
+        Maps the target objects of each file to their line numbers.
+
+        Only the last objectSlices entry of a file with target objects is used.
 
+        Args:
+            methods (dict): The methods by file name.
+
+        Returns:
+            dict: Line numbers by resolved method, grouped by file name.
+        """
+        targets: Dict = {}
+        for file_name in methods['file_names']:
+            for entry in reversed(self.usages.index.entries.get(file_name, [])):
+                if target_objs := get_target_objs(entry):
+                    file_targets = targets.setdefault(file_name, {})
+                    for i in target_objs:
+                        merge_targets(file_targets, {
+                            i.get('resolvedMethod') or i.get('callName') or i.get('code')
+                            or i.get('name'): i.get('lineNumber')
+                        })
+                    break
         return targets
 
     def _paths_object_helper(
@@ -495,6 +569,7 @@ class OpenAPI:
             self.params[new_endpoint] = params
         return new_endpoint.replace("/{}", "/")
 
+    @timed()
     def _extract_methods_from_udt(self) -> Dict[str, Any]:
         """
         Extract HTTP method and endpoint pairings from userDefinedTypes fields.
@@ -506,15 +581,8 @@ class OpenAPI:
             dict: A paths object mapping endpoints to their HTTP method operations.
         """
         ops = {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}
-        pattern = jmespath.compile(
-            'userDefinedTypes[].{file_name: fileName, line_number: lineNumber,'
-            ' fields: fields[].name}'
-        )
-        result = pattern.search(self.usages.content)
-        if not result:
-            return {}
         paths_object: Dict = {}
-        for entry in result:
+        for entry in iter_search(UDT_ROUTES, self.usages.content):
             fields = entry.get('fields') or []
             file_name = entry.get('file_name', '')
             line_number = entry.get('line_number')
@@ -534,12 +602,8 @@ class OpenAPI:
                         file_name, [line_number], None
                     )
                     path_item.update(ln_entry)
-                if paths_object.get(ep):
-                    paths_object[ep] = merge_path_objects(
-                        paths_object[ep], path_item
-                    )
-                else:
-                    paths_object[ep] = path_item
+                # Merged as paths objects, so that the line numbers of each entry are kept.
+                paths_object = merge_path_objects(paths_object, {ep: path_item})
         return paths_object
 
     def _get_java_class_prefixes(self) -> Dict[str, str]:
@@ -601,21 +665,20 @@ class OpenAPI:
         """
         if self.usages.origin_type not in ('java', 'jar'):
             return {}
-        for s in self.usages.content.get('objectSlices', []):
-            if s.get('fileName') == file_name and s.get('lineNumber') == line_number:
-                found: set = set()
-                for usage in s.get('usages', []):
-                    for call in usage.get('invokedCalls', []):
-                        resolved = call.get('resolvedMethod') or ''
-                        call_name = call.get('callName') or ''
-                        if 'ResponseEntity' in resolved and call_name in RESPONSE_ENTITY_STATUS_MAP:
-                            found.add(RESPONSE_ENTITY_STATUS_MAP[call_name])
-                if found:
-                    return {code: {'description': STATUS_DESCRIPTIONS.get(code, 'Success')} for code in sorted(found)}
-                break
+        if s := self.usages.index.get_entry(file_name, line_number):
+            found: set = set()
+            for usage in s.get('usages', []):
+                for call in usage.get('invokedCalls', []):
+                    resolved = call.get('resolvedMethod') or ''
+                    call_name = call.get('callName') or ''
+                    if 'ResponseEntity' in resolved and call_name in RESPONSE_ENTITY_STATUS_MAP:
+                        found.add(RESPONSE_ENTITY_STATUS_MAP[call_name])
+            if found:
+                return {code: {'description': STATUS_DESCRIPTIONS.get(code, 'Success')} for code in sorted(found)}
         status = HTTP_METHOD_DEFAULT_STATUS.get(http_method, '200')
         return {status: {'description': STATUS_DESCRIPTIONS.get(status, 'OK')}}
 
+    @timed()
     def _process_calls(self, method_map: Dict) -> Dict[str, Any]:
         """
         Process calls and return a new method map.
@@ -634,25 +697,18 @@ class OpenAPI:
 
         return method_map
 
+    @timed()
     def _process_methods(self) -> Dict[str, List[str]]:
         """
         Create a dictionary of file names and their corresponding methods.
         """
-        method_map = self._process_methods_helper(
-            'objectSlices[].{file_name: fileName, resolved_methods: usages[].*.resolvedMethod[]}')
-
-        calls = self._process_methods_helper(
-            'objectSlices[].{file_name: fileName, resolved_methods: usages[].*[?resolvedMethod][]'
-            '[].resolvedMethod[]}')
-
-        user_defined_types = self._process_methods_helper(
-            'userDefinedTypes[].{file_name: fileName, resolved_methods: fields[].name}')
+        method_map = self._process_methods_helper(OBJECT_SLICE_METHODS)
+        calls = self._process_methods_helper(OBJECT_SLICE_CALLS)
+        user_defined_types = self._process_methods_helper(UDT_FIELDS)
 
         if self.usages.origin_type in ('py', 'python'):
             user_defined_types = merge_path_objects(
-                user_defined_types,
-                self._process_methods_helper('userDefinedTypes[].{file_name: fileName, '
-                                             'resolved_methods: procedures[].resolvedMethod}'))
+                user_defined_types, self._process_methods_helper(UDT_PROCEDURES))
 
         for key, value in calls.items():
             if method_map.get(key):
@@ -682,15 +738,10 @@ class OpenAPI:
             dict: The resolved methods.
 
         """
-        dict_resolved_pattern = jmespath.compile(pattern)
-        result = []
-        if matches := dict_resolved_pattern.search(self.usages.content):
-            result = [
-                i for i in matches
-                if i.get('resolved_methods')
-            ]
         resolved: Dict = {}
-        for r in result:
+        for r in iter_search(pattern, self.usages.content):
+            if not r.get('resolved_methods'):
+                continue
             file_name = r['file_name']
             methods = r['resolved_methods']
             if self.usages.origin_type in ("rb", "ruby"):
@@ -752,7 +803,7 @@ class OpenAPI:
                 resolved_map[method] = {'endpoints': eps}
         return resolved_map
 
-    def _query_calls(self, file_name: str, resolved_methods: List[str]) -> List:
+    def _query_calls(self, file_name: str, resolved_methods: Collection[str]) -> List:
         """
         Query calls for the given function name and resolved methods.
 
@@ -763,33 +814,7 @@ class OpenAPI:
         Returns:
             list[dict]: List of invoked calls and argument to calls.
         """
-        result = self._query_calls_helper(file_name)
-        calls = []
-        for call in result:
-            m = call.get('resolvedMethod', '')
-            if m and m in resolved_methods:
-                calls.append(call)
-        return calls
-
-    def _query_calls_helper(self, file_name: str) -> List[Dict]:
-        """
-        A function to help query calls.
-
-        Args:
-            file_name (str): The name of the function to query calls for.
-
-        Returns:
-             list: The result of searching for the calls pattern in the usages.
-        """
-        pattern = (f'objectSlices[?fileName==`{json.dumps(file_name.encode().decode())}`].usages[]'
-                   f'.*[?callName][][]')
-        compiled_pattern = jmespath.compile(pattern)
-        result = compiled_pattern.search(self.usages.content)
-        pattern = (f'userDefinedTypes[?fileName==`{json.dumps(file_name.encode().decode())}`][].procedures[]')
-        compiled_pattern = jmespath.compile(pattern)
-        result2 = compiled_pattern.search(self.usages.content)
-        result += result2
-        return result
+        return self.usages.index.get_calls(file_name, resolved_methods)
 
 
 def create_ln_entries(filename: str, call_line_numbers: List, line_number: int | None) -> Dict:
@@ -848,86 +873,39 @@ def filter_calls(
     Returns:
         dict: Dictionary of relevant endpoints and calls
     """
+    grouped_calls: Dict[str, List] = {}
+    for i in queried_calls:
+        grouped_calls.setdefault(i.get('resolvedMethod', ''), []).append(i)
     for method in resolved_methods['resolved_methods'].keys():
-        calls = [
-            i for i in queried_calls
-            if i.get('resolvedMethod', '') == method
-        ]
-        lns = [
-            i.get('lineNumber')
-            for i in calls
-            if i.get('lineNumber') and i.get('resolvedMethod', '') == method
-        ]
+        calls = grouped_calls.get(method, [])
+        lns = [i.get('lineNumber') for i in calls if i.get('lineNumber')]
         resolved_methods['resolved_methods'][method].update({'calls': calls, 'line_nos': lns})
     return resolved_methods
 
 
-def merge_operations(op1: Dict, op2: Dict) -> Dict:
-    """
-    Merge two dictionaries of operations.
-
-    Args:
-        op1 (dict): The first dictionary of operations.
-        op2 (dict): The second dictionary of operations.
-
-    Returns:
-        dict: The merged dictionary of operations.
-    """
-    for k, v in op2.items():
-        if v and not op1.get(k) or op1[k] == {}:
-            op1[k] = v
-        elif k == 'parameters' and v:
-            op1[k] = merge_params(op1[k], v)
-    return op1
-
-
-def merge_params(p1: List, p2: List) -> List:
-    """
-    Merge two lists of parameters.
-
-    Args:
-        p1 (list): The first list of parameters.
-        p2 (list): The second list of parameters.
-
-    Returns:
-        list: The merged list of parameters.
+def get_target_objs(entry: Dict) -> List[Dict]:
     """
-    names = [i.get('name') for i in p1]
-    for i in p2:
-        if i.get('name', '') not in names:
-            p1.append(i)
-    return p1
-
-
-def merge_path_objects(p1: Dict, p2: Dict) -> Dict:
-    """
-    Merge two dictionaries representing path objects.
+    Returns the target objects of the usages in an objectSlices entry.
 
     Args:
-        p1 (dict): The first dictionary representing a path object.
-        p2 (dict): The second dictionary representing a path object.
+        entry (dict): The objectSlices entry.
 
     Returns:
-        dict: The merged dictionary representing the path object.
+        list[dict]: The target objects, in order.
     """
-    for key, value in p2.items():
-        if key not in p1:
-            p1[key] = value
+    target_objs: List[Dict] = []
+    usages = entry.get('usages')
+    if not isinstance(usages, list):
+        return target_objs
+    for usage in usages:
+        if not isinstance(usage, dict):
             continue
-        for k, v in value.items():
-            if p1[key].get(k):
-                if k == 'resolved_methods':
-                    p1[key][k].extend(v)
-                elif k == 'x-atom-usages':
-                    p1[key][k] = merge_x_atom(p1[key][k], v)
-                elif k == 'parameters':
-                    p1[key][k] = merge_params(p1[key][k], v)
-                elif k in {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}:
-                    p1[key][k] = merge_operations(p1[key][k], v)
-                continue
-            p1[key][k] = v
-
-    return p1
+        target = usage.get('targetObj')
+        if isinstance(target, dict):
+            target_objs.append(target)
+        elif isinstance(target, list):
+            target_objs.extend(i for i in target if isinstance(i, dict))
+    return target_objs
 
 
 def merge_targets(t1: Dict, t2: Dict) -> Dict:
@@ -949,29 +927,6 @@ def merge_targets(t1: Dict, t2: Dict) -> Dict:
     return t1
 
 
-def merge_x_atom(x1: Dict, x2: Dict) -> Dict:
-    """
-    Merge two dictionaries of x-atom-usages.
-
-    Args:
-        x1 (dict): The first dictionary of x atoms.
-        x2 (dict): The second dictionary of x atoms.
-
-    Returns:
-        dict: The merged dictionary of x atoms.
-    """
-    for key, value in x2.items():
-        if key not in x1:
-            x1[key] = value
-            continue
-        for k, v in value.items():
-            if x1[key].get(k):
-                x1[key][k].extend(v)
-            else:
-                x1[key][k] = v
-    return x1
-
-
 def remove_nested_parameters(data: Dict) -> Dict[str, Dict | List]:
     """
     Removes nested path parameters from the given data.
@@ -1,15 +1,13 @@
 """Classes and functions for filtering slices"""
 import logging
-import pathlib
 import re
-from copy import deepcopy
 from dataclasses import dataclass
 from typing import Dict, Generator, List, Set, Tuple
 
-from thefuzz import fuzz, process  # type: ignore
-
+from atom_tools.lib.line_index import FlowIndex
+from atom_tools.lib.profiling import timed
 from atom_tools.lib.regex_utils import FilteringPatternCollection
-from atom_tools.lib.slices import FlatSlice
+from atom_tools.lib.slices import STREAMED_KEYS, FlatSlice
 
 
 logger = logging.getLogger(__name__)
@@ -27,14 +25,37 @@ class AttributeFilter:
 
 class Filter:
     """Class for filtering a slice"""
-    def __init__(self, slice_file: str, outfile: str, fuzz_pct: str | None) -> None:
-        self.slc = FlatSlice(slice_file)
+    def __init__(
+            self, slice_file: str, outfile: str, fuzz_pct: str | None, lazy: bool = False
+    ) -> None:
+        self.slc = FlatSlice(slice_file, lazy=lazy)
         self.outfile = outfile
         self.attribute_filters: List[AttributeFilter] = []
-        self.results: List[str] = []
-        self.negative_results: List[str] = []
+        self.results: List[Tuple[int, int]] = []
+        self.negative_results: List[Tuple[int, int]] = []
         self.fuzz = int(fuzz_pct) if fuzz_pct else None
 
+    @classmethod
+    def with_slice(cls, slc: FlatSlice, fuzz_pct: str | int | None) -> 'Filter':
+        """
+        Creates a filter for a slice that is already loaded.
+
+        Args:
+            slc (FlatSlice): The slice.
+            fuzz_pct (str): The minimum fuzzy match score, or None to match regular expressions.
+
+        Returns:
+            Filter: A filter without any attribute filters.
+        """
+        filter_obj = cls.__new__(cls)
+        filter_obj.slc = slc
+        filter_obj.outfile = ''
+        filter_obj.attribute_filters = []
+        filter_obj.results = []
+        filter_obj.negative_results = []
+        filter_obj.fuzz = int(fuzz_pct) if fuzz_pct else None
+        return filter_obj
+
     def add_filters(self, filters: Generator) -> None:
         """Create a filter and add it to the relevant list"""
         for target, value, condition in filters:
@@ -68,10 +89,10 @@ class Filter:
     def filter_usages(self) -> Dict:
         """Filters the usage slice"""
         if self.attribute_filters:
-            for f in self.attribute_filters:
-                if self.fuzz:
-                    self._search_values_fuzzy(f)
-                else:
+            if self.fuzz:
+                self._search_values_fuzzy(self.attribute_filters)
+            else:
+                for f in self.attribute_filters:
                     self._search_values(f)
         if self.results:
             return self._process_slice_indexes()
@@ -81,46 +102,40 @@ class Filter:
         if include:
             filtered_slice: Dict[str, List] = {'objectSlices': [], 'userDefinedTypes': []}
             include -= exclude
-            for i in include:
-                if i:
-                    filtered_slice[i.group('type')].append(
-                        self.slc.content[i.group('type')][int(i.group('index'))])
+            for key_id, index in sorted(include):
+                key = STREAMED_KEYS[key_id]
+                filtered_slice[key].append(self.slc.content[key][index])
             return filtered_slice
-        return self._handle_exclude_only(exclude) if exclude else self.slc.content
+        return self._handle_exclude_only(exclude)
 
-    def _handle_exclude_only(self, exclude: Set[re.Match]) -> Dict:
-        filtered_slice = deepcopy(self.slc.content)
-        for i in exclude:
-            filtered_slice[i.group('type')][int(i.group('index'))] = None
+    def _handle_exclude_only(self, exclude: Set[Tuple[int, int]]) -> Dict:
+        filtered_slice: Dict = {}
         for key, value in self.slc.content.items():
-            for k, v in value.items():
-                if v is None:
-                    filtered_slice[key].pop(k)
+            if key in {'objectSlices', 'userDefinedTypes'}:
+                key_id = STREAMED_KEYS.index(key)
+                value = [v for i, v in enumerate(value) if (key_id, i) not in exclude]
+            filtered_slice[key] = value
         return filtered_slice
 
-    def _process_fuzzy_results(
-            self, f: AttributeFilter, result: List[Tuple[str, int, str]]) -> None:
+    def _process_fuzzy_results(self, f: AttributeFilter, result: List[str]) -> None:
         include = []
         exclude = []
         for i in result:
             if f.condition == '==':
-                include.extend(self.slc.attrib_dicts.get(f.attribute, {}).get(i[2], []))
+                include.extend(self.slc.attrib_dicts.get(f.attribute, {}).get(i, []))
             else:
-                exclude.extend(self.slc.attrib_dicts.get(f.attribute, {}).get(i[2], []))
+                exclude.extend(self.slc.attrib_dicts.get(f.attribute, {}).get(i, []))
         self.results.extend(list(set(include)))
         self.negative_results.extend(list(set(exclude)))
 
+    @timed()
     def _process_slice_indexes(self) -> Dict:
-        include_indexes = set()
-        exclude_indexes = set()
-        for k in self.results:
-            if matched := patterns.top_level_flat_loc_index.search(k):
-                include_indexes.add(matched)
-        for k in self.negative_results:
-            if matched := patterns.top_level_flat_loc_index.search(k):
-                exclude_indexes.add(matched)
+        top_level = {STREAMED_KEYS.index('objectSlices'), STREAMED_KEYS.index('userDefinedTypes')}
+        include_indexes = {i for i in self.results if i[0] in top_level}
+        exclude_indexes = {i for i in self.negative_results if i[0] in top_level}
         return self._exclude_indexes(include_indexes, exclude_indexes)
 
+    @timed()
     def _search_values(self, f: AttributeFilter) -> None:
         include = []
         exclude = []
@@ -133,23 +148,90 @@ class Filter:
         self.results.extend(list(set(include)))
         self.negative_results.extend(list(set(exclude)))
 
-    def _search_values_fuzzy(self, f: AttributeFilter) -> None:
-        search_values = self.slc.attrib_dicts.get(f.attribute, {}).keys()
-        if f.fn_only:
-            search_values = {
-                i: f'{pathlib.Path(i).stem}{pathlib.Path(i).suffix}'
-                for i in search_values
-            }
-        else:
-            search_values = {i: i for i in search_values}
-        if result := process.extractBests(
-            f.value,
-            search_values,
-            limit=len(search_values),
-            score_cutoff=self.fuzz,
-            scorer=fuzz.ratio,
-        ):
-            self._process_fuzzy_results(f, result)
+    @timed()
+    def _search_values_fuzzy(self, filters: List[AttributeFilter]) -> None:
+        # The matcher (and rapidfuzz) is only imported when a fuzzy filter is used.
+        # pylint: disable-next=import-outside-toplevel
+        from atom_tools.lib.fuzzy import FuzzyMatcher
+        groups: Dict[Tuple[str, bool], List[AttributeFilter]] = {}
+        for f in filters:
+            groups.setdefault((f.attribute, f.fn_only), []).append(f)
+        for (attribute, fn_only), group in groups.items():
+            matcher = FuzzyMatcher(self.slc.attrib_dicts.get(attribute, {}).keys(), fn_only)
+            matches = matcher.match([f.value for f in group], self.fuzz)  # type: ignore[arg-type]
+            for f, result in zip(group, matches):
+                if result:
+                    self._process_fuzzy_results(f, result)
+
+
+class ReachableIndex:
+    """
+    The package:version permutations and flow locations of the reachables of a slice.
+
+    The reachables are read once, so that any number of packages and locations can be checked
+    without scanning the slice again.
+
+    Args:
+        data (dict): The slice content.
+
+    Attributes:
+        purls (set[str]): The package:version permutations of the reachable purls.
+        flows (FlowIndex): The flows indexed by parentFileName and line number.
+    """
+
+    @timed('ReachableIndex')
+    def __init__(self, data: Dict) -> None:
+        all_purls: Set[str] = set()
+
+        def iter_reachables() -> Generator[Dict, None, None]:
+            for reachable in data.get('reachables') or []:
+                if not isinstance(reachable, dict):
+                    yield {}
+                    continue
+                if isinstance(purls := reachable.get('purls'), list):
+                    all_purls.update(purls)
+                yield reachable
+
+        self.flows = FlowIndex(iter_reachables())
+        self.purls: Set[str] = set()
+        for purl in all_purls:
+            self.purls.update(parse_purl(purl))
+
+    def check_purl(self, purl: str) -> bool:
+        """Checks if a package:version is reachable."""
+        return purl.lower() in self.purls
+
+    def check_location(self, loc: str) -> bool:
+        """
+        Checks if a flow is in a <filename>:<linenumber> or <filename>:<start>-<end> location.
+
+        Raises:
+            ValueError: If the location is not in either format.
+        """
+        filename, ln = parse_location(loc)
+        return self.flows.touches(filename, ln)
+
+    def check(self, query: Dict) -> Dict:
+        """
+        Checks a query with a pkg or location key, as given to check-reachable.
+
+        Args:
+            query (dict): The query.
+
+        Returns:
+            dict: The query with a reachable result, or an error if the query is invalid.
+        """
+        result = dict(query)
+        if 'error' in result:
+            return result
+        try:
+            if pkg := query.get('pkg'):
+                result['reachable'] = self.check_purl(str(pkg))
+            else:
+                result['reachable'] = self.check_location(str(query.get('location') or ''))
+        except ValueError as e:
+            result['error'] = str(e)
+        return result
 
 
 def check_reachable_purl(data: Dict, purl: str) -> bool:
@@ -178,7 +260,7 @@ def create_attribute_filter(key: str, value: str, fuzz_pct: int | None) -> Tuple
 
 def create_purl_map(data: Dict) -> Dict:
     """Map purls to package:version strings"""
-    purls = set(patterns.jmespath_purls.search(data))
+    purls = set(iter_reachable_purls(data))
     purl_dict = {}
     for purl in purls:
         formatted_purls = parse_purl(purl)
@@ -189,23 +271,39 @@ def create_purl_map(data: Dict) -> Dict:
 
 def enumerate_reachable_purls(data: Dict) -> Set[str]:
     """Enumerate reachable purls"""
-    all_purls = set(patterns.jmespath_purls.search(data))
+    all_purls = set(iter_reachable_purls(data))
     purls = []
     for purl in all_purls:
         purls.extend(parse_purl(purl))
     return set(purls)
 
 
-def filter_flows(reachables: List[Dict], filename: str, ln: Tuple[int, int]) -> bool:
-    """Filters flows"""
-    if not reachables:
-        return False
-    for flows in reachables:
-        for f in flows.get('flows', []):
-            num = f.get('lineNumber')
-            if num and num not in ln:
+def iter_reachable_purls(data: Dict) -> Generator[str, None, None]:
+    """Yields the purls of each reachable, decoding one reachables entry at a time."""
+    for reachable in data.get('reachables') or []:
+        if isinstance(reachable, dict) and isinstance(purls := reachable.get('purls'), list):
+            yield from purls
+
+
+def filter_flows(reachables: List[Dict], filename: str, ln: Tuple[int, int] | Tuple) -> bool:
+    """
+    Checks if any flow is in a file within a line range.
+
+    Args:
+        reachables (list[dict]): The reachables of a slice.
+        filename (str): The file name or path suffix of the parentFileName.
+        ln (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+
+    Returns:
+        bool: True if a flow matches. Flows without a line number match any line.
+    """
+    # A single query is answered by scanning the flows; ReachableIndex indexes them for batches.
+    for reachable in reachables or []:
+        for flow in reachable.get('flows') or []:
+            num = flow.get('lineNumber')
+            if num and ln and not ln[0] <= num <= ln[1]:
                 continue
-            if f.get('parentFileName').endswith(filename):
+            if (flow.get('parentFileName') or '').endswith(filename):
                 return True
     return False
 
@@ -224,6 +322,39 @@ def get_ln_range(value: str) -> Tuple[int, int] | Tuple:
     return ()
 
 
+def parse_location(loc: str) -> Tuple[str, Tuple[int, int] | Tuple]:
+    """
+    Extracts the file name and line numbers of a check-reachable location.
+
+    Args:
+        loc (str): The location, e.g. routes/server.ts:20 or server.ts:20-40.
+
+    Returns:
+        tuple: The file name without its directory and the line range as returned by
+            get_ln_range.
+
+    Raises:
+        ValueError: If the location is not in the format <filename>:<linenumber>.
+    """
+    if match := patterns.reachable_location.search(loc):
+        return match['file'], get_ln_range(match['line'])
+    raise ValueError(f'Invalid location: {loc}')
+
+
+def parse_line_filter(value: str) -> Tuple[str | None, Tuple[int, int] | Tuple]:
+    """
+    Extracts an optional file name and line numbers from a [<filename>:]<linenumber> argument.
+
+    Args:
+        value (str): The argument, e.g. 50-70 or routes/server.ts:50-70.
+
+    Returns:
+        tuple: The file name or None, and the line range as returned by get_ln_range.
+    """
+    file_name, _, lines = value.rpartition(':')
+    return file_name or None, get_ln_range(lines)
+
+
 def parse_filters(filter_options: str) -> Generator[Tuple[str, str, str], None, None]:
     """Parse file filters"""
     options = filter_options.split(',')
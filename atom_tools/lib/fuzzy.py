@@ -0,0 +1,81 @@
+"""
+Batched fuzzy matching of filter values against the distinct values of a slice attribute.
+
+The values are normalized once (lower case, letters and numbers only, as thefuzz did) and each
+query is scored against all of them in a single rapidfuzz call rather than one pair at a time.
+When NumPy is installed, the queries of all the fuzzy filters on an attribute are scored together
+with rapidfuzz.process.cdist, which uses ATOM_TOOLS_FUZZY_WORKERS threads (all CPUs by default).
+"""
+import importlib.util
+import os
+import pathlib
+from typing import Iterable, List, Sequence
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+from atom_tools.lib.profiling import timed
+
+
+FUZZY_WORKERS = int(os.getenv('ATOM_TOOLS_FUZZY_WORKERS', '-1'))
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+class FuzzyMatcher:
+    """
+    The normalized values of a slice attribute, for scoring many queries against them at once.
+
+    Args:
+        values (Iterable[str]): The distinct values of the attribute.
+        fn_only (bool): Match against the file name of each value instead of the whole path.
+
+    Attributes:
+        values (list[str]): The values, in the order they were given.
+        choices (list[str]): The normalized value (or file name) of each value.
+    """
+
+    def __init__(self, values: Iterable[str], fn_only: bool = False) -> None:
+        self.values = list(values)
+        self.choices = [
+            default_process(pathlib.Path(i).name if fn_only else i) for i in self.values
+        ]
+
+    @timed('FuzzyMatcher.match')
+    def match(
+            self, queries: Sequence[str], score_cutoff: float, use_numpy: bool = HAS_NUMPY
+    ) -> List[List[str]]:
+        """
+        Finds the values similar to each query.
+
+        Args:
+            queries (Sequence[str]): The queries.
+            score_cutoff (float): The minimum similarity (fuzz.ratio of the normalized strings)
+                between 0 and 100.
+            use_numpy (bool): Score all the queries in one call to process.cdist.
+
+        Returns:
+            list[list[str]]: The values matching each query, in the order of values.
+        """
+        if not queries:
+            return []
+        processed = [default_process(q) for q in queries]
+        if use_numpy:
+            scores = process.cdist(
+                processed,
+                self.choices,
+                scorer=fuzz.ratio,
+                score_cutoff=score_cutoff,
+                workers=FUZZY_WORKERS,
+            )
+            return [[self.values[i] for i in (row >= score_cutoff).nonzero()[0]] for row in scores]
+        matches = []
+        for query in processed:
+            found = process.extract(
+                query,
+                self.choices,
+                scorer=fuzz.ratio,
+                score_cutoff=score_cutoff,
+                limit=None,
+            )
+            matches.append([self.values[i] for i in sorted(i[2] for i in found)])
+        return matches
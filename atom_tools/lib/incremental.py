@@ -0,0 +1,202 @@
+"""
+Functions for converting only the files of a usages slice that changed since the last conversion.
+
+The paths created for each fileName are stored in a cache file together with a digest of the
+objectSlices and userDefinedTypes entries of the file. On the next conversion, only files whose
+entries have a different digest are converted again, and the paths of every file are merged.
+"""
+import hashlib
+import json
+import logging
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from atom_tools import __version__
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.paths import PathsAccumulator
+from atom_tools.lib.profiling import phase, timed
+
+
+logger = logging.getLogger(__name__)
+CACHE_VERSION = 2
+# The converters for these origin types relate entries across files, e.g. Rails routes, so their
+# slices are always converted whole.
+UNSUPPORTED_TYPES = {'rb', 'ruby', 'scala', 'sbt'}
+
+
+@dataclass
+class IncrementalResult:
+    """
+    The result of an incremental conversion.
+
+    Attributes:
+        paths (dict): The OpenAPI paths object.
+        converted (int): The number of files converted.
+        reused (int): The number of files whose paths were taken from the cache.
+        removed (int): The number of cached files no longer in the slice.
+    """
+    paths: Dict
+    converted: int = 0
+    reused: int = 0
+    removed: int = 0
+
+    def summary(self) -> str:
+        """Returns a one line summary of the files converted and reused."""
+        return (f'Converted {self.converted} files, reused {self.reused} unchanged files, '
+                f'dropped {self.removed} removed files.')
+
+
+def group_by_file(content: Dict) -> Dict[str | None, Dict[str, List[Dict]]]:
+    """
+    Groups the objectSlices and userDefinedTypes entries of a slice by fileName.
+
+    Args:
+        content (dict): The slice content.
+
+    Returns:
+        dict: The content for each file, in the order the files first appear in the slice.
+    """
+    files: Dict[str | None, Dict[str, List[Dict]]] = {}
+    for key in ('objectSlices', 'userDefinedTypes'):
+        for entry in content.get(key) or []:
+            if isinstance(entry, dict):
+                file_content = files.setdefault(
+                    entry.get('fileName'), {'objectSlices': [], 'userDefinedTypes': []})
+                file_content[key].append(entry)
+    return files
+
+
+def file_digest(file_content: Dict[str, List[Dict]]) -> str:
+    """
+    Returns a digest of the entries of a file.
+
+    The entries are pickled, which is several times faster than encoding them as JSON. Keys are
+    hashed in the order they appear in the slice, so a slice written with keys in another order
+    only causes files to be converted again.
+    """
+    return hashlib.sha256(pickle.dumps(file_content, protocol=4)).hexdigest()
+
+
+def cache_header(origin_type: str, custom_attr: str = '') -> Dict[str, Any]:
+    """
+    Returns the settings the cached paths depend on besides the entries of each file.
+
+    Args:
+        origin_type (str): The origin type of the slice.
+        custom_attr (str): The framework detected for the whole slice, e.g. flask.
+
+    Returns:
+        dict: The cache format and atom-tools versions, the origin type and the framework.
+    """
+    return {
+        'version': CACHE_VERSION,
+        'atom_tools': __version__,
+        'origin_type': origin_type,
+        'custom_attr': custom_attr,
+    }
+
+
+def load_cache(
+        cache_file: str | Path, origin_type: str, custom_attr: str = ''
+) -> Dict[str | None, Tuple[str, Dict]]:
+    """
+    Loads the paths of each file from a previous conversion.
+
+    Args:
+        cache_file (str): The cache file.
+        origin_type (str): The origin type of the slice being converted.
+        custom_attr (str): The framework detected for the slice being converted.
+
+    Returns:
+        dict: The digest and paths object for each fileName. Empty if the file does not exist or
+            was written for another origin type, framework or version of atom-tools.
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        logger.warning(f'Ignoring invalid conversion cache {cache_file}.')
+        return {}
+    header = cache_header(origin_type, custom_attr)
+    if not isinstance(cache, dict) or any(cache.get(k) != v for k, v in header.items()):
+        logger.info(f'Ignoring conversion cache {cache_file} from another version, origin type '
+                    f'or framework.')
+        return {}
+    return {i['file_name']: (i['digest'], i['paths']) for i in cache.get('files', [])}
+
+
+def save_cache(
+        cache_file: str | Path,
+        origin_type: str,
+        files: Dict[str | None, Tuple[str, Dict]],
+        custom_attr: str = '',
+) -> None:
+    """
+    Writes the paths of each file to a cache file.
+
+    Args:
+        cache_file (str): The cache file.
+        origin_type (str): The origin type of the slice.
+        files (dict): The digest and paths object for each fileName.
+        custom_attr (str): The framework detected for the slice.
+    """
+    cache = {
+        **cache_header(origin_type, custom_attr),
+        'files': [
+            {'file_name': file_name, 'digest': digest, 'paths': paths}
+            for file_name, (digest, paths) in files.items()
+        ]
+    }
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(cache, separators=(',', ':')))
+
+
+@timed()
+def convert_incremental(converter: OpenAPI, cache_file: str | Path) -> IncrementalResult:
+    """
+    Converts usages to an OpenAPI paths object, reusing the paths of unchanged files.
+
+    Each changed file is converted on its own, so the paths of a file do not depend on which other
+    files changed. The paths of a file only depend on its entries and the framework detected for
+    the whole slice, which is part of the cache header. Compared to converting the whole slice,
+    the paths may list parameters and line numbers in a different order and number regex
+    parameters from 1 in each file.
+
+    Args:
+        converter (OpenAPI): The converter for the usages slice.
+        cache_file (str): The cache file, which is created or updated.
+
+    Returns:
+        IncrementalResult: The paths object and the number of files converted and reused.
+    """
+    origin_type = converter.usages.origin_type or ''
+    if origin_type in UNSUPPORTED_TYPES:
+        logger.info(f'Incremental conversion is not supported for {origin_type}, converting the '
+                    f'whole slice.')
+        paths = converter.convert_usages()
+        return IncrementalResult(paths, converted=len(group_by_file(converter.usages.content)))
+    custom_attr = converter.usages.custom_attr or ''
+    cached = load_cache(cache_file, origin_type, custom_attr)
+    result = IncrementalResult({})
+    files: Dict[str | None, Tuple[str, Dict]] = {}
+    for file_name, file_content in group_by_file(converter.usages.content).items():
+        digest = file_digest(file_content)
+        if (entry := cached.get(file_name)) and entry[0] == digest:
+            files[file_name] = entry
+            result.reused += 1
+            continue
+        with phase('convert_file'):
+            files[file_name] = (digest, converter.with_content(file_content).convert_usages())
+        result.converted += 1
+    result.removed = len(cached.keys() - files.keys())
+    accumulator = PathsAccumulator()
+    for _, paths in files.values():
+        accumulator.add(paths)
+    result.paths = accumulator.to_dict()
+    if result.converted or result.removed:
+        save_cache(cache_file, origin_type, files, custom_attr)
+    return result
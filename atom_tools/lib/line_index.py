@@ -0,0 +1,333 @@
+"""
+Sorted indexes of line numbers for answering line range queries without scanning every entry.
+"""
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from atom_tools.lib.profiling import timed
+
+
+ENDPOINT_INDEX_VERSION = 1
+
+
+class LineIndex:
+    """
+    The positions of a sequence of line numbers, sorted by line number.
+
+    Args:
+        lines (Sequence[int]): The line number at each position. Positions with a line number
+            that is not an integer are left out of the index.
+        order (Sequence[int]): The positions already sorted by line number, e.g. as saved from
+            the order attribute of another index of the same lines.
+
+    Attributes:
+        lines (array): The indexed line numbers in ascending order.
+        order (array): The position of each line number in lines.
+    """
+
+    def __init__(self, lines: Sequence[Any], order: Sequence[int] | None = None) -> None:
+        if order is None:
+            order = sorted(
+                (i for i, ln in enumerate(lines) if isinstance(ln, int)), key=lines.__getitem__)
+        self.order = array('L', order)
+        self.lines = array('q', (lines[i] for i in self.order))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def query(self, start: int, end: int) -> List[int]:
+        """
+        Finds the positions with a line number in a range.
+
+        Args:
+            start (int): The first line of the range.
+            end (int): The last line of the range.
+
+        Returns:
+            list[int]: The matching positions in ascending order.
+        """
+        lo = bisect_left(self.lines, start)
+        hi = bisect_right(self.lines, end, lo)
+        return sorted(self.order[lo:hi])
+
+
+class FileLineIndex:
+    """
+    The positions of a sequence of file names and line numbers, with a LineIndex for each file.
+
+    File names are matched by suffix, as check-reachable matches locations, so that
+    updateUserProfile.ts matches routes/updateUserProfile.ts. Only the distinct file names are
+    compared, and the files matching each name are remembered for later queries.
+
+    Args:
+        entries (Iterable[tuple[str, int]]): The file name and line number at each position. A
+            line number of None marks an entry that applies to every line of the file.
+
+    Attributes:
+        unnumbered (dict[str, list[int]]): The positions without a line number for each file.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]]) -> None:
+        positions: Dict[str, List[int]] = {}
+        lines: Dict[str, List[Any]] = {}
+        self.unnumbered: Dict[str, List[int]] = {}
+        for pos, (file_name, line_number) in enumerate(entries):
+            if line_number is None:
+                self.unnumbered.setdefault(file_name, []).append(pos)
+                continue
+            positions.setdefault(file_name, []).append(pos)
+            lines.setdefault(file_name, []).append(line_number)
+        self.files: Dict[str, Tuple[LineIndex, List[int]]] = {
+            f: (LineIndex(lines[f]), file_positions) for f, file_positions in positions.items()
+        }
+        self._matches: Dict[str, List[str]] = {}
+
+    def matching_files(self, file_name: str) -> List[str]:
+        """
+        Returns the indexed file names ending with a file name.
+
+        Args:
+            file_name (str): The file name or path suffix.
+
+        Returns:
+            list[str]: The matching file names.
+        """
+        if (matches := self._matches.get(file_name)) is None:
+            matches = [f for f in self.files.keys() | self.unnumbered.keys()
+                       if f.endswith(file_name)]
+            self._matches[file_name] = matches
+        return matches
+
+    def query(self, file_name: str, line_range: Tuple[int, int] | Tuple) -> List[int]:
+        """
+        Finds the positions in the matching files with a line number in a range.
+
+        Args:
+            file_name (str): The file name or path suffix.
+            line_range (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+
+        Returns:
+            list[int]: The matching positions in ascending order, including the positions without
+                a line number.
+        """
+        found: List[int] = []
+        for f in self.matching_files(file_name):
+            found.extend(self.unnumbered.get(f, []))
+            if f not in self.files:
+                continue
+            index, positions = self.files[f]
+            if line_range:
+                found.extend(positions[i] for i in index.query(*line_range))
+            else:
+                found.extend(positions)
+        return sorted(found)
+
+    def touches(self, file_name: str, line_range: Tuple[int, int] | Tuple) -> bool:
+        """
+        Checks if any position in the matching files has a line number in a range.
+
+        Args:
+            file_name (str): The file name or path suffix.
+            line_range (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+
+        Returns:
+            bool: True if a position matches.
+        """
+        for f in self.matching_files(file_name):
+            if f in self.unnumbered:
+                return True
+            if not (entry := self.files.get(f)):
+                continue
+            index = entry[0]
+            if not line_range or index.query(*line_range):
+                return True
+        return False
+
+
+class FlowIndex:
+    """
+    The line numbers of the flows of reachables, indexed by parentFileName.
+
+    Args:
+        reachables (Iterable[dict]): The reachables of a slice.
+
+    Attributes:
+        flows (list[tuple[int, int]]): The position of each flow, as the position of the
+            reachable and the position of the flow in the reachable.
+        index (FileLineIndex): The file name and line number of each flow.
+    """
+
+    @timed('FlowIndex')
+    def __init__(self, reachables: Iterable[Dict]) -> None:
+        self.flows: List[Tuple[int, int]] = []
+        entries: List[Tuple[str, Any]] = []
+        for i, reachable in enumerate(reachables or []):
+            for j, flow in enumerate(reachable.get('flows') or []):
+                self.flows.append((i, j))
+                # Flows without a line number match any line, as in filter_flows.
+                entries.append((flow.get('parentFileName') or '', flow.get('lineNumber') or None))
+        self.index = FileLineIndex(entries)
+
+    def query(self, file_name: str, line_range: Tuple[int, int] | Tuple) -> List[Tuple[int, int]]:
+        """
+        Finds the flows in a file within a line range.
+
+        Args:
+            file_name (str): The file name or path suffix of the parentFileName.
+            line_range (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+
+        Returns:
+            list[tuple[int, int]]: The positions of the reachable and flow of each matching flow.
+        """
+        return [self.flows[i] for i in self.index.query(file_name, line_range)]
+
+    def touches(self, file_name: str, line_range: Tuple[int, int] | Tuple) -> bool:
+        """
+        Checks if any flow is in a file within a line range.
+
+        Args:
+            file_name (str): The file name or path suffix of the parentFileName.
+            line_range (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+
+        Returns:
+            bool: True if a flow matches.
+        """
+        return self.index.touches(file_name, line_range)
+
+
+class EndpointIndex:
+    """
+    The call line numbers of the endpoints in an OpenAPI document, indexed by line number.
+
+    Args:
+        endpoints (list[str]): The endpoints with call usages, in document order.
+        files (list[str]): The file names of the call usages.
+        usages (list[tuple[int, int, int]]): The endpoint and file (as positions in endpoints and
+            files) and the line number of each call usage, in document order.
+        order (list[int]): The positions of the usages sorted by line number, if known.
+    """
+
+    def __init__(
+            self,
+            endpoints: List[str],
+            files: List[str],
+            usages: List[Tuple[int, int, Any]],
+            order: Sequence[int] | None = None,
+    ) -> None:
+        self.endpoints = endpoints
+        self.files = files
+        self.usages = usages
+        self.index = LineIndex([i[2] for i in usages], order)
+        self._file_index: FileLineIndex | None = None
+
+    @property
+    def file_index(self) -> FileLineIndex:
+        """The line numbers of the usages indexed by file, created on first use."""
+        if self._file_index is None:
+            self._file_index = FileLineIndex(
+                (self.files[f], ln) for _, f, ln in self.usages)
+        return self._file_index
+
+    @classmethod
+    @timed('EndpointIndex')
+    def from_openapi(cls, document: Dict) -> 'EndpointIndex':
+        """
+        Creates an index of the x-atom-usages call line numbers of each path.
+
+        Args:
+            document (dict): The OpenAPI document.
+
+        Returns:
+            EndpointIndex: The index.
+        """
+        endpoints: List[str] = []
+        file_ids: Dict[str, int] = {}
+        usages: List[Tuple[int, int, Any]] = []
+        for endpoint, values in (document.get('paths') or {}).items():
+            usages_object = values.get('x-atom-usages')
+            calls = usages_object.get('call') if isinstance(usages_object, dict) else None
+            if not isinstance(calls, dict) or not (
+                    calls := [(f, ln) for f, lines in calls.items() for ln in lines]):
+                continue
+            endpoints.append(endpoint)
+            for file_name, line_number in calls:
+                file_id = file_ids.setdefault(file_name, len(file_ids))
+                usages.append((len(endpoints) - 1, file_id, line_number))
+        return cls(endpoints, list(file_ids), usages)
+
+    @classmethod
+    @timed('EndpointIndex.load')
+    def load(cls, path: str | Path) -> 'EndpointIndex':
+        """
+        Loads an index written by save.
+
+        Args:
+            path (str): The index file.
+
+        Returns:
+            EndpointIndex: The index.
+
+        Raises:
+            ValueError: If the file is not an endpoint index of this version.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != ENDPOINT_INDEX_VERSION:
+            raise ValueError(f'{path} is not an endpoint index of version {ENDPOINT_INDEX_VERSION}')
+        return cls(data['endpoints'], data['files'], [tuple(i) for i in data['usages']],
+                   data['order'])
+
+    def save(self, path: str | Path) -> None:
+        """
+        Writes the index, including the sorted order of the line numbers, to a JSON file.
+
+        Args:
+            path (str): The index file.
+        """
+        data = {
+            'version': ENDPOINT_INDEX_VERSION,
+            'endpoints': self.endpoints,
+            'files': self.files,
+            'usages': self.usages,
+            'order': self.index.order.tolist(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, separators=(',', ':')))
+
+    def output(
+            self, sparse: bool, line_range: Tuple[int, int] | Tuple, file_name: str | None = None
+    ) -> str:
+        """
+        Formats the endpoints with call usages in a line range, as output_endpoints does.
+
+        Args:
+            sparse (bool): Only include the endpoints, not the file names and line numbers.
+            line_range (tuple[int, int]): The first and last line, or an empty tuple for all lines.
+            file_name (str): Only include the usages in files ending with this name.
+
+        Returns:
+            str: A line for each matching endpoint.
+        """
+        if file_name:
+            positions: Sequence[int] = self.file_index.query(file_name, line_range)
+        elif line_range:
+            positions = self.index.query(*line_range)
+        else:
+            positions = range(len(self.usages))
+        parts: List[str] = []
+        current = -1
+        for pos in positions:
+            endpoint_id, file_id, line_number = self.usages[pos]
+            if endpoint_id != current:
+                if parts:
+                    parts.append('\n')
+                current = endpoint_id
+                parts.append(self.endpoints[endpoint_id])
+            if not sparse:
+                parts.append(f':{self.files[file_id]}:{line_number}')
+        if parts:
+            parts.append('\n')
+        return ''.join(parts)
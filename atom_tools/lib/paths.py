@@ -0,0 +1,203 @@
+"""
+Functions and classes for merging OpenAPI paths objects.
+
+merge_path_objects merges two paths objects in place. PathsAccumulator follows the same merge
+rules for many paths objects, keeping parameters and line numbers indexed so that each merge only
+takes time proportional to the paths object being added.
+"""
+from typing import Any, Dict, List
+
+
+def merge_operations(op1: Dict, op2: Dict) -> Dict:
+    """
+    Merge two dictionaries of operations.
+
+    Args:
+        op1 (dict): The first dictionary of operations.
+        op2 (dict): The second dictionary of operations.
+
+    Returns:
+        dict: The merged dictionary of operations.
+    """
+    for k, v in op2.items():
+        if v and not op1.get(k) or op1[k] == {}:
+            op1[k] = v
+        elif k == 'parameters' and v:
+            op1[k] = merge_params(op1[k], v)
+    return op1
+
+
+def merge_params(p1: List, p2: List) -> List:
+    """
+    Merge two lists of parameters.
+
+    Args:
+        p1 (list): The first list of parameters.
+        p2 (list): The second list of parameters.
+
+    Returns:
+        list: The merged list of parameters.
+    """
+    names = [i.get('name') for i in p1]
+    for i in p2:
+        if i.get('name', '') not in names:
+            p1.append(i)
+    return p1
+
+
+def merge_path_objects(p1: Dict, p2: Dict) -> Dict:
+    """
+    Merge two dictionaries representing path objects.
+
+    Args:
+        p1 (dict): The first dictionary representing a path object.
+        p2 (dict): The second dictionary representing a path object.
+
+    Returns:
+        dict: The merged dictionary representing the path object.
+    """
+    for key, value in p2.items():
+        if key not in p1:
+            p1[key] = value
+            continue
+        for k, v in value.items():
+            if p1[key].get(k):
+                if k == 'resolved_methods':
+                    p1[key][k].extend(v)
+                elif k == 'x-atom-usages':
+                    p1[key][k] = merge_x_atom(p1[key][k], v)
+                elif k == 'parameters':
+                    p1[key][k] = merge_params(p1[key][k], v)
+                elif k in {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}:
+                    p1[key][k] = merge_operations(p1[key][k], v)
+                continue
+            p1[key][k] = v
+
+    return p1
+
+
+def merge_x_atom(x1: Dict, x2: Dict) -> Dict:
+    """
+    Merge two dictionaries of x-atom-usages.
+
+    Args:
+        x1 (dict): The first dictionary of x atoms.
+        x2 (dict): The second dictionary of x atoms.
+
+    Returns:
+        dict: The merged dictionary of x atoms.
+    """
+    for key, value in x2.items():
+        if key not in x1:
+            x1[key] = value
+            continue
+        for k, v in value.items():
+            if x1[key].get(k):
+                x1[key][k].extend(v)
+            else:
+                x1[key][k] = v
+    return x1
+
+
+class _Params(dict):
+    """Parameters keyed by (name, in), in the order they were added."""
+
+
+class _LineNumbers(dict):
+    """An insertion ordered set of line numbers."""
+
+
+class PathsAccumulator:
+    """
+    Accumulates the path item objects created for each resolved method.
+
+    Merging path objects with merge_path_objects scans the parameters already present and extends
+    the x-atom-usages line numbers, so the cost of each merge grows with everything merged so far.
+    Here parameters are kept keyed by (name, in), line numbers in ordered sets and operations by
+    verb, so adding a path item takes time proportional to its own size. The merge rules are
+    otherwise those of merge_path_objects. The OpenAPI paths object is created once by to_dict.
+    """
+    operations = {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}
+
+    def __init__(self) -> None:
+        self._paths: Dict[str, Dict] = {}
+
+    def add(self, paths: Dict[str, Dict]) -> None:
+        """
+        Merges a paths object into the accumulated paths.
+
+        Args:
+            paths (dict): Path item objects keyed by endpoint.
+        """
+        for ep, item in paths.items():
+            current = self._paths.setdefault(ep, {})
+            for k, v in item.items():
+                if not current.get(k):
+                    current[k] = _accumulated(k, v)
+                elif k == 'parameters':
+                    _add_params(current[k], v)
+                elif k == 'x-atom-usages':
+                    _add_x_atom(current[k], v)
+                elif k in self.operations:
+                    _add_operation(current[k], v)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Returns the accumulated paths as an OpenAPI paths object."""
+        return {ep: _materialize(item) for ep, item in self._paths.items()}
+
+
+def _accumulated(key: str, value: Any) -> Any:
+    if key == 'parameters' and isinstance(value, list):
+        params = _Params()
+        _add_params(params, value)
+        return params
+    if key == 'x-atom-usages' and isinstance(value, dict):
+        return {
+            kind: {fn: _line_numbers(lines) for fn, lines in fns.items()}
+            for kind, fns in value.items()
+        }
+    if key in PathsAccumulator.operations and isinstance(value, dict):
+        return {k: _accumulated(k, v) if k == 'parameters' else v for k, v in value.items()}
+    return value
+
+
+def _add_operation(op1: Dict, op2: Dict) -> None:
+    for k, v in op2.items():
+        if k == 'parameters':
+            if v and not op1.get(k):
+                op1[k] = _accumulated(k, v)
+            elif v:
+                _add_params(op1[k], v)
+        elif v and not op1.get(k) or op1.get(k) == {}:
+            op1[k] = v
+
+
+def _add_params(params: _Params, new_params: List[Dict]) -> None:
+    for p in new_params:
+        params.setdefault((p.get('name'), p.get('in')), p)
+
+
+def _add_x_atom(x1: Dict, x2: Dict) -> None:
+    for kind, fns in x2.items():
+        if kind not in x1:
+            x1[kind] = {fn: _line_numbers(lines) for fn, lines in fns.items()}
+            continue
+        for fn, lines in fns.items():
+            if not x1[kind].get(fn):
+                x1[kind][fn] = _line_numbers(lines)
+            elif isinstance(x1[kind][fn], _LineNumbers) and isinstance(lines, list):
+                x1[kind][fn].update(dict.fromkeys(lines))
+
+
+def _line_numbers(lines: Any) -> Any:
+    return _LineNumbers.fromkeys(lines) if isinstance(lines, list) else lines
+
+
+def _materialize(value: Any) -> Any:
+    if isinstance(value, _Params):
+        return list(value.values())
+    if isinstance(value, _LineNumbers):
+        return list(value)
+    if isinstance(value, dict):
+        return {k: _materialize(v) for k, v in value.items()}
+    return value
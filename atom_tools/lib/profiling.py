@@ -0,0 +1,158 @@
+"""
+Functions for recording the wall time, CPU time and peak memory of each phase of a command.
+
+Recording is disabled unless enabled by the --timings or --profile options, in which case the
+phases are printed as a table once the command finishes.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict, Generator, List, Tuple, TypeVar
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+F = TypeVar('F', bound=Callable)
+
+
+@dataclass
+class PhaseTiming:
+    """
+    The resources used by a phase.
+
+    Attributes:
+        name (str): The name of the phase.
+        depth (int): The number of phases the phase is nested in.
+        calls (int): The number of times the phase ran.
+        wall (float): The total wall time in seconds.
+        cpu (float): The total CPU time in seconds.
+        peak_rss (int): The peak resident set size of the process in bytes when the phase last
+            finished, or None if it cannot be determined.
+    """
+    name: str
+    depth: int
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_rss: int | None = None
+
+
+@dataclass
+class _Recording:
+    # The phases recorded since enable was called, keyed by the names of the running phases.
+    enabled: bool = False
+    phases: Dict[Tuple[str, ...], PhaseTiming] = field(default_factory=dict)
+    stack: List[str] = field(default_factory=list)
+
+
+_recording = _Recording()
+
+
+def enable() -> None:
+    """Starts recording phases, discarding any recorded previously."""
+    _recording.phases.clear()
+    _recording.stack.clear()
+    _recording.enabled = True
+
+
+def disable() -> None:
+    """Stops recording phases."""
+    _recording.enabled = False
+
+
+def is_enabled() -> bool:
+    """Returns whether phases are being recorded."""
+    return _recording.enabled
+
+
+def get_phases() -> List[PhaseTiming]:
+    """Returns the recorded phases in the order they started, followed by their nested phases."""
+    phases = _recording.phases
+    started = {key: i for i, key in enumerate(phases)}
+    keys = sorted(phases, key=lambda k: tuple(started[k[:n]] for n in range(1, len(k) + 1)))
+    return [phases[k] for k in keys]
+
+
+def peak_rss() -> int | None:
+    """Returns the peak resident set size of the process in bytes."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and kilobytes elsewhere.
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+@contextmanager
+def phase(name: str) -> Generator[None, None, None]:
+    """
+    Records the resources used by the enclosed block as a phase.
+
+    Phases started while another is running are nested in it, and the times of a phase that runs
+    more than once are added together.
+
+    Args:
+        name (str): The name of the phase.
+    """
+    if not _recording.enabled:
+        yield
+        return
+    _recording.stack.append(name)
+    key = tuple(_recording.stack)
+    if key not in _recording.phases:
+        _recording.phases[key] = PhaseTiming(name, len(key) - 1)
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        timing = _recording.phases[key]
+        timing.calls += 1
+        timing.wall += time.perf_counter() - start_wall
+        timing.cpu += time.process_time() - start_cpu
+        timing.peak_rss = peak_rss()
+        _recording.stack.pop()
+
+
+def timed(name: str | None = None) -> Callable[[F], F]:
+    """
+    Decorator recording each call of a function as a phase.
+
+    Args:
+        name (str): The name of the phase. Defaults to the name of the function.
+    """
+    def decorator(func: F) -> F:
+        phase_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _recording.enabled:
+                return func(*args, **kwargs)
+            with phase(phase_name):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def format_phases(phases: List[PhaseTiming]) -> str:
+    """
+    Formats the recorded phases as a table.
+
+    Args:
+        phases (list[PhaseTiming]): The phases as returned by get_phases.
+
+    Returns:
+        str: The table, with nested phases indented below the phase they ran in.
+    """
+    names = [f'{"  " * p.depth}{p.name}' for p in phases]
+    width = max([len(n) for n in names] + [5])
+    lines = [f'{"Phase":<{width}}  {"Calls":>6}  {"Wall (s)":>9}  {"CPU (s)":>9}  '
+             f'{"Peak RSS (MiB)":>14}']
+    lines.append('-' * len(lines[0]))
+    for n, p in zip(names, phases):
+        rss = f'{p.peak_rss / 1048576:.1f}' if p.peak_rss is not None else '-'
+        lines.append(f'{n:<{width}}  {p.calls:>6}  {p.wall:>9.3f}  {p.cpu:>9.3f}  {rss:>14}')
+    return '\n'.join(lines)
@@ -0,0 +1,224 @@
+"""
+A shared cache of compiled JMESPath expressions and native extractors for common queries.
+
+Expressions are compiled once and reused across conversions, validations and filters, keeping the
+most recently used MAX_CACHED expressions. Hits and misses are counted so the effectiveness of
+the cache can be checked with --timings.
+
+The fixed queries run on every conversion (the constants below) also have hand-written
+extractors. These walk the slice directly and yield the same results as the expression, without
+the intermediate lists created by the JMESPath interpreter. Other expressions fall back to
+JMESPath.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generator, List
+
+import jmespath
+from jmespath.parser import ParsedResult
+
+
+MAX_CACHED = 256
+
+OBJECT_SLICE_METHODS = (
+    'objectSlices[].{file_name: fileName, resolved_methods: usages[].*.resolvedMethod[]}')
+OBJECT_SLICE_CALLS = (
+    'objectSlices[].{file_name: fileName, resolved_methods: usages[].*[?resolvedMethod][][]'
+    '.resolvedMethod[]}')
+UDT_FIELDS = 'userDefinedTypes[].{file_name: fileName, resolved_methods: fields[].name}'
+UDT_PROCEDURES = (
+    'userDefinedTypes[].{file_name: fileName, resolved_methods: procedures[].resolvedMethod}')
+UDT_ROUTES = (
+    'userDefinedTypes[].{file_name: fileName, line_number: lineNumber, fields: fields[].name}')
+
+
+@dataclass
+class CacheInfo:
+    """
+    Statistics for the compiled expression cache.
+
+    Attributes:
+        hits (int): The number of lookups of an expression already compiled.
+        misses (int): The number of expressions compiled.
+        size (int): The number of expressions currently cached.
+        max_size (int): The maximum number of expressions cached.
+    """
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+    def __str__(self) -> str:
+        return (f'JMESPath cache: {self.hits} hits, {self.misses} misses, '
+                f'{self.size}/{self.max_size} expressions')
+
+
+@lru_cache(maxsize=MAX_CACHED)
+def compile_query(expression: str) -> ParsedResult:
+    """
+    Returns the compiled form of a JMESPath expression.
+
+    Args:
+        expression (str): The JMESPath expression.
+
+    Returns:
+        ParsedResult: The compiled expression.
+    """
+    return jmespath.compile(expression)
+
+
+def search(expression: str, data: Any) -> Any:
+    """
+    Searches data with a JMESPath expression, compiling it only the first time it is used.
+
+    Args:
+        expression (str): The JMESPath expression.
+        data (Any): The data to search, e.g. the content of a slice.
+
+    Returns:
+        Any: The result of the search.
+    """
+    return compile_query(expression).search(data)
+
+
+def iter_search(expression: str, data: Any, native: bool = True) -> Generator[Any, None, None]:
+    """
+    Yields the elements of the list found by a JMESPath expression.
+
+    Args:
+        expression (str): A JMESPath expression evaluating to a list.
+        data (Any): The data to search, e.g. the content of a slice.
+        native (bool): Use the native extractor for the expression when there is one.
+
+    Yields:
+        Any: Each element of the result, which is empty when the expression finds nothing.
+    """
+    if native and (extractor := _EXTRACTORS.get(expression)):
+        yield from extractor(data)
+        return
+    yield from search(expression, data) or []
+
+
+def cache_info() -> CacheInfo:
+    """Returns the hits, misses and size of the compiled expression cache."""
+    info = compile_query.cache_info()
+    return CacheInfo(info.hits, info.misses, info.currsize, info.maxsize or 0)
+
+
+def clear_cache() -> None:
+    """Discards the compiled expressions and resets the counters."""
+    compile_query.cache_clear()
+
+
+def _field(value: Any, key: str) -> Any:
+    return value.get(key) if isinstance(value, dict) else None
+
+
+def _flatten(values: List) -> Generator[Any, None, None]:
+    for value in values:
+        if isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+
+def _is_false(value: Any) -> bool:
+    # JMESPath truthiness, in which 0 is true.
+    return value is None or value is False or value in ('', [], {})
+
+
+def _projected_field(values: Any, key: str) -> List | None:
+    # values[].key
+    if not isinstance(values, list):
+        return None
+    return [v for i in _flatten(values) if (v := _field(i, key)) is not None]
+
+
+def _iter_entries(data: Any, key: str) -> Generator[Any, None, None]:
+    # key[] with null elements dropped by the projection that follows
+    entries = _field(data, key)
+    if isinstance(entries, list):
+        yield from (i for i in _flatten(entries) if i is not None)
+
+
+def _usage_methods(usages: Any) -> List | None:
+    # usages[].*.resolvedMethod[]
+    if not isinstance(usages, list):
+        return None
+    methods: List = []
+    for usage in _flatten(usages):
+        if isinstance(usage, dict):
+            methods.extend(
+                m for v in usage.values() if (m := _field(v, 'resolvedMethod')) is not None)
+    return methods
+
+
+def _usage_calls(usages: Any) -> List | None:
+    # usages[].*[?resolvedMethod][][].resolvedMethod[]
+    if not isinstance(usages, list):
+        return None
+    methods: List = []
+    for usage in _flatten(usages):
+        if not isinstance(usage, dict):
+            continue
+        for value in usage.values():
+            if not isinstance(value, list):
+                continue
+            for call in value:
+                if _is_false(m := _field(call, 'resolvedMethod')):
+                    continue
+                if isinstance(m, list):
+                    methods.extend(m)
+                else:
+                    methods.append(m)
+    return methods
+
+
+def _iter_object_slice_methods(data: Any) -> Generator[Dict, None, None]:
+    for entry in _iter_entries(data, 'objectSlices'):
+        yield {
+            'file_name': _field(entry, 'fileName'),
+            'resolved_methods': _usage_methods(_field(entry, 'usages'))
+        }
+
+
+def _iter_object_slice_calls(data: Any) -> Generator[Dict, None, None]:
+    for entry in _iter_entries(data, 'objectSlices'):
+        yield {
+            'file_name': _field(entry, 'fileName'),
+            'resolved_methods': _usage_calls(_field(entry, 'usages'))
+        }
+
+
+def _iter_udt_fields(data: Any) -> Generator[Dict, None, None]:
+    for entry in _iter_entries(data, 'userDefinedTypes'):
+        yield {
+            'file_name': _field(entry, 'fileName'),
+            'resolved_methods': _projected_field(_field(entry, 'fields'), 'name')
+        }
+
+
+def _iter_udt_procedures(data: Any) -> Generator[Dict, None, None]:
+    for entry in _iter_entries(data, 'userDefinedTypes'):
+        yield {
+            'file_name': _field(entry, 'fileName'),
+            'resolved_methods': _projected_field(_field(entry, 'procedures'), 'resolvedMethod')
+        }
+
+
+def _iter_udt_routes(data: Any) -> Generator[Dict, None, None]:
+    for entry in _iter_entries(data, 'userDefinedTypes'):
+        yield {
+            'file_name': _field(entry, 'fileName'),
+            'line_number': _field(entry, 'lineNumber'),
+            'fields': _projected_field(_field(entry, 'fields'), 'name')
+        }
+
+
+_EXTRACTORS: Dict[str, Callable[[Any], Generator[Any, None, None]]] = {
+    OBJECT_SLICE_METHODS: _iter_object_slice_methods,
+    OBJECT_SLICE_CALLS: _iter_object_slice_calls,
+    UDT_FIELDS: _iter_udt_fields,
+    UDT_PROCEDURES: _iter_udt_procedures,
+    UDT_ROUTES: _iter_udt_routes,
+}
@@ -4,9 +4,9 @@ Utilities for slices
 import logging
 import re
 from dataclasses import dataclass
-from typing import Tuple, List, Dict, Any
+from functools import lru_cache
+from typing import Tuple, List, Dict, Any, FrozenSet, Iterable
 
-import jmespath
 
 logger: logging.Logger = logging.getLogger(__name__)
 
@@ -60,23 +60,96 @@ class ValidationRegexCollection:  # pylint: disable=too-many-instance-attributes
     py_mod_members = re.compile(r'(?<=:<module>.)(?P<class>[A-Z][^<.]+)?\.?(?P<func>[^<.]+)?')
 
 
+class TokenMatcher:
+    """
+    Finds which of a fixed set of substrings occur in a line, scanning the line once.
+
+    The tokens are compiled into a single pattern, factored like a trie so that tokens sharing a
+    prefix are tried together, inside a lookahead so that a match is tried at every position of
+    the line that starts a token. The longest token found at a position implies the shorter tokens
+    that are its prefixes, and every other occurrence starts at a position of its own, so the
+    result is the same as testing each token with the in operator. The hits of recently scanned
+    lines are cached, as the same lines are checked for many slice entries.
+
+    Args:
+        tokens (Iterable[str]): The substrings to look for.
+        cache_size (int): The number of lines whose hits are remembered.
+
+    Attributes:
+        tokens (list[str]): The distinct tokens, sorted.
+        pattern (Pattern): The combined pattern.
+    """
+
+    def __init__(self, tokens: Iterable[str], cache_size: int = 4096) -> None:
+        self.tokens = sorted(set(tokens) - {''})
+        first = ''.join(sorted({re.escape(t[0]) for t in self.tokens}))
+        self.pattern = re.compile(f'(?=[{first}])(?=({_trie_pattern(self.tokens)}))')
+        self._prefixes = {
+            t: frozenset(p for p in self.tokens if t.startswith(p)) for t in self.tokens
+        }
+        self.hits = lru_cache(maxsize=cache_size)(self._hits)
+
+    def _hits(self, line: str) -> FrozenSet[str]:
+        """
+        Finds the tokens in a line.
+
+        Args:
+            line (str): The line.
+
+        Returns:
+            frozenset[str]: The tokens that are substrings of the line.
+        """
+        found: FrozenSet[str] = frozenset()
+        for match in self.pattern.finditer(line):
+            found |= self._prefixes[match.group(1)]
+        return found
+
+
+def _trie_pattern(tokens: List[str]) -> str:
+    """
+    Creates a pattern matching the longest of the given tokens, with common prefixes factored out.
+
+    Args:
+        tokens (list[str]): The tokens, which must not be empty strings.
+
+    Returns:
+        str: The pattern, e.g. \\+(?:\\+|=)? for +, ++ and +=.
+    """
+    tree: Dict[str, Dict] = {}
+    for token in tokens:
+        node = tree
+        for char in token:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _trie_node_pattern(tree)
+
+
+def _trie_node_pattern(node: Dict[str, Dict]) -> str:
+    branches = [re.escape(k) + _trie_node_pattern(v) for k, v in sorted(node.items()) if k]
+    if not branches:
+        return ''
+    pattern = '|'.join(branches)
+    if '' in node:
+        # The token ending here is also a match, but only once the longer ones have been tried.
+        return f'(?:{pattern})?'
+    return f'(?:{pattern})' if len(branches) > 1 else pattern
+
+
 @dataclass
 class FilteringPatternCollection:
     """
     A collection of regular expressions used for filtering.
     """
-    flattened_loc_index = re.compile(r'(?P<type>objectSlices|userDefinedTypes|usages|invokedCalls|argToCalls|fields|procedures).\[(?P<index>\d+)]')
-    top_level_flat_loc_index = re.compile(r'(?P<type>objectSlices|userDefinedTypes).\[(?P<index>\d+)]')
     attribute_and_line = re.compile(r'(?P<attrib>[^:]+):(?P<line_nums>[\d,-]+)')
     top_level_filter_usages = (
         '{objectSlices: objectSlices[?ATTRIBUTECONDITION`TARGET_VALUE`], '
         'userDefinedTypes: userDefinedTypes[?ATTRIBUTECONDITION`TARGET_VALUE`]}'
     )
-    jmespath_purls = jmespath.compile('reachables[].purls[]')
     purl_pkg = re.compile(r'(?P<p1>[^/:]+/(?P<p2>[^/]+))(?:(?:.|/)v\d+)?(?=@)')
     purl_trailing_version = re.compile(r'(?:.|/)v\d+(?=@)')
     purl_version = re.compile(r'(?<=@)(?P<v1>v?(?P<v2>[\d.]+){1,3})(?P<ext>[^?\s]+)?')
     filename = re.compile(r'[^/]+(?!/)')
+    reachable_location = re.compile(r'(?P<file>[^/]+(?<!/)):(?P<line>[\d-]+)')
 
 
 def py_helper(endpoint: str, regex: OpenAPIRegexCollection) -> Tuple[str, List[Dict]]:
@@ -3,11 +3,13 @@ Ruby converter helper
 """
 import json
 
+from atom_tools.lib.profiling import timed
 from atom_tools.lib.slices import AtomSlice
 from atom_tools.lib.ruby_semantics import code_to_routes, endpoints_to_routes
 from atom_tools.lib.utils import extract_params
 
 
+@timed('ruby_convert')
 def convert(usages: AtomSlice):
     result = {}
     object_slices = usages.content.get("objectSlices", {})
@@ -2,6 +2,7 @@
 Scala converter helper
 """
 import re
+from atom_tools.lib.profiling import timed
 from atom_tools.lib.slices import AtomSlice
 from atom_tools.lib.utils import extract_params
 
@@ -21,6 +22,7 @@ def extract_pattern(route_pattern):
     return route_pattern, params
 
 
+@timed('scala_convert')
 def convert(usages: AtomSlice, semantics: AtomSlice):
     result = {}
     if not semantics or not semantics.content:
@@ -0,0 +1,435 @@
+"""
+A JSON-RPC server answering convert, filter, query-endpoints and check-reachable requests against
+slices held in memory.
+
+Requests are JSON-RPC 2.0 objects (or arrays of them) POSTed over HTTP, either to a TCP port or a
+Unix socket. Each slice is loaded the first time a request names it, and the results derived from
+it (the converted paths, the endpoint index, the flattened slice and the reachables index) are
+kept so that later requests only look them up. A slice is loaded again when its file changes, and
+once more than ATOM_TOOLS_SERVER_SLICES slices are loaded, the least recently used is dropped.
+"""
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from atom_tools.lib.converter import SUPPORTED_TYPES, OpenAPI
+from atom_tools.lib.filtering import Filter, ReachableIndex, parse_filters, parse_line_filter
+from atom_tools.lib.line_index import EndpointIndex
+from atom_tools.lib.slices import AtomSlice, FlatSlice
+
+
+logger = logging.getLogger(__name__)
+SERVER_SLICES = int(os.getenv('ATOM_TOOLS_SERVER_SLICES', '8'))
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RpcError(Exception):
+    """
+    An error returned in a JSON-RPC response.
+
+    Args:
+        code (int): The JSON-RPC error code.
+        message (str): The error message.
+    """
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class LoadedSlice:
+    """
+    A slice file and the results derived from it, each created the first time it is requested.
+
+    Args:
+        path (Path): The absolute path of the slice.
+        version (tuple[int, int]): The modification time and size of the file when loaded.
+
+    Attributes:
+        last_used (float): The monotonic time of the last request for the slice.
+        lock (threading.RLock): Held while a request uses the slice.
+    """
+
+    def __init__(self, path: Path, version: Tuple[int, int]) -> None:
+        self.path = path
+        self.version = version
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+        self._paths: Dict[Tuple[str, str | None], Dict] = {}
+        self._endpoint_indexes: Dict[Tuple[str, str | None], EndpointIndex] = {}
+        self._flat_slice: FlatSlice | None = None
+        self._reachables: ReachableIndex | None = None
+
+    def paths(self, origin_type: str, semantics: str | None = None) -> Dict[str, Dict]:
+        """Returns the OpenAPI paths object converted from the slice."""
+        key = (origin_type, semantics)
+        if key not in self._paths:
+            converter = OpenAPI('openapi3.1.0', origin_type, str(self.path), semantics)
+            self._paths[key] = converter.convert_usages()
+        return self._paths[key]
+
+    def endpoint_index(self, origin_type: str, semantics: str | None = None) -> EndpointIndex:
+        """Returns the index of the call line numbers of the converted endpoints."""
+        key = (origin_type, semantics)
+        if key not in self._endpoint_indexes:
+            self._endpoint_indexes[key] = EndpointIndex.from_openapi(
+                {'paths': self.paths(origin_type, semantics)})
+        return self._endpoint_indexes[key]
+
+    def flat_slice(self) -> FlatSlice:
+        """Returns the slice with its attribute lookups, as used by Filter."""
+        if self._flat_slice is None:
+            self._flat_slice = FlatSlice(str(self.path))
+        return self._flat_slice
+
+    def reachables(self) -> ReachableIndex:
+        """Returns the index of the reachable purls and flows."""
+        if self._reachables is None:
+            self._reachables = ReachableIndex(AtomSlice(str(self.path)).content)
+        return self._reachables
+
+    def info(self) -> Dict[str, Any]:
+        """Returns a description of the slice and the results loaded for it."""
+        return {
+            'slice': str(self.path),
+            'idle': round(time.monotonic() - self.last_used, 3),
+            'converted': sorted(i[0] for i in self._paths),
+            'filter': self._flat_slice is not None,
+            'reachables': self._reachables is not None,
+        }
+
+
+class SliceStore:
+    """
+    The loaded slices, in least recently used order.
+
+    Args:
+        max_slices (int): The maximum number of slices kept loaded.
+        idle_timeout (float): Drop slices not used for this many seconds. 0 keeps them until
+            max_slices is reached.
+    """
+
+    def __init__(self, max_slices: int = SERVER_SLICES, idle_timeout: float = 0) -> None:
+        self.max_slices = max(1, max_slices)
+        self.idle_timeout = idle_timeout
+        self._slices: OrderedDict[Path, LoadedSlice] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slices)
+
+    def get(self, slice_file: str) -> LoadedSlice:
+        """
+        Returns a loaded slice, replacing it if the file changed since it was loaded.
+
+        Args:
+            slice_file (str): The slice file.
+
+        Returns:
+            LoadedSlice: The slice, marked as most recently used.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        path = Path(slice_file).resolve()
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            loaded = self._slices.get(path)
+            if loaded is None or loaded.version != version:
+                if loaded is not None:
+                    logger.info(f'Reloading {path}, which changed since it was loaded.')
+                loaded = LoadedSlice(path, version)
+                self._slices[path] = loaded
+            loaded.last_used = time.monotonic()
+            self._slices.move_to_end(path)
+            self._evict()
+        return loaded
+
+    def unload(self, slice_file: str) -> bool:
+        """Drops a slice, returning False if it was not loaded."""
+        with self._lock:
+            return self._slices.pop(Path(slice_file).resolve(), None) is not None
+
+    def info(self) -> List[Dict[str, Any]]:
+        """Returns a description of each loaded slice, least recently used first."""
+        with self._lock:
+            self._evict()
+            return [i.info() for i in self._slices.values()]
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._slices:
+            path, oldest = next(iter(self._slices.items()))
+            idle = self.idle_timeout and now - oldest.last_used > self.idle_timeout
+            if len(self._slices) <= self.max_slices and not idle:
+                break
+            del self._slices[path]
+            logger.info(f'Unloaded {path}.')
+
+
+class SliceService:
+    """
+    The JSON-RPC methods of the server.
+
+    Args:
+        store (SliceStore): The loaded slices.
+    """
+
+    def __init__(self, store: SliceStore) -> None:
+        self.store = store
+        self.methods: Dict[str, Callable[..., Any]] = {
+            'load': self.load,
+            'unload': self.unload,
+            'stats': self.stats,
+            'convert': self.convert,
+            'filter': self.filter,
+            'query-endpoints': self.query_endpoints,
+            'check-reachable': self.check_reachable,
+        }
+
+    def handle(self, request: Any) -> Dict | List | None:
+        """
+        Answers a JSON-RPC request or batch of requests.
+
+        Args:
+            request (Any): The decoded request.
+
+        Returns:
+            dict | list: The response, or None if the request was a notification.
+        """
+        if isinstance(request, list):
+            if not request:
+                return _error_response(None, RpcError(INVALID_REQUEST, 'Empty batch'))
+            responses = [r for i in request if (r := self._handle_one(i)) is not None]
+            return responses or None
+        return self._handle_one(request)
+
+    def _handle_one(self, request: Any) -> Dict | None:
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error_response(None, RpcError(INVALID_REQUEST, 'Invalid request'))
+        request_id = request.get('id')
+        try:
+            if not (method := self.methods.get(request['method'])):
+                raise RpcError(METHOD_NOT_FOUND, f'Unknown method: {request["method"]}')
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, 'Params must be an object')
+            try:
+                result = method(**params)
+            except TypeError as e:
+                raise RpcError(INVALID_PARAMS, str(e)) from e
+            except ValueError as e:
+                raise RpcError(INVALID_PARAMS, str(e)) from e
+            except OSError as e:
+                raise RpcError(SERVER_ERROR, str(e)) from e
+            except SystemExit as e:
+                # import_slice exits when a slice is not valid json or of no known type.
+                raise RpcError(
+                    SERVER_ERROR, f'Could not load slice: {params.get("slice")}') from e
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RpcError as e:
+            response = _error_response(request_id, e)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception(f'Error handling {request["method"]}')
+            response = _error_response(request_id, RpcError(SERVER_ERROR, repr(e)))
+        # Notifications, which have no id, are not answered.
+        return None if 'id' not in request else response
+
+    def load(self, slice: str, type: str | None = None) -> Dict:  # pylint: disable=W0622
+        """Loads a slice, converting it now if an origin type is given."""
+        loaded = self.store.get(slice)
+        with loaded.lock:
+            if type:
+                loaded.endpoint_index(_origin_type(type))
+            return loaded.info()
+
+    def unload(self, slice: str) -> bool:  # pylint: disable=W0622
+        """Drops a slice and the results derived from it."""
+        return self.store.unload(slice)
+
+    def stats(self) -> Dict:
+        """Returns the loaded slices."""
+        return {'slices': self.store.info(), 'max_slices': self.store.max_slices}
+
+    def convert(  # pylint: disable=W0622,R0913
+            self,
+            slice: str,
+            type: str = 'java',
+            format: str = 'openapi3.1.0',
+            semantics: str | None = None,
+            server: str = '',
+    ) -> Dict:
+        """Converts a usages slice to an OpenAPI document, as the convert command does."""
+        if format not in {'openapi3.1.0', 'openapi3.0.1'}:
+            raise ValueError(f'Unknown destination format: {format}')
+        origin_type = _origin_type(type)
+        loaded = self.store.get(slice)
+        with loaded.lock:
+            paths = loaded.paths(origin_type, semantics)
+        converter = OpenAPI(format, origin_type, str(loaded.path), semantics)
+        return converter.paths_to_openapi(paths, server)
+
+    def filter(  # pylint: disable=W0622
+            self, slice: str, criteria: str, fuzz: int | None = None) -> Dict:
+        """Filters a slice by attribute criteria, as the filter command does."""
+        loaded = self.store.get(slice)
+        with loaded.lock:
+            filter_runner = Filter.with_slice(loaded.flat_slice(), fuzz)
+            filter_runner.add_filters(parse_filters(criteria))
+            return filter_runner.filter_slice()
+
+    def query_endpoints(  # pylint: disable=W0622
+            self,
+            slice: str,
+            type: str = 'java',
+            filter_lines: str | None = None,
+            sparse: bool = False,
+    ) -> List[str]:
+        """Lists the endpoints of a usages slice, as the query-endpoints command does."""
+        origin_type = _origin_type(type)
+        file_name, line_filter = parse_line_filter(filter_lines) if filter_lines else (None, ())
+        loaded = self.store.get(slice)
+        with loaded.lock:
+            index = loaded.endpoint_index(origin_type)
+        return index.output(sparse, line_filter, file_name).splitlines()
+
+    def check_reachable(  # pylint: disable=W0622
+            self,
+            slice: str,
+            pkg: str | None = None,
+            location: str | None = None,
+            queries: List[Dict] | None = None,
+    ) -> bool | List[Dict]:
+        """
+        Checks a package or location, or a list of queries each with a pkg or location key, as
+        the check-reachable command does.
+        """
+        loaded = self.store.get(slice)
+        with loaded.lock:
+            index = loaded.reachables()
+        if queries is not None:
+            return [index.check(i) for i in queries]
+        if pkg:
+            return index.check_purl(str(pkg))
+        return index.check_location(str(location or ''))
+
+
+class RpcRequestHandler(BaseHTTPRequestHandler):
+    """Passes the JSON-RPC requests POSTed to the server to its SliceService."""
+
+    server_version = 'atom-tools'
+    server: 'RpcHTTPServer | UnixHTTPServer'
+
+    def do_POST(self) -> None:  # pylint: disable=C0103
+        """Answers a JSON-RPC request."""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            response: Dict | List | None = _error_response(
+                None, RpcError(PARSE_ERROR, f'Parse error: {e}'))
+        else:
+            response = self.server.service.handle(request)
+        if response is None:
+            self.send_response(204)
+            self.end_headers()
+            return
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address.
+        return str(self.client_address[0]) if self.client_address else 'unix'
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        logger.debug(f'{self.address_string()} {format % args}')
+
+
+class RpcHTTPServer(ThreadingHTTPServer):
+    """
+    An HTTP server listening on a TCP port.
+
+    Args:
+        server_address (tuple): The host and port to listen on.
+        service (SliceService): The service answering requests.
+    """
+
+    def __init__(self, server_address: Tuple[str, int], service: SliceService) -> None:
+        super().__init__(server_address, RpcRequestHandler)
+        self.service = service
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    An HTTP server listening on a Unix socket, which is removed when the server is closed.
+
+    Args:
+        unix_socket (str): The socket to listen on.
+        service (SliceService): The service answering requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, unix_socket: str, service: SliceService) -> None:
+        super().__init__(unix_socket, RpcRequestHandler)
+        self.service = service
+
+    def server_close(self) -> None:
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)  # type: ignore[arg-type]
+
+
+def create_server(
+        service: SliceService,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        unix_socket: str | None = None,
+) -> RpcHTTPServer | UnixHTTPServer:
+    """
+    Creates a server passing requests to a SliceService.
+
+    Args:
+        service (SliceService): The service answering requests.
+        host (str): The address to listen on.
+        port (int): The port to listen on. 0 picks a free port.
+        unix_socket (str): Listen on this Unix socket instead of a TCP port.
+
+    Returns:
+        RpcHTTPServer | UnixHTTPServer: The server, which is started with serve_forever.
+    """
+    if unix_socket:
+        Path(unix_socket).unlink(missing_ok=True)
+        return UnixHTTPServer(unix_socket, service)
+    return RpcHTTPServer((host, port), service)
+
+
+def _error_response(request_id: Any, error: RpcError) -> Dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'error': {'code': error.code, 'message': error.message},
+    }
+
+
+def _origin_type(origin_type: str) -> str:
+    if origin_type not in SUPPORTED_TYPES:
+        raise ValueError(f'Unknown origin type: {origin_type}')
+    return origin_type
@@ -2,24 +2,63 @@
 Classes and functions for working with slices.
 """
 
+import codecs
+import copy
 import json
 import logging
+import mmap
+import os
+import re
 import sys
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Tuple, Dict
-
-import json_flatten  # type: ignore
+from functools import cached_property
+from types import GeneratorType
+from typing import Any, BinaryIO, Dict, Generator, List, Set, Tuple
 
+from atom_tools.lib.profiling import timed
 from atom_tools.lib.regex_utils import FilteringPatternCollection
 
 logger = logging.getLogger(__name__)
 patterns = FilteringPatternCollection()
 
+# Slices larger than this (in bytes) are loaded incrementally unless specified otherwise.
+STREAM_THRESHOLD = int(os.getenv('ATOM_TOOLS_STREAM_THRESHOLD', str(256 * 1024 * 1024)))
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Top-level arrays which are decoded one entry at a time when streaming.
+STREAMED_KEYS = ('objectSlices', 'userDefinedTypes', 'reachables')
+FILE_NAME_KEYS = {'fileName', 'parentFileName'}
+# Number of entries inspected to identify the framework when streaming.
+FRAMEWORK_SAMPLE_SIZE = 200
+FRAMEWORK_HINTS = (('flask', 'flask'), ('django', 'django'), ('play', 'playframework'),
+                   ('akka', 'akka'))
+_whitespace = re.compile(r'[ \t\n\r]*')
+# Attributes indexed for filtering and the key names they are identified by, in order of
+# precedence. Line numbers are integer values of keys ending in lineNumber.
+_attrib_names = ('filename', 'fullname', 'callname', 'name', 'linenumber', 'signature')
+_attrib_key_names = (('fileName', 'parentFileName'), ('fullName',), ('callName',), ('name',), (),
+                     ('signature',))
+_line_number_flag = 1 << _attrib_names.index('linenumber')
+_attrib_flags_cache: Dict[str, int] = {}
+
+
+def create_attrib_dicts(content: Dict) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+    """
+    Creates the attribute dictionaries used for filtering.
+
+    Each attribute dictionary maps a value (as a string) to the locations it was found at.
+    A location is a (top-level key, index) tuple, the key being its position in STREAMED_KEYS.
+    Values are grouped into attributes based on the names of the keys leading to them.
+
+    Args:
+        content (dict): The slice content.
 
-def create_attrib_dicts(data: Dict) -> Dict[str, Dict]:
-    """Creates a flattened slice and individual attribute dictionaries."""
-    attributes: Dict[str, Dict] = {
+    Returns:
+        dict: The attribute dictionaries.
+    """
+    attributes: Dict[str, Dict[str, List[Tuple[int, int]]]] = {
         'filename': {},
         'fullname': {},
         'callname': {},
@@ -27,52 +66,91 @@ def create_attrib_dicts(data: Dict) -> Dict[str, Dict]:
         'linenumber': {},
         'signature': {}
     }
-
-    for k, v in data.items():
-        if 'fileName' in k or 'parentFileName' in k:
-            attributes['filename'] = process_attrib_dict(attributes['filename'], k, v)
-        elif 'fullName' in k:
-            attributes['fullname'] = process_attrib_dict(attributes['fullname'], k, v)
-        elif 'callName' in k:
-            attributes['callname'] = process_attrib_dict(attributes['callname'], k, v)
-        elif 'name' in k:
-            attributes['name'] = process_attrib_dict(attributes['name'], k, v)
-        elif k.endswith('lineNumber$int'):
-            attributes['linenumber'] = process_attrib_dict(attributes['linenumber'], k, v)
-        elif 'signature' in k:
-            attributes['signature'] = process_attrib_dict(attributes['signature'], k, v)
-
+    for key_id, key in enumerate(STREAMED_KEYS):
+        for i, entry in enumerate(content.get(key) or []):
+            _index_attribs(entry, 0, '', attributes, (key_id, i))
     return attributes
 
 
+@timed()
 def import_flat_slice(content: Dict) -> Dict[str, Dict]:
     """
-    Import a slice from a JSON file.
+    Creates the attribute dictionaries for a slice.
 
     Args:
-        content (dict): The contents of the JSON file
+        content (dict): The slice content.
 
     Returns:
-        tuple[dict, str]: The contents of the JSON file and the type of slice
-
-    Raises:
-        JSONDecodeError: If the JSON file cannot be decoded.
-        UnicodeDecodeError: If there is an encoding error.
-        FileNotFoundError: If the specified file cannot be found.
-
-    Warnings:
-        If the JSON file is not a valid slice, a warning is logged.
+        dict: The attribute dictionaries (see create_attrib_dicts).
     """
-    content = json_flatten.flatten(content)
     return create_attrib_dicts(content)
 
 
-def import_slice(filename: str | Path) -> Tuple[Dict, str, str]:
+def _attrib_flags(key: str) -> int:
+    """Returns the attribute flags for a key, in order of precedence."""
+    if (flags := _attrib_flags_cache.get(key)) is None:
+        flags = 0
+        for i, names in enumerate(_attrib_key_names):
+            if any(n in key for n in names):
+                flags |= 1 << i
+        _attrib_flags_cache[key] = flags
+    return flags
+
+
+def _index_attribs(
+        value: Any, flags: int, key: str, attributes: Dict, loc: Tuple[int, int]) -> None:
+    """Recursively adds the values of a slice entry to the attribute dictionaries."""
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            _index_attribs(v, flags | _attrib_flags(k), k, attributes, loc)
+        return
+    if isinstance(value, list) and value:
+        for v in value:
+            _index_attribs(v, flags, '', attributes, loc)
+        return
+    if isinstance(value, int) and not isinstance(value, bool) and key.endswith('lineNumber'):
+        flags |= _line_number_flag
+    if not flags:
+        return
+    attrib = _attrib_names[(flags & -flags).bit_length() - 1]
+    value = value if isinstance(value, str) else str(value)
+    locations = attributes[attrib].setdefault(value, [])
+    if not locations or locations[-1] != loc:
+        locations.append(loc)
+
+
+def detect_custom_attr(raw_content: str) -> str:
+    """Identifies the framework a slice was generated from."""
+    for hint, custom_attr in FRAMEWORK_HINTS:
+        if hint in raw_content:
+            return custom_attr
+    return ''
+
+
+def detect_slice_type(content: Dict, filename: str | Path) -> str:
+    """Identifies the type of slice from its top-level keys."""
+    if content.get("config") or "semantics.slices" in str(filename):
+        return 'semantics'
+    if 'objectSlices' in content:
+        return 'usages'
+    if 'reachables' in content:
+        return 'reachables'
+    return ''
+
+
+@timed()
+def import_slice(
+        filename: str | Path, stream: bool | None = None, lazy: bool = False
+) -> Tuple[Dict, str, str]:
     """
     Import a slice from a JSON file.
 
     Args:
         filename (str): The path to the JSON file.
+        stream (bool): Load the slice incrementally. Defaults to streaming files larger than
+            STREAM_THRESHOLD.
+        lazy (bool): Memory-map the slice and only decode entries when they are accessed. Takes
+            precedence over stream.
 
     Returns:
         tuple[dict, str]: The contents of the JSON file and the type of slice
@@ -91,25 +169,21 @@ def import_slice(filename: str | Path) -> Tuple[Dict, str, str]:
     if not filename or not Path(filename).exists():
         logger.warning('No filename specified.', filename)
         return content, slice_type, custom_attr
+    if stream is None:
+        stream = Path(filename).stat().st_size > STREAM_THRESHOLD
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            raw_content = f.read().replace(r'\\', '/')
-            if 'flask' in raw_content:
-                custom_attr = 'flask'
-            elif 'django' in raw_content:
-                custom_attr = 'django'
-            elif 'play' in raw_content:
-                custom_attr = 'playframework'
-            elif 'akka' in raw_content:
-                custom_attr = 'akka'
-            content = json.loads(raw_content)
-        if content.get("config") or "semantics.slices" in filename:
-            slice_type = 'semantics'
-        elif 'objectSlices' in content:
-            slice_type = 'usages'
-        elif 'reachables' in content:
-            slice_type = 'reachables'
-    except (json.decoder.JSONDecodeError, UnicodeDecodeError):
+        if lazy:
+            content = LazySliceContent(filename)  # type: ignore[assignment]
+            custom_attr = content.custom_attr  # type: ignore[attr-defined]
+        elif stream:
+            content, custom_attr = stream_slice(filename)
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                raw_content = f.read().replace(r'\\', '/')
+                custom_attr = detect_custom_attr(raw_content)
+                content = json.loads(raw_content)
+        slice_type = detect_slice_type(content, filename)
+    except (json.decoder.JSONDecodeError, UnicodeDecodeError, ValueError):
         logger.warning(
             f'Failed to load usages slice: {filename}\nPlease check that you specified a valid'
             f' json file.'
@@ -123,13 +197,360 @@ def import_slice(filename: str | Path) -> Tuple[Dict, str, str]:
     return content, slice_type, custom_attr
 
 
-def process_attrib_dict(attrib_dict: Dict, k: str, v: str) -> Dict:
-    """Adds an attribute to a dictionary."""
-    if v in attrib_dict:
-        attrib_dict[v].append(k)
-    else:
-        attrib_dict[v] = [k]
-    return attrib_dict
+def iter_slice(filename: str | Path) -> Generator[Tuple[str, Any], None, None]:
+    """
+    Incrementally decode a slice file.
+
+    The entries of the objectSlices, userDefinedTypes and reachables arrays are decoded one at
+    a time so that only a single entry (plus a read buffer) is held as text. Path separators
+    are normalized in fileName and parentFileName values.
+
+    Args:
+        filename (str): The path to the JSON file.
+
+    Yields:
+        tuple[str, Any]: The top-level key and its decoded value. For the streamed arrays, the
+            value is a generator of (entry, raw JSON text of the entry) tuples which must be
+            consumed before advancing to the next key.
+
+    Raises:
+        JSONDecodeError: If the JSON file cannot be decoded.
+    """
+    with open(filename, 'rb') as f:
+        yield from _SliceReader(f).iter_items()
+
+
+def normalize_file_names(value: Any) -> Any:
+    """Replaces backslashes with forward slashes in fileName-like values."""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k in FILE_NAME_KEYS and isinstance(v, str):
+                value[k] = v.replace('\\', '/')
+            elif isinstance(v, (dict, list)):
+                normalize_file_names(v)
+    elif isinstance(value, list):
+        for v in value:
+            if isinstance(v, (dict, list)):
+                normalize_file_names(v)
+    return value
+
+
+def stream_slice(filename: str | Path) -> Tuple[Dict, str]:
+    """
+    Load a slice incrementally.
+
+    The framework is identified from the first FRAMEWORK_SAMPLE_SIZE entries rather than by
+    searching the full text of the file.
+
+    Args:
+        filename (str): The path to the JSON file.
+
+    Returns:
+        tuple[dict, str]: The contents of the JSON file and the framework identified.
+    """
+    content: Dict = {}
+    sample_ct = 0
+    found: Set[str] = set()
+    for key, value in iter_slice(filename):
+        if key not in STREAMED_KEYS or not isinstance(value, GeneratorType):
+            content[key] = value
+            continue
+        content[key] = []
+        for entry, raw in value:
+            content[key].append(entry)
+            if sample_ct < FRAMEWORK_SAMPLE_SIZE:
+                sample_ct += 1
+                found.update(hint for hint, _ in FRAMEWORK_HINTS if hint in raw)
+    custom_attr = next((attr for hint, attr in FRAMEWORK_HINTS if hint in found), '')
+    return content, custom_attr
+
+
+class _SliceReader:
+    """
+    Decodes the top-level structure of a slice from a binary file in chunks.
+
+    Args:
+        f (BinaryIO): The slice file (or a memory map of it).
+        chunk_size (int): The number of bytes to read at a time.
+        track_offsets (bool): Record the byte offsets of each streamed array entry in
+            entry_start and entry_end. Entries are not normalized when tracking offsets.
+    """
+
+    def __init__(
+            self, f: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE, track_offsets: bool = False
+    ) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.track_offsets = track_offsets
+        self.buf = ''
+        self.pos = 0
+        self.value_start = 0
+        self.offset = 0
+        self.entry_start = 0
+        self.entry_end = 0
+        self.eof = False
+        self._tracked_pos = 0
+        self._tracked_offset = 0
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def iter_items(self) -> Generator[Tuple[str, Any], None, None]:
+        """Yields the top-level keys and values of the slice."""
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if key in STREAMED_KEYS and self._peek() == '[':
+                self.pos += 1
+                entries = self._iter_array()
+                yield key, entries
+                # Skip over anything the consumer did not read.
+                for _ in entries:
+                    pass
+            else:
+                yield key, normalize_file_names(self._decode())
+            if self._peek() == ',':
+                self.pos += 1
+                continue
+            self._expect('}')
+            return
+
+    def _iter_array(self) -> Generator[Tuple[Any, str], None, None]:
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            value = self._decode()
+            raw = self.buf[self.value_start:self.pos]
+            if self.track_offsets:
+                self.entry_start = self._byte_offset(self.value_start)
+                self.entry_end = self.entry_start + len(raw.encode('utf-8'))
+                self._tracked_pos, self._tracked_offset = self.pos, self.entry_end
+            else:
+                value = normalize_file_names(value)
+            yield value, raw
+            if self._peek() == ',':
+                self.pos += 1
+                continue
+            self._expect(']')
+            return
+
+    def _byte_offset(self, pos: int) -> int:
+        """Returns the offset in the file of a position in the buffer."""
+        if pos < self._tracked_pos:
+            self._tracked_pos, self._tracked_offset = 0, self.offset
+        self._tracked_offset += len(self.buf[self._tracked_pos:pos].encode('utf-8'))
+        self._tracked_pos = pos
+        return self._tracked_offset
+
+    def _decode(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending at the buffer boundary may have been cut short.
+                if end < len(self.buf) or self.eof:
+                    self.value_start, self.pos = self.pos, end
+                    return value
+            except json.decoder.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise json.decoder.JSONDecodeError(f'Expecting {char!r}', self.buf, self.pos)
+        self.pos += 1
+
+    def _fill(self, size: int) -> None:
+        chunk = self.f.read(size)
+        self.eof = not chunk
+        if self.track_offsets:
+            self.offset = self._byte_offset(self.pos)
+        self.buf = self.buf[self.pos:] + self.text_decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        self._tracked_pos, self._tracked_offset = 0, self.offset
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.chunk_size)
+
+
+class LazyEntryList(Sequence):
+    """
+    A read-only list of the entries of a top-level slice array which are decoded on access.
+
+    Args:
+        buf (mmap): The memory-mapped slice file.
+        starts (array): The byte offset at which each entry starts.
+        ends (array): The byte offset at which each entry ends.
+    """
+
+    def __init__(self, buf: mmap.mmap, starts: array, ends: array) -> None:
+        self._buf = buf
+        self._starts = starts
+        self._ends = ends
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return normalize_file_names(json.loads(self.raw(index)))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator:
+        for i in range(len(self)):
+            yield self[i]
+
+    def raw(self, index: int) -> bytes:
+        """Returns the undecoded JSON for an entry."""
+        return self._buf[self._starts[index]:self._ends[index]]
+
+
+class LazySliceContent(Mapping):
+    """
+    Slice content backed by a memory-mapped file.
+
+    Only the byte offsets of each objectSlices, userDefinedTypes and reachables entry are
+    recorded when the slice is opened; an entry is decoded each time it is accessed and is not
+    retained. Other top-level values are decoded immediately.
+
+    Args:
+        filename (str): The path to the JSON file.
+
+    Attributes:
+        custom_attr (str): The framework identified from the first entries of the slice.
+    """
+
+    def __init__(self, filename: str | Path) -> None:
+        with open(filename, 'rb') as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._values: Dict[str, Any] = {}
+        self._scan()
+        self.custom_attr = self._detect_custom_attr()
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def to_dict(self) -> Dict:
+        """Decodes the full slice."""
+        return {
+            k: list(v) if isinstance(v, LazyEntryList) else v for k, v in self._values.items()
+        }
+
+    def _detect_custom_attr(self) -> str:
+        found: Set[str] = set()
+        remaining = FRAMEWORK_SAMPLE_SIZE
+        for value in self._values.values():
+            if not isinstance(value, LazyEntryList):
+                continue
+            for i in range(min(remaining, len(value))):
+                raw = value.raw(i)
+                found.update(hint for hint, _ in FRAMEWORK_HINTS if hint.encode() in raw)
+            remaining -= min(remaining, len(value))
+        return next((attr for hint, attr in FRAMEWORK_HINTS if hint in found), '')
+
+    def _scan(self) -> None:
+        self._buf.seek(0)
+        reader = _SliceReader(self._buf, track_offsets=True)  # type: ignore[arg-type]
+        for key, value in reader.iter_items():
+            if key not in STREAMED_KEYS or not isinstance(value, GeneratorType):
+                self._values[key] = value
+                continue
+            starts = array('Q')
+            ends = array('Q')
+            for _ in value:
+                starts.append(reader.entry_start)
+                ends.append(reader.entry_end)
+            self._values[key] = LazyEntryList(self._buf, starts, ends)
+
+
+class SliceIndex:
+    """
+    Lookup tables for a usages slice, built in a single pass over the content.
+
+    Args:
+        content (dict): The slice content.
+
+    Attributes:
+        entries (dict): objectSlices entries grouped by fileName.
+        calls (dict): Invoked calls, argument calls and procedures grouped by fileName.
+        methods (dict): The positions in calls of the calls for each fileName, further grouped by
+            resolvedMethod.
+        entries_by_line (dict): The first objectSlices entry for each (fileName, lineNumber).
+    """
+
+    @timed('SliceIndex')
+    def __init__(self, content: Dict) -> None:
+        self.entries: Dict[str, List[Dict]] = {}
+        self.calls: Dict[str, List[Dict]] = {}
+        self.methods: Dict[str, Dict[str, List[int]]] = {}
+        self.entries_by_line: Dict[Tuple[str, Any], Dict] = {}
+        self._build(content)
+
+    def _build(self, content: Dict) -> None:
+        for entry in content.get('objectSlices') or []:
+            file_name = entry.get('fileName')
+            self.entries.setdefault(file_name, []).append(entry)
+            self.entries_by_line.setdefault((file_name, entry.get('lineNumber')), entry)
+            for usage in entry.get('usages') or []:
+                for value in usage.values():
+                    if isinstance(value, list):
+                        self._add_calls(
+                            file_name,
+                            [i for i in value if isinstance(i, dict) and i.get('callName')]
+                        )
+        for udt in content.get('userDefinedTypes') or []:
+            self._add_calls(udt.get('fileName'), udt.get('procedures') or [])
+
+    def _add_calls(self, file_name: str, calls: List[Dict]) -> None:
+        if not calls:
+            return
+        file_calls = self.calls.setdefault(file_name, [])
+        methods = self.methods.setdefault(file_name, {})
+        for call in calls:
+            if isinstance(call, dict) and (method := call.get('resolvedMethod', '')):
+                methods.setdefault(method, []).append(len(file_calls))
+            file_calls.append(call)
+
+    def get_calls(self, file_name: str, resolved_methods: Any = None) -> List[Dict]:
+        """
+        Returns the calls and procedures for a file, in slice order.
+
+        Args:
+            file_name (str): The file name.
+            resolved_methods (Collection[str]): Only include calls to these methods.
+
+        Returns:
+            list[dict]: The matching calls.
+        """
+        calls = self.calls.get(file_name, [])
+        if resolved_methods is None:
+            return list(calls)
+        methods = self.methods.get(file_name, {})
+        if len(resolved_methods) < len(methods):
+            found = [methods[m] for m in set(resolved_methods) if m in methods]
+        else:
+            found = [v for k, v in methods.items() if k in resolved_methods]
+        return [calls[i] for i in sorted(i for positions in found for i in positions)]
+
+    def get_entry(self, file_name: str, line_number: int | None) -> Dict | None:
+        """Returns the first objectSlices entry with the given fileName and lineNumber."""
+        return self.entries_by_line.get((file_name, line_number))
 
 
 class AtomSlice:
@@ -138,20 +559,50 @@ class AtomSlice:
 
     Args:
         filename (str): The path to the JSON file.
+        origin_type (str): The originating language.
+        stream (bool): Load the slice incrementally (see import_slice).
+        lazy (bool): Memory-map the slice and decode entries on access (see import_slice).
 
     Attributes:
         content (dict): The dictionary loaded from the usages JSON file.
         slice_type (str): The type of slice.
         origin_type (str): The originating language.
+        index (SliceIndex): Lookup tables by fileName and resolvedMethod, built on first use.
 
     Methods:
         import_slice: Imports a slice from a JSON file.
     """
 
-    def __init__(self, filename: str | Path, origin_type: str | None = None) -> None:
-        self.content, self.slice_type, self.custom_attr = import_slice(filename)
+    def __init__(
+            self,
+            filename: str | Path,
+            origin_type: str | None = None,
+            stream: bool | None = None,
+            lazy: bool = False,
+    ) -> None:
+        self.content, self.slice_type, self.custom_attr = import_slice(filename, stream, lazy)
         self.origin_type = origin_type
 
+    @cached_property
+    def index(self) -> SliceIndex:
+        """Returns the slice index, building it the first time it is accessed."""
+        return SliceIndex(self.content)
+
+    def with_content(self, content: Dict) -> 'AtomSlice':
+        """
+        Creates a slice with other content but the type, origin and framework of this one.
+
+        Args:
+            content (dict): The content, e.g. the entries of one file of this slice.
+
+        Returns:
+            AtomSlice: The new slice.
+        """
+        slc = copy.copy(self)
+        slc.__dict__.pop('index', None)
+        slc.content = content
+        return slc
+
 
 @dataclass
 class FlatSlice:
@@ -160,7 +611,10 @@ class FlatSlice:
     slice_file: str = field(init=True)
     slice_type: str = field(init=False)
     attrib_dicts: Dict = field(default_factory=dict)
+    stream: bool | None = None
+    lazy: bool = False
 
     def __post_init__(self):
-        self.content, self.slice_type, self.custom_attr = import_slice(self.slice_file)
+        self.content, self.slice_type, self.custom_attr = import_slice(
+            self.slice_file, self.stream, self.lazy)
         self.attrib_dicts = import_flat_slice(self.content)
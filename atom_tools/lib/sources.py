@@ -0,0 +1,328 @@
+"""
+Memory-mapped access to the lines of source files.
+
+A source file is mapped into memory and only the start offset of each line is recorded, in an
+array of 8 byte integers, instead of creating a string for every line. Lines are decoded when they
+are accessed, so validating a few line numbers of a large generated or minified file only decodes
+those lines.
+
+A SourceCache keeps the line offsets of the files it has opened, keyed by path, modification time
+and size, so that validating several slices of the same project in one process
+reads and splits each source file once. Given a directory (--cache-dir or ATOM_TOOLS_CACHE_DIR),
+the entries are also stored on disk, in its sources subdirectory, and shared between invocations.
+"""
+import base64
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, overload
+
+from atom_tools.lib.cache import CACHE_DIR, CACHE_SIZE, evict_lru
+
+
+logger = logging.getLogger(__name__)
+ENCODING = 'utf-8'
+LINE_END = re.compile(rb'\r\n?|\n')
+SOURCE_CACHE_MEMORY = int(os.getenv('ATOM_TOOLS_SOURCE_CACHE_MEMORY', str(64 * 1024 * 1024)))
+
+
+class SourceLines(Sequence):
+    """
+    The lines of a source file, decoded as they are accessed.
+
+    Like the result of readlines in text mode, each line ends with \\n (\\r\\n and \\r line
+    endings are translated), except possibly the last. Lines that are not valid UTF-8 are decoded
+    with invalid bytes replaced, rather than failing for the whole file.
+
+    Args:
+        path (str): The source file.
+        offsets (array): The start offset of each line, if already known, e.g. from a cache.
+
+    Attributes:
+        offsets (array): The start offset of each line.
+        size (int): The size of the file in bytes.
+    """
+
+    def __init__(self, path: str | Path, offsets: array | None = None) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')  # pylint: disable=consider-using-with
+        self.size = self.path.stat().st_size
+        self._data: Any = b''
+        if self.size:
+            try:
+                self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Some files, e.g. on special file systems, cannot be mapped.
+                self._data = self._file.read()
+        self.offsets = offsets if offsets is not None else line_offsets(self._data)
+        self._decoded: Dict[int, str] = {}
+
+    def __enter__(self) -> 'SourceLines':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self.offsets)
+        if not 0 <= index < len(self.offsets):
+            raise IndexError('line index out of range')
+        if (line := self._decoded.get(index)) is None:
+            line = decode_line(self.line_bytes(index))
+            self._decoded[index] = line
+        return line
+
+    def line_bytes(self, index: int) -> bytes:
+        """Returns the undecoded bytes of a line, including its line ending."""
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.size
+        return self._data[start:end]
+
+    def stripped_line(self, index: int) -> str:
+        """Returns a line without leading and trailing whitespace."""
+        return self[index].strip()
+
+    def close(self) -> None:
+        """Unmaps and closes the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b''
+        self._file.close()
+
+
+def decode_line(data: bytes) -> str:
+    """
+    Decodes a line of a source file.
+
+    Args:
+        data (bytes): The line.
+
+    Returns:
+        str: The line, with a \\r\\n or \\r line ending translated to \\n and any bytes that are
+            not valid UTF-8 replaced.
+    """
+    if data.endswith(b'\r\n'):
+        data = data[:-2] + b'\n'
+    elif data.endswith(b'\r'):
+        data = data[:-1] + b'\n'
+    try:
+        return data.decode(ENCODING)
+    except UnicodeDecodeError:
+        return data.decode(ENCODING, errors='replace')
+
+
+def line_offsets(data: bytes | mmap.mmap) -> array:
+    """
+    Finds the start offset of each line.
+
+    Args:
+        data (bytes): The content of the file.
+
+    Returns:
+        array: The offsets, one for each line as returned by readlines in text mode, which ends
+            lines at \\n, \\r\\n or \\r.
+    """
+    offsets = array('Q')
+    size = len(data)
+    if data.find(b'\r') != -1:
+        # Only files with \r line endings are split with the slower regular expression.
+        offsets.append(0)
+        offsets.extend(i.end() for i in LINE_END.finditer(data) if i.end() < size)
+        return offsets
+    start = 0
+    while start < size:
+        offsets.append(start)
+        if (end := data.find(b'\n', start)) == -1:
+            break
+        start = end + 1
+    return offsets
+
+
+@dataclass
+class SourceIndex:
+    """
+    The cached line index of a source file.
+
+    Attributes:
+        mtime_ns (int): The modification time of the file when it was indexed.
+        size (int): The size of the file when it was indexed.
+        offsets (array): The start offset of each line.
+    """
+    mtime_ns: int
+    size: int
+    offsets: array
+
+    @property
+    def memory(self) -> int:
+        """The size of the offsets in bytes."""
+        return len(self.offsets) * self.offsets.itemsize
+
+
+class SourceCache:
+    """
+    Line indexes of source files, with least recently used eviction.
+
+    Args:
+        directory (str): A directory to also store the indexes in, which is created if needed.
+            Without one, the indexes are only kept in memory.
+        max_memory (int): The maximum total size in bytes of the line offsets kept in memory.
+        max_size (int): The maximum total size in bytes of the indexes stored in the directory.
+
+    Attributes:
+        hits (int): The number of files opened with a cached index.
+        misses (int): The number of files indexed.
+    """
+
+    def __init__(
+            self,
+            directory: str | Path | None = None,
+            max_memory: int = SOURCE_CACHE_MEMORY,
+            max_size: int = CACHE_SIZE,
+    ) -> None:
+        self.directory = Path(directory) / 'sources' if directory else None
+        self.max_memory = max_memory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._indexes: OrderedDict[str, SourceIndex] = OrderedDict()
+        self._memory = 0
+        self._stored: int | None = None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def open(self, path: str | Path) -> SourceLines:
+        """
+        Opens a source file, indexing it unless an index of the same version is cached.
+
+        Args:
+            path (str): The source file.
+
+        Returns:
+            SourceLines: The lines of the file.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = str(path)
+        if (index := self._get(key, stat.st_mtime_ns, stat.st_size)) is not None:
+            self.hits += 1
+            return SourceLines(path, index.offsets)
+        self.misses += 1
+        lines = SourceLines(path)
+        index = SourceIndex(stat.st_mtime_ns, stat.st_size, lines.offsets)
+        self._remember(key, index)
+        if self.directory:
+            self._store(key, index)
+        return lines
+
+    def clear(self) -> None:
+        """Removes the indexes kept in memory."""
+        self._indexes.clear()
+        self._memory = 0
+
+    def evict(self) -> None:
+        """Removes the least recently used indexes until the directory fits in max_size."""
+        if self.directory:
+            self._stored = evict_lru(self.directory, self.max_size, 'source cache')
+
+    def _get(self, key: str, mtime_ns: int, size: int) -> SourceIndex | None:
+        if (index := self._indexes.get(key)) is not None:
+            if (index.mtime_ns, index.size) == (mtime_ns, size):
+                self._indexes.move_to_end(key)
+                return index
+            self._forget(key)
+        if not self.directory or (index := self._load(key)) is None:
+            return None
+        if (index.mtime_ns, index.size) != (mtime_ns, size):
+            return None
+        self._remember(key, index)
+        return index
+
+    def _remember(self, key: str, index: SourceIndex) -> None:
+        if index.memory > self.max_memory:
+            return
+        self._forget(key)
+        self._indexes[key] = index
+        self._memory += index.memory
+        while self._memory > self.max_memory:
+            self._forget(next(iter(self._indexes)))
+
+    def _forget(self, key: str) -> None:
+        if (index := self._indexes.pop(key, None)) is not None:
+            self._memory -= index.memory
+
+    def _load(self, key: str) -> SourceIndex | None:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+            os.utime(path)
+            if content['path'] != key:
+                return None
+            offsets = array('Q')
+            offsets.frombytes(base64.b64decode(content['offsets']))
+            return SourceIndex(content['mtime_ns'], content['size'], offsets)
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+    def _store(self, key: str, index: SourceIndex) -> None:
+        content = {
+            'path': key,
+            'mtime_ns': index.mtime_ns,
+            'size': index.size,
+            'offsets': base64.b64encode(index.offsets.tobytes()).decode('ascii'),
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                size = f.write(json.dumps(content, separators=(',', ':')))
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f'Could not write to the source cache: {e}')
+            Path(tmp).unlink(missing_ok=True)
+            return
+        # The directory is only listed again once the indexes stored since may exceed max_size.
+        if self._stored is None or self._stored + size > self.max_size:
+            self.evict()
+        else:
+            self._stored += size
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f'{hashlib.sha256(key.encode("utf-8")).hexdigest()}.json'
+
+
+def get_source_cache(directory: str | None = None) -> SourceCache | None:
+    """
+    Returns the source cache in the given directory or ATOM_TOOLS_CACHE_DIR.
+
+    Args:
+        directory (str): The cache directory. Defaults to ATOM_TOOLS_CACHE_DIR.
+
+    Returns:
+        SourceCache: The cache, or None if no directory is configured.
+    """
+    directory = directory or CACHE_DIR
+    return SourceCache(directory) if directory else None
@@ -3,9 +3,15 @@ import json
 import logging
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Generator, Iterable, List, Tuple
 
-from atom_tools.lib.filtering import check_reachable_purl, filter_flows, get_ln_range
+from atom_tools.lib.filtering import (
+    ReachableIndex,
+    check_reachable_purl,
+    filter_flows,
+    parse_location,
+)
+from atom_tools.lib.profiling import timed
 
 logger = logging.getLogger(__name__)
 
@@ -30,15 +36,67 @@ def add_params_to_cmd(cmd: str, outfile: str, origin_type: str = '') -> Tuple[st
     return cmd, args
 
 
+@timed()
 def check_reachable(data: Dict, pkg: str, loc: str) -> bool:
     """Checks if package is reachable"""
     if pkg:
         return check_reachable_purl(data, pkg)
-    if match := re.search(r'(?P<file>[^/]+(?<!/)):(?P<line>[\d-]+)', loc):
-        return filter_flows(data.get('reachables', []), match['file'], get_ln_range(match['line']))
-    raise ValueError(f'Invalid location: {loc}')
+    filename, ln = parse_location(loc)
+    return filter_flows(data.get('reachables', []), filename, ln)
 
 
+def check_reachable_batch(data: Dict, queries: Iterable[Dict]) -> Generator[Dict, None, None]:
+    """
+    Checks if each of many packages and locations is reachable, reading the slice only once.
+
+    Args:
+        data (dict): The slice content.
+        queries (Iterable[dict]): The queries, each with a pkg or a location as accepted by
+            check_reachable.
+
+    Yields:
+        dict: Each query with a reachable result, or an error if the query is invalid.
+    """
+    index = ReachableIndex(data)
+    for query in queries:
+        yield index.check(query)
+
+
+def read_reachable_queries(lines: Iterable[str]) -> Generator[Dict, None, None]:
+    """
+    Parses check-reachable batch queries, one per line.
+
+    Each line is either a JSON object with a pkg or location key, or a package:version or
+    filename:linenumber in the format of the --pkg and --location options, prefixed with pkg= or
+    location=. Blank lines and lines starting with # are skipped.
+
+    Args:
+        lines (Iterable[str]): The lines of the batch file.
+
+    Yields:
+        dict: The query on each line, or an error for lines that could not be parsed.
+    """
+    for num, line in enumerate(lines, 1):
+        if not (line := line.strip()) or line.startswith('#'):
+            continue
+        if line.startswith(('{', '[')):
+            try:
+                query = json.loads(line)
+            except json.JSONDecodeError as e:
+                query = {'error': f'Invalid JSON on line {num}: {e}'}
+            if not isinstance(query, dict):
+                query = {'error': f'Expected an object on line {num}'}
+            yield query
+            continue
+        key, sep, value = line.partition('=')
+        if sep and key in {'pkg', 'location'}:
+            yield {key: value}
+        else:
+            yield {'error': f'Expected pkg=<package_name>:<version> or '
+                            f'location=<filename>:<linenumber> on line {num}'}
+
+
+@timed()
 def export_json(data: Dict, outfile: str, indent: int | None = None) -> None:
     """Exports data to json"""
     with open(outfile, 'w', encoding='utf-8') as f:
@@ -3,14 +3,18 @@
 import logging
 import os
 import sys
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, List, Dict
-
-import jmespath
+from typing import Dict, List, Tuple
 
+from atom_tools.lib.profiling import timed
+from atom_tools.lib.queries import search
 from atom_tools.lib.slices import AtomSlice
-from atom_tools.lib.regex_utils import ValidationRegexCollection
+from atom_tools.lib.sources import SourceCache, SourceLines
+from atom_tools.lib.regex_utils import TokenMatcher, ValidationRegexCollection
 from atom_tools.lib.utils import export_json, remove_duplicates_list
 
 
@@ -77,6 +81,17 @@ py_builtins: Dict[str, str] = {
     '__builtin.str.lstrip': '.lstrip(',
     '__builtin.list.extend': '.extend(',
 }
+py_tmp_map: List[str] = ['.get', '.keys', '.values', '.items', 'return [']
+# Every substring the checks below look for, so that each line is scanned once for all of them.
+line_tokens: TokenMatcher = TokenMatcher([
+    *(i for op in operator_map.values() for i in op),
+    *(i for op in ecma_map.values() for i in op),
+    *init_map,
+    *py_builtins.values(),
+    *py_tmp_map,
+    '__init__(',
+    'for ',
+])
 
 
 def check_init(line: str) -> bool:
@@ -89,7 +104,7 @@ def check_init(line: str) -> bool:
     Returns:
         bool: True if the line contains any of the specified initialization patterns.
     """
-    return any(i in line for i in init_map)
+    return not line_tokens.hits(line).isdisjoint(init_map)
 
 
 def check_mapping_type(function_name: str, code: str, line: str, mapping: Dict) -> bool:
@@ -106,12 +121,12 @@ def check_mapping_type(function_name: str, code: str, line: str, mapping: Dict)
         bool: True if the line contains any of the specified mapping types, False otherwise.
     """
     op = mapping.get(function_name) or mapping.get(code)
-    return any(i in line for i in op) if op else False
+    return not line_tokens.hits(line).isdisjoint(op) if op else False
 
 
 def check_py_builtins(code: str, line: str) -> bool:
     """Checks if Python builtin function is present"""
-    return builtin in line if (builtin := py_builtins.get(code)) else False
+    return builtin in line_tokens.hits(line) if (builtin := py_builtins.get(code)) else False
 
 
 def check_py_module_members(code: str, line: str) -> bool:
@@ -208,13 +223,17 @@ def java_validation_helper(func: str, line: str) -> bool:
     Returns:
         bool: True if the line contains a match, False otherwise.
     """
+    return (java_type := _java_type(func)) is not None and java_type in line
+
+
+@lru_cache(maxsize=4096)
+def _java_type(func: str) -> str | None:
+    # The type java_validation_helper looks for, which is the same for every line checked.
     if match := regex.java_lib_type.search(func):
-        if match.group('type') in line:
-            return True
-    elif match := regex.java_udt_regex.search(func):
-        if match.group('udt') in line:
-            return True
-    return False
+        return match.group('type')
+    if match := regex.java_udt_regex.search(func):
+        return match.group('udt')
+    return None
 
 
 def js_validation_helper(function_name: str, code: str, line: str) -> bool:
@@ -271,13 +290,12 @@ def py_validation_helper(function_name: str, code: str, line: str) -> bool:
     if code.startswith('class '):
         code = code.replace('<meta>', '')
         found = code in line
-    if function_name.startswith('__newInstance') and '__init__(' in line:
+    hits = line_tokens.hits(line)
+    if function_name.startswith('__newInstance') and '__init__(' in hits:
         return True
-    if function_name.startswith('tmp'):
-        for i in ('.get', '.keys', '.values', '.items', 'return ['):
-            if i in line:
-                return True
-    if ('__iter__' in function_name or '__next__' in function_name) and 'for ' in line:
+    if function_name.startswith('tmp') and not hits.isdisjoint(py_tmp_map):
+        return True
+    if ('__iter__' in function_name or '__next__' in function_name) and 'for ' in hits:
         found = True
     return found
 
@@ -367,25 +385,39 @@ class LineValidator:
         base_path (str or Path): The base path for the code files.
         interval (int): The interval for expanding the search range.
         origin_type (str): The origin type of the code files.
-        slice_file (str): The path to the slice file.
+        slice_file (str): The path to the slice file, or None to only validate the entries given
+            to validate_file.
+        cache (SourceCache): A cache of source file line indexes, which can be shared by the
+            validators of several slices.
 
     Attributes:
         base_path (Path): The base path for the code files.
+        cache (SourceCache): The cache of source file line indexes, if any.
         interval (int): The interval for expanding the search range.
         matches (dict): A dictionary containing matched line numbers grouped by type.
+        origin_type (str): The origin type of the code files.
         problem_files (list): A dictionary containing problem files.
         slc (AtomSlice): An instance of AtomSlice representing the slice file.
         unverifiable (dict): A dictionary containing unverifiable line numbers grouped by type.
     """
-    def __init__(self, slice_file: Path, base_path: Path, interval: int, origin_type: str) -> None:
-        self.slc = AtomSlice(slice_file, origin_type)
+    def __init__(  # pylint: disable=too-many-arguments
+            self,
+            slice_file: Path | None,
+            base_path: Path,
+            interval: int,
+            origin_type: str,
+            cache: SourceCache | None = None,
+    ) -> None:
+        self.slc = AtomSlice(slice_file, origin_type) if slice_file else None
+        self.origin_type = origin_type
         self.base_path = base_path if isinstance(base_path, Path) else Path(base_path)
         self.matches: Dict[str, List[Dict]] = {
             'matched': [], 'unmatched': [], 'close': [], 'likely_ok': []}
         self.unverifiable: Dict[str, List[Dict]] = {
             'missing': [], 'file': [], 'range': [], 'no_data': []}
-        self.problem_files: List[str] = []
+        self.problem_files: List[Path] = []
         self.interval = interval
+        self.cache = cache
 
     def create_summary(self, stats: LineStats) -> str:
         """
@@ -429,30 +461,35 @@ class LineValidator:
         }
         export_json(results, json_report_path, 4)
 
+    @property
+    def atom_slice(self) -> AtomSlice:
+        """The slice being validated, which only validators given a slice file have."""
+        if self.slc is None:
+            raise ValueError('The validator was not given a slice file.')
+        return self.slc
+
+    @timed()
     def find_reachables(self) -> Dict[str, List[Dict[str, str]]]:
         """Collect reachables for analysis."""
-        reachables_pattern = jmespath.compile('reachables[].flows[].{function_name: fullName, '
-                                              'code: code, file_name: parentFileName, '
-                                              'line_number: lineNumber}')
-        res = reachables_pattern.search(self.slc.content)
+        res = search('reachables[].flows[].{function_name: fullName, code: code, '
+                     'file_name: parentFileName, line_number: lineNumber}',
+                     self.atom_slice.content)
         return consolidate_reachable_slices(res)
 
+    @timed()
     def find_usages(self) -> Dict[str, List[Dict[str, str]]]:
         """
         Collects usage slices for analysis
         Returns:
              Dict[str, List[Dict[str, str]]]: A list of usage slices
         """
-        usages_pattern = jmespath.compile('objectSlices[].{signature: signature, code: code, '
-                                          'file_name: fileName, line_number: lineNumber, '
-                                          'usages: usages[].*[][].{function_name: name || '
-                                          'callName, line_number: lineNumber, '
-                                          'code: resolvedMethod || code}}')
-        udts_pattern = jmespath.compile('userDefinedTypes[].{file_name: fileName, usages: *[].{'
-                                        'function_name: name || callName, code: typeFullName || '
-                                        'resolvedMethod, line_number: lineNumber}}')
-        res = usages_pattern.search(self.slc.content)
-        res.extend(udts_pattern.search(self.slc.content))
+        res = search('objectSlices[].{signature: signature, code: code, file_name: fileName, '
+                     'line_number: lineNumber, usages: usages[].*[][].{function_name: name || '
+                     'callName, line_number: lineNumber, code: resolvedMethod || code}}',
+                     self.atom_slice.content)
+        res.extend(search('userDefinedTypes[].{file_name: fileName, usages: *[].{function_name: '
+                          'name || callName, code: typeFullName || resolvedMethod, '
+                          'line_number: lineNumber}}', self.atom_slice.content))
         return consolidate_usage_slices(res)
 
     def get_results(self) -> str:
@@ -470,11 +507,19 @@ class LineValidator:
         )
         return self.create_summary(stats)
 
-    def validate_line_numbers(self) -> None:
-        """Validate line numbers in the slice file"""
-        if self.slc.slice_type == 'reachables':
+    @timed()
+    def validate_line_numbers(self, jobs: int = 1) -> None:
+        """
+        Validate line numbers in the slice file.
+
+        Args:
+            jobs (int): The number of worker processes to validate files with. With a single job,
+                files are validated in the current process.
+        """
+        slice_type = self.atom_slice.slice_type
+        if slice_type == 'reachables':
             data = self.find_reachables()
-        elif self.slc.slice_type == 'usages':
+        elif slice_type == 'usages':
             data = self.find_usages()
         else:
             print("Cannot analyze unidentified slice type.")
@@ -482,35 +527,68 @@ class LineValidator:
 
         output = self._remove_dupes(data)
 
-        for fn, val in output.items():
-            file_path = self.base_path / fn
+        if jobs <= 1 or len(output) <= 1:
+            for fn, val in output.items():
+                self.validate_file(fn, val)
+            return
+        cache_dir = self.cache.directory.parent if self.cache and self.cache.directory else None
+        args = (self.base_path, self.interval, self.origin_type)
+        files = list(output.items())
+        chunksize = max(1, len(files) // (jobs * 4))
+        with ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_worker, initargs=(cache_dir,)) as executor:
+            # Results are merged in the order of the files, as when validating in one process.
+            for result in executor.map(
+                    _validate_file, [args] * len(files), files, chunksize=chunksize):
+                self.merge(result)
+
+    def validate_file(self, fn: str, val: List[Dict]) -> None:
+        """
+        Validate the line numbers of the entries of one source file.
 
-            if regex.tests_regex.search(fn):
-                logger.debug(f'Skipping test file: {file_path}',)
-                continue
+        Args:
+            fn (str): The file name, relative to base_path.
+            val (list[dict]): The entries with the file name.
+        """
+        file_path = self.base_path / fn
 
-            if not file_path or not os.path.isfile(file_path):
-                self.problem_files.append(file_path)
-                self.unverifiable['file'].extend(val)
-                logger.warning(f'Could not locate {file_path}.')
-                continue
+        if regex.tests_regex.search(fn):
+            logger.debug(f'Skipping test file: {file_path}',)
+            return
 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    lines = file.readlines()
-            except UnicodeDecodeError:
-                try:
-                    with open(file_path, 'rb') as file:
-                        lines = file.readlines()  # type: ignore[assignment]
-                    if lines and isinstance(lines[0], bytes):
-                        lines = [i.decode for i in lines]
-                except Exception:  # pylint: disable=broad-exception-caught
-                    self.problem_files.append(file_path)
-                    self.unverifiable['file'].extend(val)
-                    continue
-            file_path = str(file_path)
+        if not file_path or not os.path.isfile(file_path):
+            self.problem_files.append(file_path)
+            self.unverifiable['file'].extend(val)
+            logger.warning(f'Could not locate {file_path}.')
+            return
+
+        try:
+            lines = self.cache.open(file_path) if self.cache else SourceLines(file_path)
+        except OSError as e:
+            logger.warning(f'Could not read {file_path}: {e}')
+            self.problem_files.append(file_path)
+            self.unverifiable['file'].extend(val)
+            return
+        with lines:
+            pending = []
             for v in val:
-                self._validate_line_number(v, lines, file_path)
+                if entry := self._validate_line_number(v, lines, str(file_path)):
+                    pending.append(entry)
+            if pending:
+                self._expand_search(pending, lines, str(file_path))
+
+    def merge(self, other: 'LineValidator') -> None:
+        """
+        Adds the matches, unverifiable entries and problem files of another validator.
+
+        Args:
+            other (LineValidator): The validator, e.g. one that validated some files in a worker.
+        """
+        for k, v in other.matches.items():
+            self.matches[k].extend(v)
+        for k, v in other.unverifiable.items():
+            self.unverifiable[k].extend(v)
+        self.problem_files.extend(other.problem_files)
 
     def write_report(self, report_file: str, summary: str, verbose: bool) -> None:
         """Write the validation report to a file."""
@@ -520,30 +598,83 @@ class LineValidator:
         with open(report_file, 'w', encoding='utf-8') as f:
             f.write(summary)
 
-    def _expand_search(
-            self, code: str, function_name: str, line_number: int, lines: List[str], file_name: str
-    ) -> bool:
+    def _expand_search(self, pending: List[Dict], lines: SourceLines, file_name: str) -> None:
         """
-        Expand the search range.
+        Searches within interval lines of the line numbers of entries that did not match exactly.
+
+        The entries of a file are grouped by code and function name and sorted by line number, so
+        that the lines checked for one entry are not checked again for the next entries with the
+        same code and function name. Each entry is matched at the first line of its window that
+        matches, as when it was searched on its own, and the results are added in the order of
+        the entries.
+
+        Args:
+            pending (list[dict]): The entries, as reported when they are unmatched.
+            lines (SourceLines): The lines of the file.
+            file_name (str): The file name.
         """
-        start = line_number - self.interval
-        # We don't want to exceed the file bounds
-        start = max(start, 0)
-        end = min(line_number + self.interval, len(lines))
-        for n in range(start, end):
-            if self._find_line(code.strip(), function_name.strip(), lines[n]):
-                self.matches['close'].append(
-                    {
-                        'function_name': function_name,
-                        'code': code,
-                        'line_number': line_number,
-                        'actual_number': n - 1,
-                        'file_name': file_name,
-                        'found_line': lines[n].strip()
-                    }
-                )
-                return True
-        return False
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, entry in enumerate(pending):
+            key = (entry['code'].strip(), entry['function_name'].strip())
+            groups.setdefault(key, []).append(i)
+        found: Dict[int, int] = {}
+        for (code, function_name), group in groups.items():
+            group.sort(key=lambda i: pending[i]['line_number'])
+            numbers = [pending[i]['line_number'] for i in group]
+            for i, actual in zip(group, self._search_group(code, function_name, numbers, lines)):
+                if actual is not None:
+                    found[i] = actual
+        for i, entry in enumerate(pending):
+            if (actual := found.get(i)) is None:
+                self.matches['unmatched'].append(entry)
+                continue
+            self.matches['close'].append(
+                {
+                    'function_name': entry['function_name'],
+                    'code': entry['code'],
+                    'line_number': entry['line_number'],
+                    'actual_number': actual + 1,
+                    'file_name': file_name,
+                    'found_line': lines.stripped_line(actual),
+                }
+            )
+
+    def _search_group(
+            self, code: str, function_name: str, line_numbers: List[int], lines: SourceLines
+    ) -> List[int | None]:
+        """
+        Finds the first line within interval lines of each line number that matches.
+
+        Args:
+            code (str): The code of the entries.
+            function_name (str): The function name of the entries.
+            line_numbers (list[int]): The sorted line numbers of the entries.
+            lines (SourceLines): The lines of the file.
+
+        Returns:
+            list[int | None]: The 0-based index of the matching line for each line number, or
+                None if no line in its window matches.
+        """
+        results: List[int | None] = []
+        hits: List[int] = []
+        scanned = 0
+        for line_number in line_numbers:
+            # Lines line_number - interval to line_number + interval, as 0-based indexes.
+            start = max(line_number - self.interval - 1, 0)
+            end = min(line_number + self.interval, len(lines))
+            if (h := bisect_left(hits, start)) < len(hits) and hits[h] < end:
+                results.append(hits[h])
+                continue
+            # The lines before scanned were checked for a previous line number.
+            actual = None
+            for n in range(max(start, scanned), end):
+                if self._find_line(code, function_name, lines[n]):
+                    hits.append(n)
+                    actual = n
+                    break
+            results.append(actual)
+            scanned = max(scanned, end if actual is None else actual + 1)
+        return results
 
     def _find_line(self, code: str, function_name: str, line: str) -> bool:
         """
@@ -563,7 +694,7 @@ class LineValidator:
             found = check_init(line)
         elif function_name.startswith('<operator>.') or code.startswith('<operator>.'):
             found = check_mapping_type(function_name, code, line, operator_map)
-        elif function_name.startswith('$obj') and 'new ' in line:
+        elif function_name.startswith('$obj') and 'new ' in line_tokens.hits(line):
             found = True
         elif code.startswith(line) or code.startswith(line.replace('return ', '')):
             found = True
@@ -607,7 +738,7 @@ class LineValidator:
         Second pass verification attempt.
         """
         found = False
-        match self.slc.origin_type:
+        match self.origin_type:
             case 'java':
                 found = java_validation_helper(function_name, line)
             case 'js' | 'javascript' | 'ts' | 'typescript':
@@ -623,9 +754,14 @@ class LineValidator:
             result[fn] = remove_duplicates_list(val)
         return result
 
-    def _validate_line_number(self, result: Dict, lines: List[str], file_name: str) -> None:
+    def _validate_line_number(
+            self, result: Dict, lines: SourceLines, file_name: str
+    ) -> Dict | None:
         """
         Run validation for a slice line number.
+
+        Returns:
+            dict: The unmatched entry if it should be searched for around its line number.
         """
         function_name = result.get('function_name') or ''
         function_name = function_name.lstrip().replace('this.', '')
@@ -635,29 +771,46 @@ class LineValidator:
 
         if (not function_name or function_name == '<empty>') and not code:
             self.unverifiable['no_data'].append(result)
-            return
+            return None
 
         if not line_number:
             self.unverifiable['missing'].append(result)
-            return
+            return None
 
         if len(lines) < line_number:
             self.unverifiable['range'].append(result)
-            return
+            return None
 
-        line = lines[line_number - 1].strip()
+        line = lines.stripped_line(line_number - 1)
         if self._find_line(code.strip(), function_name.strip(), line):
             self.matches['matched'].append(result)
-            return
-        if self.interval > 0 and self._expand_search(
-                code, function_name, line_number, lines, file_name):
-            return
-        self.matches['unmatched'].append(
-            {
-                'function_name': function_name,
-                'code': code,
-                'line_number': line_number,
-                'file_name': file_name,
-                'file_line': line
-            }
-        )
+            return None
+        unmatched = {
+            'function_name': function_name,
+            'code': code,
+            'line_number': line_number,
+            'file_name': file_name,
+            'file_line': line
+        }
+        if self.interval > 0:
+            return unmatched
+        self.matches['unmatched'].append(unmatched)
+        return None
+
+
+_worker_cache: SourceCache | None = None  # pylint: disable=invalid-name
+
+
+def _init_worker(cache_dir: Path | None) -> None:
+    # Each worker process opens the source cache once, for all the files it validates.
+    global _worker_cache  # pylint: disable=global-statement
+    _worker_cache = SourceCache(cache_dir) if cache_dir else None
+
+
+def _validate_file(args: Tuple[Path, int, str], file: Tuple[str, List[Dict]]) -> LineValidator:
+    # Runs in a worker process, returning a validator holding the results for one file.
+    validator = LineValidator(None, *args, cache=_worker_cache)
+    validator.validate_file(*file)
+    # The cache stays in the worker rather than being sent back with the results.
+    validator.cache = None
+    return validator
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the atom-tools library.
+
+Run with ``python -m benchmarks`` from the repository root.
+"""
@@ -0,0 +1,100 @@
+"""
+Command line entry point for the benchmarks.
+
+    python -m benchmarks run -o results.json --scales 1,10,100
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks generate -o /tmp/slices -l java --files 1000 --sources
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from benchmarks.generator import LANGUAGES, GeneratorConfig, write_slices
+from benchmarks.suite import BENCHMARKS, FIXTURES_DIR, compare_results, run_benchmarks
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Creates the parser for the run, compare and generate commands."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run = subparsers.add_parser('run', help='Run the benchmarks.')
+    run.add_argument('-o', '--output', help='JSON file to write the results to (default stdout).')
+    run.add_argument('-s', '--scales', default='1,10',
+                     help='Comma separated factors to scale the fixtures by (default 1,10).')
+    run.add_argument('-b', '--benchmarks', default=','.join(BENCHMARKS),
+                     help=f'Comma separated benchmarks to run (default {",".join(BENCHMARKS)}).')
+    run.add_argument('-f', '--fixtures', nargs='*',
+                     help='Usages slices to use (default test/data/*-usages.json).')
+    run.add_argument('-t', '--type', help='Origin type of the fixtures (default from the name).')
+    run.add_argument('-r', '--rounds', type=int, default=3, help='Rounds per benchmark.')
+    run.add_argument('-v', '--verbose', action='store_true', help='Log each benchmark.')
+    compare = subparsers.add_parser(
+        'compare', help='Compare the median times of two runs.')
+    compare.add_argument('baseline', help='Results of the earlier run.')
+    compare.add_argument('current', help='Results of the later run.')
+    generate = subparsers.add_parser(
+        'generate', help='Generate synthetic usages, reachables and semantics slices.')
+    generate.add_argument('-o', '--output-dir', required=True, help='Directory to write to.')
+    generate.add_argument('-l', '--language', choices=LANGUAGES, default='java')
+    defaults = GeneratorConfig()
+    for name, help_text in (
+            ('files', 'source files'),
+            ('methods', 'handler methods per file'),
+            ('calls', 'invoked calls per method'),
+            ('udts', 'user defined types per file'),
+            ('reachables', 'reachables per file'),
+            ('flows', 'flow elements per reachable'),
+            ('seed', 'random seed')):
+        default = getattr(defaults, name)
+        generate.add_argument(f'--{name}', type=int, default=default,
+                              help=f'Number of {help_text} (default {default}).'
+                              if name != 'seed' else f'The random seed (default {default}).')
+    generate.add_argument('--sources', action='store_true',
+                          help='Also write source files for validate-lines under OUTPUT_DIR/src.')
+    return parser
+
+
+def main() -> None:
+    """Parses the arguments and runs or compares the benchmarks."""
+    parser = create_parser()
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        config = GeneratorConfig(args.language, args.files, args.methods, args.calls, args.udts,
+                                 args.reachables, args.flows, args.seed)
+        for path in write_slices(config, Path(args.output_dir), args.sources):
+            print(f'{path} ({path.stat().st_size} bytes)')
+        return
+
+    if args.command == 'compare':
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        for c in compare_results(baseline, current):
+            ratio = f'{c["ratio"]:.2f}x' if c['ratio'] is not None else '-'
+            print(f'{c["benchmark"]:<16} {c["fixture"]:<36} x{c["scale"]:<4} '
+                  f'{c["baseline"]:>9.4f}s {c["current"]:>9.4f}s {ratio:>7}')
+        return
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR,
+                        format='%(message)s')
+    benchmarks = [b.strip() for b in args.benchmarks.split(',') if b.strip()]
+    if unknown := set(benchmarks) - set(BENCHMARKS):
+        parser.error(f'Unknown benchmarks: {", ".join(sorted(unknown))}')
+    fixtures = [Path(f) for f in args.fixtures] if args.fixtures else sorted(
+        FIXTURES_DIR.glob('*-usages.json'))
+    scales = [int(s) for s in args.scales.split(',')]
+    results = run_benchmarks(fixtures, scales, benchmarks, args.rounds, args.type)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,584 @@
+"""
+Generates synthetic usages, reachables and semantics slices for scale testing.
+
+The slices are shaped like those atom produces for Spring (Java), Flask (Python), Express
+(JavaScript) and Rails (Ruby) applications, so the converters, filters and line validator follow
+the same code paths as they would for a real application. Source files matching the slice line
+numbers can also be written for validate-lines.
+"""
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Generator, Iterable, List
+
+
+LANGUAGES = ('java', 'python', 'js', 'ruby')
+HTTP_VERBS = ('get', 'post', 'put', 'delete', 'patch')
+RESOURCES = ('users', 'orders', 'items', 'accounts', 'payments', 'reports', 'sessions', 'files')
+
+
+@dataclass
+class GeneratorConfig:
+    """
+    The size and shape of the generated slices.
+
+    Attributes:
+        language (str): One of java, python, js or ruby.
+        files (int): The number of source files.
+        methods (int): The number of handler methods (and object slices) per file.
+        calls (int): The number of invoked calls per method.
+        udts (int): The number of user defined types per file.
+        reachables (int): The number of reachables per file.
+        flows (int): The number of flow elements per reachable.
+        seed (int): Seed for the random choices, so that output is reproducible.
+    """
+    language: str = 'java'
+    files: int = 100
+    methods: int = 10
+    calls: int = 5
+    udts: int = 2
+    reachables: int = 5
+    flows: int = 8
+    seed: int = 0
+
+
+@dataclass
+class Call:
+    """A call made by a handler method."""
+    call_name: str
+    resolved_method: str
+    line_number: int
+    code: str
+
+
+@dataclass
+class Method:
+    """A handler method with the route it serves and the calls it makes."""
+    file_name: str
+    owner: str
+    full_name: str
+    name: str
+    verb: str
+    path: str
+    line_number: int
+    route: str
+    calls: List[Call] = field(default_factory=list)
+
+
+def generate_methods(config: GeneratorConfig) -> Generator[List[Method], None, None]:
+    """
+    Creates the handler methods of each file.
+
+    Args:
+        config (GeneratorConfig): The generator configuration.
+
+    Yields:
+        list[Method]: The methods of each file.
+    """
+    if config.language not in LANGUAGES:
+        raise ValueError(f'Unknown language: {config.language}')
+    rng = random.Random(config.seed)
+    create_method = _METHOD_FACTORIES[config.language]
+    for f in range(config.files):
+        resource = f'{RESOURCES[f % len(RESOURCES)]}{f}'
+        # Leave room for the class or module header and one line per call.
+        step = config.calls + 4
+        yield [
+            create_method(f, m, resource, rng.choice(HTTP_VERBS), 20 + m * step, config.calls)
+            for m in range(config.methods)
+        ]
+
+
+def _java_method(f: int, m: int, resource: str, verb: str, line: int, calls: int) -> Method:
+    package = f'com.example.svc{f // 50}'
+    cls = f'{resource.capitalize()}Controller'
+    name = f'{verb}Item{m}'
+    path = f'/item{m}/{{id}}'
+    method = Method(
+        file_name=f'src/main/java/{package.replace(".", "/")}/{cls}.java',
+        owner=f'{package}.{cls}',
+        full_name=f'{package}.{cls}.{name}:org.springframework.http.ResponseEntity(java.lang.String)',
+        name=name,
+        verb=verb,
+        path=path,
+        line_number=line,
+        route=f'@{verb.capitalize()}Mapping("{path}")',
+    )
+    for c in range(calls - 1):
+        method.calls.append(Call(
+            f'find{c}',
+            f'{package}.{resource.capitalize()}Service.find{c}:java.lang.Object(java.lang.String)',
+            line + 2 + c,
+            f'Object r{c} = service.find{c}(id);',
+        ))
+    method.calls.append(Call(
+        'ok',
+        'org.springframework.http.ResponseEntity.ok:org.springframework.http.ResponseEntity('
+        'java.lang.Object)',
+        line + 1 + max(calls, 1),
+        'return ResponseEntity.ok(id);',
+    ))
+    return method
+
+
+def _python_method(_f: int, m: int, resource: str, verb: str, line: int, calls: int) -> Method:
+    file_name = f'app/views/{resource}.py'
+    name = f'{verb}_item{m}'
+    path = f'/{resource}/item{m}/<int:item_id>'
+    method = Method(
+        file_name=file_name,
+        owner=f'{file_name}:<module>',
+        full_name=f'{file_name}:<module>.{name}',
+        name=name,
+        verb=verb,
+        path=path,
+        line_number=line,
+        route=f"app.route('{path}', methods = ['{verb.upper()}'])",
+    )
+    method.calls = [
+        Call(
+            f'get_item{c}',
+            f'app/services/{resource}.py:<module>.get_item{c}',
+            line + 2 + c,
+            f'r{c} = get_item{c}(item_id)',
+        )
+        for c in range(calls)
+    ]
+    return method
+
+
+def _js_method(_f: int, m: int, resource: str, verb: str, line: int, calls: int) -> Method:
+    file_name = f'src/routes/{resource}.js'
+    name = f'{verb}Item{m}'
+    path = f'/{resource}/item{m}/:id'
+    method = Method(
+        file_name=file_name,
+        owner=f'{file_name}::program',
+        full_name=f'{file_name}::program:{name}',
+        name=name,
+        verb=verb,
+        path=path,
+        line_number=line,
+        route=f'app.{verb}("{path}",handler.{name})',
+    )
+    method.calls = [
+        Call(
+            f'find{c}',
+            f'src/services/{resource}.js::program:find{c}',
+            line + 2 + c,
+            f'const r{c} = find{c}(req.params.id);',
+        )
+        for c in range(calls)
+    ]
+    return method
+
+
+def _ruby_method(_f: int, m: int, resource: str, verb: str, line: int, calls: int) -> Method:
+    file_name = f'app/controllers/{resource}_controller.rb'
+    cls = f'{resource.capitalize()}Controller'
+    name = f'{verb}_item{m}'
+    method = Method(
+        file_name=file_name,
+        owner=f'{file_name}:<main>.{cls}',
+        full_name=f'{file_name}:<main>.{cls}.{name}',
+        name=name,
+        verb=verb,
+        path=f'/{resource}/item{m}',
+        line_number=line,
+        route=f'{verb} "{resource}/item{m}" => "{resource}#{name}"',
+    )
+    method.calls = [
+        Call(
+            f'find{c}',
+            f'{file_name}:<main>.{cls}.find{c}',
+            line + 2 + c,
+            f'r{c} = find{c}(params[:id])',
+        )
+        for c in range(calls)
+    ]
+    return method
+
+
+_METHOD_FACTORIES: Dict[str, Callable[..., Method]] = {
+    'java': _java_method, 'python': _python_method, 'js': _js_method, 'ruby': _ruby_method}
+
+
+def _usage_obj(name: str, type_full_name: str, line_number: int, label: str, **kwargs) -> Dict:
+    return {
+        'name': name,
+        'typeFullName': type_full_name,
+        **kwargs,
+        'lineNumber': line_number,
+        'columnNumber': 5,
+        'label': label,
+    }
+
+
+def _call_obj(call: Call, param_types: List[str] | None = None, return_type: str = 'ANY') -> Dict:
+    return {
+        'callName': call.call_name,
+        'resolvedMethod': call.resolved_method,
+        'paramTypes': param_types or ['ANY'],
+        'returnType': return_type,
+        'isExternal': False,
+        'lineNumber': call.line_number,
+        'columnNumber': 9,
+    }
+
+
+def _object_slice(method: Method, full_name: str, signature: str, usages: List[Dict]) -> Dict:
+    return {
+        'code': '',
+        'fullName': full_name,
+        'signature': signature,
+        'fileName': method.file_name,
+        'lineNumber': method.line_number,
+        'columnNumber': 5,
+        'usages': usages,
+    }
+
+
+def _java_object_slices(methods: List[Method]) -> Generator[Dict, None, None]:
+    prefix = f'/api/{Path(methods[0].file_name).stem.lower()}'
+    yield {
+        'code': f'@RequestMapping("{prefix}")',
+        'fullName': methods[0].owner,
+        'signature': '',
+        'fileName': methods[0].file_name,
+        'lineNumber': 10,
+        'columnNumber': 1,
+        'usages': [],
+    }
+    for m in methods:
+        annotation_type = f'org.springframework.web.bind.annotation.{m.verb.capitalize()}Mapping'
+        annotation = _usage_obj(f'{m.verb.capitalize()}Mapping', annotation_type, m.line_number,
+                                'ANNOTATION', resolvedMethod=m.route, isExternal=False)
+        param = _usage_obj('id', 'java.lang.String', m.line_number + 1, 'PARAM')
+        yield _object_slice(m, m.full_name, m.full_name.split(':', 1)[1], [
+            {
+                'targetObj': annotation,
+                'definedBy': annotation,
+                'invokedCalls': [_call_obj(
+                    Call(annotation_type, m.route, m.line_number, m.route), [], '')],
+                'argToCalls': [],
+            },
+            {
+                'targetObj': param,
+                'definedBy': param,
+                'invokedCalls': [_call_obj(c, ['java.lang.String']) for c in m.calls],
+                'argToCalls': [],
+            },
+        ])
+
+
+def _python_object_slices(methods: List[Method]) -> Generator[Dict, None, None]:
+    module = methods[0].owner
+    app = _usage_obj('app', 'flask.py:<module>.Flask', 3, 'LOCAL')
+    yield _object_slice(methods[0], module, '', [{
+        'targetObj': app,
+        'definedBy': _usage_obj('flask.Flask', 'flask.py:<module>.Flask', 3, 'CALL',
+                                resolvedMethod='flask.py:<module>.Flask.__init__'),
+        'invokedCalls': [
+            _call_obj(
+                Call('app.route', m.route, m.line_number, m.route), ['app', repr(m.path)], '')
+            for m in methods
+        ],
+        'argToCalls': [],
+    }])
+    for m in methods:
+        param = _usage_obj('item_id', 'ANY', m.line_number + 1, 'PARAM')
+        yield _object_slice(m, m.full_name, '', [{
+            'targetObj': param,
+            'definedBy': param,
+            'invokedCalls': [_call_obj(c) for c in m.calls],
+            'argToCalls': [],
+        }])
+
+
+def _js_object_slices(methods: List[Method]) -> Generator[Dict, None, None]:
+    program = methods[0].owner
+    app = _usage_obj('app', 'ANY', 1, 'PARAM')
+    yield _object_slice(methods[0], program, '', [{
+        'targetObj': app,
+        'definedBy': app,
+        'invokedCalls': [
+            _call_obj(Call(m.verb, m.route, m.line_number, m.route), ['__ecma.String', 'ANY'])
+            for m in methods
+        ],
+        'argToCalls': [],
+    }])
+    for m in methods:
+        param = _usage_obj('req', 'ANY', m.line_number + 1, 'PARAM')
+        yield _object_slice(m, m.full_name, '', [{
+            'targetObj': param,
+            'definedBy': param,
+            'invokedCalls': [_call_obj(c) for c in m.calls],
+            'argToCalls': [],
+        }])
+
+
+def _ruby_object_slices(methods: List[Method]) -> Generator[Dict, None, None]:
+    routes = ' '.join(m.route for m in methods)
+    draw = _usage_obj(f'Rails.application.routes.draw do {routes} end', 'ANY', 2, 'UNKNOWN')
+    yield {
+        'code': '',
+        'fullName': 'config/routes.rb:<main>',
+        'signature': '',
+        'fileName': 'config/routes.rb',
+        'lineNumber': 2,
+        'columnNumber': 0,
+        'usages': [{'targetObj': draw, 'definedBy': draw, 'invokedCalls': [], 'argToCalls': []}],
+    }
+    for m in methods:
+        param = _usage_obj('params', 'ANY', m.line_number + 1, 'LOCAL')
+        yield _object_slice(m, m.full_name, '', [{
+            'targetObj': param,
+            'definedBy': param,
+            'invokedCalls': [_call_obj(c) for c in m.calls],
+            'argToCalls': [],
+        }])
+
+
+_OBJECT_SLICE_FACTORIES: Dict[str, Callable[[List[Method]], Iterable[Dict]]] = {
+    'java': _java_object_slices, 'python': _python_object_slices, 'js': _js_object_slices,
+    'ruby': _ruby_object_slices}
+
+
+def _udts(methods: List[Method], count: int, language: str) -> Generator[Dict, None, None]:
+    for u in range(count):
+        selected = methods[u::count]
+        if not selected:
+            return
+        procedures = [
+            {
+                'callName': m.name,
+                'resolvedMethod': m.route if language == 'python' else m.full_name,
+                'paramTypes': ['ANY'],
+                'returnType': 'ANY',
+                'isExternal': False,
+                'lineNumber': m.line_number,
+                'columnNumber': 5,
+            }
+            for m in selected
+        ]
+        if language == 'python':
+            procedures.insert(0, {
+                'callName': 'route',
+                'resolvedMethod': 'flask.py:<module>.Flask.route',
+                'paramTypes': ['ANY', 'ANY', 'ANY'],
+                'returnType': 'ANY',
+                'isExternal': True,
+                'lineNumber': None,
+                'columnNumber': None,
+            })
+        yield {
+            'name': f'{selected[0].owner}.Type{u}',
+            'fields': [
+                _usage_obj(repr(m.path) if language == 'python' else f'field{i}', 'ANY',
+                           m.line_number, 'LOCAL')
+                for i, m in enumerate(selected)
+            ],
+            'procedures': procedures,
+            'fileName': selected[0].file_name,
+            'lineNumber': selected[0].line_number,
+            'columnNumber': 1,
+        }
+
+
+def iter_object_slices(config: GeneratorConfig) -> Generator[Dict, None, None]:
+    """Yields the objectSlices entries of the usages slice."""
+    create = _OBJECT_SLICE_FACTORIES[config.language]
+    for methods in generate_methods(config):
+        if methods:
+            yield from create(methods)
+
+
+def iter_udts(config: GeneratorConfig) -> Generator[Dict, None, None]:
+    """Yields the userDefinedTypes entries of the usages slice."""
+    for methods in generate_methods(config):
+        if methods and config.udts:
+            yield from _udts(methods, config.udts, config.language)
+
+
+def iter_reachables(config: GeneratorConfig) -> Generator[Dict, None, None]:
+    """Yields the reachables entries of the reachables slice."""
+    rng = random.Random(config.seed)
+    for f, methods in enumerate(generate_methods(config)):
+        if not methods:
+            continue
+        for r in range(config.reachables):
+            method = methods[r % len(methods)]
+            flows = [_flow(method.full_name, method.name, method.file_name, method.line_number,
+                           'METHOD_PARAMETER_IN', method.name)]
+            for i in range(config.flows - 1):
+                call = method.calls[i % len(method.calls)] if method.calls else None
+                if call:
+                    flows.append(_flow(call.resolved_method, call.call_name, method.file_name,
+                                       call.line_number, 'CALL', call.code))
+            yield {
+                'flows': flows,
+                'purls': [_purl(config.language, f'lib{(f + r) % 25}', f'{rng.randint(0, 9)}.'
+                                f'{rng.randint(0, 20)}.{rng.randint(0, 5)}')],
+            }
+
+
+def _flow(  # pylint: disable=too-many-arguments
+        full_name: str, name: str, file_name: str, line_number: int, label: str, code: str
+) -> Dict:
+    return {
+        'label': label,
+        'name': name,
+        'fullName': full_name,
+        'signature': '',
+        'isExternal': False,
+        'code': code,
+        'typeFullName': 'ANY',
+        'parentMethodName': name,
+        'parentMethodSignature': '',
+        'parentFileName': file_name,
+        'parentPackageName': '',
+        'parentClassName': '',
+        'lineNumber': line_number,
+        'columnNumber': 5,
+        'tags': '',
+    }
+
+
+def _purl(language: str, name: str, version: str) -> str:
+    match language:
+        case 'java':
+            return f'pkg:maven/org.example/{name}@{version}?type=jar'
+        case 'python':
+            return f'pkg:pypi/{name}@{version}'
+        case 'js':
+            return f'pkg:npm/{name}@{version}'
+    return f'pkg:gem/{name}@{version}'
+
+
+def semantics_slice(config: GeneratorConfig) -> Dict:
+    """Creates a semantics slice with a route for each handler method."""
+    routes = []
+    for methods in generate_methods(config):
+        routes.extend(
+            {
+                'method': m.verb.upper(),
+                'pattern': m.path.replace('{id}', ':id').replace('<int:item_id>', ':item_id'),
+                'controllerMethod': m.full_name,
+            }
+            for m in methods
+        )
+    return {'config': {'routes': routes}}
+
+
+def source_lines(methods: List[Method], language: str) -> List[str]:
+    """
+    Creates the lines of the source file that the methods of a file were generated from.
+
+    Args:
+        methods (list[Method]): The methods of the file.
+        language (str): The language of the file.
+
+    Returns:
+        list[str]: The lines of the file, without line endings.
+    """
+    lines: Dict[int, str] = {}
+    match language:
+        case 'java':
+            lines[10] = f'@RequestMapping("/api/{Path(methods[0].file_name).stem.lower()}")'
+            lines[11] = f'public class {Path(methods[0].file_name).stem} {{'
+        case 'python':
+            lines[3] = 'app = flask.Flask(__name__)'
+        case 'js':
+            lines[1] = 'module.exports = (app) => {'
+        case 'ruby':
+            lines[1] = f'class {Path(methods[0].file_name).stem.title().replace("_", "")}'
+    for m in methods:
+        match language:
+            case 'java':
+                lines[m.line_number] = f'    {m.route}'
+                lines[m.line_number + 1] = (
+                    f'    public ResponseEntity<String> {m.name}(@PathVariable String id) {{')
+            case 'python':
+                lines[m.line_number] = f'@{m.route}'
+                lines[m.line_number + 1] = f'def {m.name}(item_id):'
+            case 'js':
+                lines[m.line_number] = f'  {m.route};'
+                lines[m.line_number + 1] = f'  function {m.name}(req, res) {{'
+            case 'ruby':
+                lines[m.line_number] = f'  # {m.route}'
+                lines[m.line_number + 1] = f'  def {m.name}'
+        for c in m.calls:
+            lines[c.line_number] = f'        {c.code}'
+        if language != 'python':
+            lines[max(lines) + 1] = '  end' if language == 'ruby' else '    }'
+    return [lines.get(n, '') for n in range(1, max(lines) + 1)]
+
+
+def write_json(path: Path, content: Dict[str, Iterable]) -> Path:
+    """
+    Writes a slice, encoding one entry of each array at a time.
+
+    Args:
+        path (Path): The file to write.
+        content (dict): The top-level keys of the slice mapped to iterables of entries.
+
+    Returns:
+        Path: The file written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i, (key, entries) in enumerate(content.items()):
+            if i:
+                f.write(', ')
+            f.write(f'{json.dumps(key)}: ')
+            if isinstance(entries, dict):
+                json.dump(entries, f)
+                continue
+            f.write('[')
+            for n, entry in enumerate(entries):
+                if n:
+                    f.write(', ')
+                json.dump(entry, f)
+            f.write(']')
+        f.write('}')
+    return path
+
+
+def write_slices(config: GeneratorConfig, output_dir: Path, sources: bool = False) -> List[Path]:
+    """
+    Writes usages, reachables and semantics slices (and optionally sources) to a directory.
+
+    Args:
+        config (GeneratorConfig): The generator configuration.
+        output_dir (Path): The directory to write to.
+        sources (bool): Also write the source files under output_dir/src.
+
+    Returns:
+        list[Path]: The files written, excluding sources.
+    """
+    written = [
+        write_json(output_dir / 'usages.slices.json', {
+            'objectSlices': iter_object_slices(config), 'userDefinedTypes': iter_udts(config)}),
+        write_json(output_dir / 'reachables.slices.json', {'reachables': iter_reachables(config)}),
+        write_json(output_dir / 'semantics.slices.json', semantics_slice(config)),
+    ]
+    if sources:
+        routes = []
+        for methods in generate_methods(config):
+            if not methods:
+                continue
+            _write_lines(output_dir / 'src' / methods[0].file_name,
+                         source_lines(methods, config.language))
+            routes.extend(f'  {m.route}' for m in methods)
+        if config.language == 'ruby':
+            _write_lines(output_dir / 'src' / 'config' / 'routes.rb',
+                         ['', 'Rails.application.routes.draw do', *routes, 'end'])
+    return written
+
+
+def _write_lines(path: Path, lines: List[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(f'{line}\n' for line in lines)
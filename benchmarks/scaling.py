@@ -0,0 +1,118 @@
+"""
+Functions for creating the inputs used by the benchmarks from the test fixtures.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from atom_tools.lib.slices import FILE_NAME_KEYS, STREAMED_KEYS
+
+
+def scale_slice(content: Dict, factor: int) -> Dict:
+    """
+    Creates a slice with factor copies of each entry.
+
+    Every copy after the first has its file names prefixed with ``scaledN/`` so that the copies
+    are treated as distinct files rather than duplicates.
+
+    Args:
+        content (dict): The slice content.
+        factor (int): The number of copies.
+
+    Returns:
+        dict: The scaled slice.
+    """
+    scaled = {k: v for k, v in content.items() if k not in STREAMED_KEYS}
+    for key in STREAMED_KEYS:
+        if key not in content:
+            continue
+        entries = list(content[key])
+        for n in range(1, factor):
+            entries.extend(_prefix_file_names(e, f'scaled{n}/') for e in content[key])
+        scaled[key] = entries
+    return scaled
+
+
+def _prefix_file_names(value: Any, prefix: str) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: f'{prefix}{v}' if k in FILE_NAME_KEYS and isinstance(v, str) and v
+            else _prefix_file_names(v, prefix)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_prefix_file_names(v, prefix) for v in value]
+    return value
+
+
+def create_reachables(content: Dict) -> Dict:
+    """
+    Creates a reachables slice from a usages slice.
+
+    Each object slice becomes a reachable with a flow for the method and each of its invoked
+    calls, tagged with a purl derived from the file name.
+
+    Args:
+        content (dict): The usages slice content.
+
+    Returns:
+        dict: The reachables slice.
+    """
+    reachables = []
+    for i, obj in enumerate(content.get('objectSlices', [])):
+        file_name = obj.get('fileName') or ''
+        flows = [{
+            'fullName': obj.get('fullName', ''),
+            'code': obj.get('code', ''),
+            'parentFileName': file_name,
+            'lineNumber': obj.get('lineNumber'),
+        }]
+        for usage in obj.get('usages', []):
+            flows.extend(
+                {
+                    'fullName': call.get('resolvedMethod', ''),
+                    'code': call.get('callName', ''),
+                    'parentFileName': file_name,
+                    'lineNumber': call.get('lineNumber'),
+                }
+                for call in usage.get('invokedCalls', [])
+            )
+        package = Path(file_name).parent.name or 'root'
+        reachables.append({
+            'flows': flows,
+            'purls': [f'pkg:maven/org.example/{package}@1.{i % 10}.0?type=jar'],
+        })
+    return {'reachables': reachables}
+
+
+def write_sources(usages: Dict[str, List[Dict]], base_path: Path) -> None:
+    """
+    Writes source files containing the code of each usage at (or next to) its line number.
+
+    Args:
+        usages (dict): The usages consolidated by file name, as returned by
+            LineValidator.find_usages.
+        base_path (Path): The directory to write the files to.
+    """
+    for file_name, entries in usages.items():
+        lines: Dict[int, List[str]] = {}
+        for i, e in enumerate(entries):
+            if not (line_number := e.get('line_number')) or not isinstance(line_number, int):
+                continue
+            text = e.get('function_name') or e.get('code') or ''
+            # Offset some entries so that the search range is expanded.
+            lines.setdefault(line_number + (i % 3 == 0), []).append(str(text))
+        if not lines or Path(file_name).is_absolute() or '..' in Path(file_name).parts:
+            continue
+        path = base_path / file_name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{" ".join(lines.get(n, []))}\n' for n in range(1, max(lines) + 1))
+
+
+def write_slice(content: Dict, path: Path) -> Path:
+    """Writes a slice to the given path and returns the path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(content, f)
+    return path
@@ -0,0 +1,274 @@
+"""
+Benchmark definitions and the timing harness.
+"""
+import gc
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, Tuple
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.filtering import Filter, parse_filters
+from atom_tools.lib.slices import AtomSlice
+from atom_tools.lib.utils import check_reachable
+from atom_tools.lib.validator import LineValidator
+
+from benchmarks.scaling import create_reachables, scale_slice, write_slice, write_sources
+
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / 'test' / 'data'
+ORIGIN_TYPES = {
+    'java': 'java', 'js': 'js', 'ts': 'ts', 'py': 'py', 'rb': 'rb', 'ruby': 'rb'}
+BENCHMARKS = (
+    'load', 'convert', 'filter-regex', 'filter-fuzzy', 'validate-lines', 'check-reachable')
+REGEX_CRITERIA = 'callName=get,fileName=controller'
+FUZZY_CRITERIA = 'callName=getUser'
+FUZZ_PCT = '70'
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    The timings of one benchmark against one input.
+
+    Attributes:
+        benchmark (str): The benchmark name.
+        fixture (str): The name of the fixture the input was created from.
+        scale (int): The number of copies of the fixture entries in the input.
+        size (int): The size of the input slice in bytes.
+        wall (list[float]): The wall time of each round in seconds.
+        cpu (list[float]): The CPU time of each round in seconds.
+        error (str): The exception raised by the benchmark, if any.
+    """
+    benchmark: str
+    fixture: str
+    scale: int
+    size: int
+    wall: List[float] = field(default_factory=list)
+    cpu: List[float] = field(default_factory=list)
+    error: str = ''
+
+    def summary(self) -> Dict:
+        """Returns the result with min/median/mean/max wall times."""
+        result = asdict(self)
+        if not self.wall:
+            return result
+        result |= {
+            'min': min(self.wall),
+            'median': statistics.median(self.wall),
+            'mean': statistics.fmean(self.wall),
+            'max': max(self.wall),
+        }
+        return result
+
+
+def time_rounds(setup: Callable, run: Callable, rounds: int) -> Tuple[List[float], List[float]]:
+    """
+    Times a function, calling setup before each round so that no state is shared.
+
+    Args:
+        setup (Callable): Returns the argument passed to run. Not timed.
+        run (Callable): The function to time.
+        rounds (int): The number of rounds.
+
+    Returns:
+        tuple[list[float], list[float]]: The wall and CPU times of each round.
+    """
+    wall = []
+    cpu = []
+    for _ in range(rounds):
+        arg = setup()
+        gc.collect()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        run(arg)
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+    return wall, cpu
+
+
+def _origin_type(fixture: Path) -> str:
+    return ORIGIN_TYPES.get(fixture.name.split('-', 1)[0], 'java')
+
+
+def _create_filter(slice_file: Path, criteria: str, fuzz_pct: str | None) -> Filter:
+    slice_filter = Filter(str(slice_file), '', fuzz_pct)
+    slice_filter.add_filters(parse_filters(criteria))
+    return slice_filter
+
+
+def _first_purl(reachables: Dict) -> str:
+    for r in reachables.get('reachables', []):
+        if r.get('purls'):
+            return r['purls'][0].split('/')[-1].split('?')[0].replace('@', ':')
+    return ''
+
+
+def _first_location(reachables: Dict) -> str:
+    for r in reachables.get('reachables', []):
+        for f in r.get('flows', []):
+            if f.get('parentFileName') and f.get('lineNumber'):
+                return f'{Path(f["parentFileName"]).name}:{f["lineNumber"]}'
+    return ''
+
+
+def run_fixture(  # pylint: disable=too-many-arguments,too-many-locals
+        fixture: Path,
+        scale: int,
+        benchmarks: List[str],
+        rounds: int,
+        work_dir: Path,
+        origin_type: str | None = None,
+) -> Generator[BenchmarkResult, None, None]:
+    """
+    Runs the benchmarks against a fixture scaled by the given factor.
+
+    Args:
+        fixture (Path): The usages slice fixture.
+        scale (int): The number of copies of the fixture entries.
+        benchmarks (list[str]): The names of the benchmarks to run.
+        rounds (int): The number of rounds to time.
+        work_dir (Path): A directory for the scaled slices and generated sources.
+        origin_type (str): The origin type of the fixture. Defaults to the prefix of its name.
+
+    Yields:
+        BenchmarkResult: The result of each benchmark.
+    """
+    origin_type = origin_type or _origin_type(fixture)
+    with open(fixture, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    if scale > 1:
+        content = scale_slice(content, scale)
+    usages_file = write_slice(content, work_dir / f'{fixture.stem}-{scale}x.json')
+    size = usages_file.stat().st_size
+
+    # Filtering is timed from loading the slice as building the attribute index dominates.
+    cases: Dict[str, Tuple[Callable, Callable]] = {
+        'load': (lambda: usages_file, lambda f: AtomSlice(f, origin_type)),
+        'convert': (
+            lambda: OpenAPI('openapi3.1.0', origin_type, str(usages_file)),
+            lambda o: o.convert_usages(),
+        ),
+        'filter-regex': (
+            lambda: REGEX_CRITERIA,
+            lambda c: _create_filter(usages_file, c, None).filter_slice(),
+        ),
+        'filter-fuzzy': (
+            lambda: FUZZY_CRITERIA,
+            lambda c: _create_filter(usages_file, c, FUZZ_PCT).filter_slice(),
+        ),
+    }
+    if 'validate-lines' in benchmarks:
+        src_dir = work_dir / f'{fixture.stem}-{scale}x-src'
+        write_sources(LineValidator(usages_file, src_dir, 1, origin_type).find_usages(), src_dir)
+        cases['validate-lines'] = (
+            lambda: LineValidator(usages_file, src_dir, 1, origin_type),
+            lambda v: v.validate_line_numbers(),
+        )
+    if 'check-reachable' in benchmarks:
+        reachables = create_reachables(content)
+        reachables_file = write_slice(reachables, work_dir / f'{fixture.stem}-{scale}x-reach.json')
+        purl, location = _first_purl(reachables), _first_location(reachables)
+        cases['check-reachable'] = (
+            lambda: AtomSlice(reachables_file, origin_type).content,
+            lambda d: (
+                check_reachable(d, purl, ''), location and check_reachable(d, '', location)),
+        )
+    del content
+    for name in benchmarks:
+        if name not in cases:
+            continue
+        logger.info(f'{name}: {fixture.name} x{scale}')
+        try:
+            wall, cpu = time_rounds(*cases[name], rounds)
+        except (Exception, SystemExit) as e:  # pylint: disable=broad-exception-caught
+            logger.warning(f'{name} failed on {fixture.name} x{scale}: {type(e).__name__}')
+            yield BenchmarkResult(name, fixture.name, scale, size, error=type(e).__name__)
+            continue
+        yield BenchmarkResult(name, fixture.name, scale, size, wall, cpu)
+
+
+def git_revision() -> str:
+    """Returns the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, check=True, text=True,
+            cwd=FIXTURES_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmarks(
+        fixtures: List[Path],
+        scales: List[int],
+        benchmarks: List[str],
+        rounds: int,
+        origin_type: str | None = None,
+) -> Dict:
+    """
+    Runs the benchmarks against each fixture at each scale.
+
+    Args:
+        fixtures (list[Path]): The usages slice fixtures.
+        scales (list[int]): The scale factors.
+        benchmarks (list[str]): The names of the benchmarks to run.
+        rounds (int): The number of rounds to time.
+        origin_type (str): The origin type of the fixtures. Defaults to the prefix of each name.
+
+    Returns:
+        dict: The results and details of the environment they were recorded in.
+    """
+    results = []
+    for scale in scales:
+        for fixture in fixtures:
+            with tempfile.TemporaryDirectory() as work_dir:
+                results.extend(
+                    r.summary() for r in run_fixture(
+                        fixture, scale, benchmarks, rounds, Path(work_dir), origin_type))
+    return {
+        'commit': git_revision(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rounds': rounds,
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[Dict]:
+    """
+    Compares the median wall times of two benchmark runs.
+
+    Args:
+        baseline (dict): The results of the earlier run.
+        current (dict): The results of the later run.
+
+    Returns:
+        list[dict]: The benchmarks found in both runs with the ratio of current to baseline.
+    """
+    base = {
+        (r['benchmark'], r['fixture'], r['scale']): r
+        for r in baseline['results'] if not r.get('error')
+    }
+    comparison = []
+    for r in current['results']:
+        if r.get('error') or not (b := base.get((r['benchmark'], r['fixture'], r['scale']))):
+            continue
+        comparison.append({
+            'benchmark': r['benchmark'],
+            'fixture': r['fixture'],
+            'scale': r['scale'],
+            'baseline': b['median'],
+            'current': r['median'],
+            'ratio': r['median'] / b['median'] if b['median'] else None,
+        })
+    return comparison
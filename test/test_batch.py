@@ -0,0 +1,85 @@
+import json
+
+from atom_tools.lib.batch import (
+    common_dir,
+    convert_slices,
+    find_slices,
+    merge_openapi_documents,
+    output_path,
+)
+from atom_tools.lib.converter import OpenAPI
+
+
+def test_convert_slices(tmp_path):
+    slices = [
+        ('test/data/java-piggymetrics-usages.json', None),
+        ('test/data/java-sec-code-usages.json', None),
+    ]
+    expected = {
+        s: OpenAPI('openapi3.1.0', 'java', s).endpoints_to_openapi('https://example.com')
+        for s, _ in slices
+    }
+    for workers in (1, 2):
+        results = list(convert_slices('openapi3.1.0', 'java', slices, 'https://example.com', workers))
+        assert len(results) == 2
+        for r in results:
+            assert not r.error
+            assert json.dumps(r.document, sort_keys=True) == json.dumps(expected[r.usages], sort_keys=True)
+
+    invalid = tmp_path / 'invalid-usages.json'
+    invalid.write_text('{')
+    results = list(convert_slices('openapi3.1.0', 'java', [(str(invalid), None)]))
+    assert results[0].document == {}
+    assert results[0].error
+
+    # A slice that loads but cannot be converted is reported without stopping the batch.
+    malformed = tmp_path / 'malformed-usages.json'
+    malformed.write_text('{"objectSlices": 5}')
+    slices.append((str(malformed), None))
+    for workers in (1, 2):
+        results = {r.usages: r for r in convert_slices('openapi3.1.0', 'java', slices, '', workers)}
+        assert len(results) == 3
+        assert results[str(malformed)].document == {}
+        assert 'TypeError' in results[str(malformed)].error
+        assert all(results[s].document for s, _ in slices[:2])
+
+
+def test_find_slices(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    (tmp_path / 'a' / 'usages.slices.json').write_text('{}')
+    (tmp_path / 'a' / 'semantics.slices.json').write_text('{}')
+    (tmp_path / 'b' / 'app-usages.json').write_text('{}')
+    slices = find_slices([str(tmp_path), str(tmp_path / 'b' / 'app-usages.json')])
+    assert slices == [
+        (str(tmp_path / 'a' / 'usages.slices.json'), str(tmp_path / 'a' / 'semantics.slices.json')),
+        (str(tmp_path / 'b' / 'app-usages.json'), None),
+    ]
+    assert find_slices([str(tmp_path / '*' / 'usages.slices.json')]) == slices[:1]
+
+    base = common_dir(slices)
+    assert output_path(slices[0][0], 'openapi.json', None, base) == tmp_path / 'a' / 'openapi.json'
+    assert output_path(slices[1][0], 'openapi.json', str(tmp_path / 'out'), base) == (
+        tmp_path / 'out' / 'b' / 'app-usages-openapi.json')
+
+
+def test_merge_openapi_documents():
+    documents = [
+        {'paths': {'/a': {'get': {}}, '/b': {'get': {}}}},
+        {'paths': {'/b': {'post': {}}, '/c': {'get': {}}}},
+    ]
+    merged = merge_openapi_documents(documents, 'openapi3.0.1', 'https://example.com')
+    assert merged['openapi'] == '3.0.1'
+    assert merged['servers'] == [{'url': 'https://example.com'}]
+    assert merged['paths'] == {'/a': {'get': {}}, '/b': {'get': {}, 'post': {}}, '/c': {'get': {}}}
+
+
+def test_output_path_symlink(tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / 'real' / name).mkdir(parents=True)
+        (tmp_path / 'real' / name / 'usages.slices.json').write_text('{}')
+    (tmp_path / 'link').symlink_to(tmp_path / 'real')
+    slices = find_slices([str(tmp_path / 'link')])
+    for base in (common_dir(slices), str(tmp_path / 'link')):
+        assert output_path(slices[0][0], 'openapi.json', str(tmp_path / 'out'), base) == (
+            tmp_path / 'out' / 'a' / 'openapi.json')
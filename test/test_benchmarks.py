@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.filtering import Filter, parse_filters
+from atom_tools.lib.slices import AtomSlice
+from atom_tools.lib.utils import check_reachable
+from atom_tools.lib.validator import LineValidator
+from benchmarks.generator import GeneratorConfig, iter_reachables, semantics_slice, write_slices
+from benchmarks.scaling import create_reachables, scale_slice
+from benchmarks.suite import BENCHMARKS, compare_results, run_benchmarks
+
+
+def test_scale_slice():
+    with open('test/data/java-response-codes-usages.json', 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    scaled = scale_slice(content, 3)
+    assert len(scaled['objectSlices']) == 3 * len(content['objectSlices'])
+    assert len(scaled['userDefinedTypes']) == 3 * len(content['userDefinedTypes'])
+    assert scaled['objectSlices'][0] == content['objectSlices'][0]
+    file_names = {o['fileName'] for o in scaled['objectSlices']}
+    assert {f'scaled2/{o["fileName"]}' for o in content['objectSlices']} <= file_names
+    reachables = create_reachables(scaled)['reachables']
+    assert len(reachables) == len(scaled['objectSlices'])
+    assert reachables[0]['flows'][0]['parentFileName'] == content['objectSlices'][0]['fileName']
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(
+        [Path('test/data/java-response-codes-usages.json')], [1, 2], list(BENCHMARKS), 1)
+    assert len(results['results']) == 2 * len(BENCHMARKS)
+    for r in results['results']:
+        assert not r['error']
+        assert r['min'] <= r['median'] <= r['max']
+    json.dumps(results)
+    comparison = compare_results(results, results)
+    assert len(comparison) == len(results['results'])
+    assert all(c['ratio'] == 1 for c in comparison if c['ratio'] is not None)
+
+
+@pytest.mark.parametrize('language,origin_type,criteria', [
+    ('java', 'java', 'callName=find1'),
+    ('python', 'py', 'callName=get_item1'),
+    ('js', 'js', 'callName=find1'),
+    ('ruby', 'rb', 'callName=find1'),
+])
+def test_generator(tmp_path, language, origin_type, criteria):
+    config = GeneratorConfig(language, files=3, methods=4, calls=3, udts=2, reachables=2, flows=4)
+    usages, reachables, semantics = write_slices(config, tmp_path, sources=True)
+
+    assert len(OpenAPI('openapi3.1.0', origin_type, str(usages)).convert_usages()) >= 12
+    assert len(semantics_slice(config)['config']['routes']) == 12
+    assert AtomSlice(semantics, origin_type).slice_type == 'semantics'
+
+    slice_filter = Filter(str(usages), '', None)
+    slice_filter.add_filters(parse_filters(criteria))
+    assert len(slice_filter.filter_slice()['objectSlices']) == 12
+
+    validator = LineValidator(usages, tmp_path / 'src', 1, origin_type)
+    validator.validate_line_numbers()
+    assert not validator.unverifiable['file']
+    assert len(validator.matches['matched']) > len(validator.matches['unmatched'])
+
+    content = AtomSlice(reachables, origin_type).content
+    assert len(content['reachables']) == 6
+    assert all(len(r['flows']) == 4 for r in content['reachables'])
+    file_name = content['reachables'][0]['flows'][0]['parentFileName']
+    assert check_reachable(content, '', f'{Path(file_name).name}:20')
+    assert content['reachables'][0]['purls'] == next(iter_reachables(config))['purls']
@@ -0,0 +1,49 @@
+import os
+import shutil
+
+from atom_tools.lib.cache import ConversionCache, cache_key
+from atom_tools.lib.converter import OpenAPI
+
+
+def test_conversion_cache(tmp_path):
+    cache = ConversionCache(tmp_path / 'cache')
+    usages = 'test/data/java-piggymetrics-usages.json'
+    expected = OpenAPI('openapi3.1.0', 'java', usages).convert_usages()
+    assert OpenAPI('openapi3.1.0', 'java', usages, cache=cache).convert_usages() == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+    converter = OpenAPI('openapi3.0.1', 'java', usages, cache=cache)
+    assert converter.convert_usages() == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert 'usages' not in converter.__dict__
+
+    copy = tmp_path / 'usages.json'
+    shutil.copy(usages, copy)
+    OpenAPI('openapi3.1.0', 'java', str(copy), cache=cache).convert_usages()
+    assert cache.hits == 2
+    OpenAPI('openapi3.1.0', 'js', str(copy), cache=cache).convert_usages()
+    assert cache.misses == 2
+
+
+def test_cache_key(tmp_path):
+    a = tmp_path / 'a.json'
+    b = tmp_path / 'b.json'
+    a.write_text('{"objectSlices": []}')
+    b.write_text('{"objectSlices": []}')
+    assert cache_key('paths', 'java', a) == cache_key('paths', 'java', b)
+    assert cache_key('paths', 'java', a) != cache_key('paths', 'java', a, b)
+    assert cache_key('paths', 'java', a, None) != cache_key('paths', 'java', a)
+    assert cache_key('paths', 'java', a) != cache_key('paths', 'py', a)
+    b.write_text('{"objectSlices": [{}]}')
+    assert cache_key('paths', 'java', a) != cache_key('paths', 'java', b)
+
+
+def test_cache_eviction(tmp_path):
+    cache = ConversionCache(tmp_path, max_size=350)
+    for i in range(3):
+        cache.put(f'key{i}', {'value': 'x' * 90})
+        os.utime(tmp_path / f'key{i}.json', (i, i))
+    assert cache.get('key0') is not None
+    cache.put('key3', {'value': 'x' * 90})
+    assert sorted(p.stem for p in tmp_path.glob('*.json')) == ['key0', 'key2', 'key3']
+    assert cache.get('key1') is None
+    assert list(tmp_path.glob('*.tmp')) == []
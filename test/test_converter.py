@@ -1377,6 +1377,9 @@ def test_ts_custom_router(ts_usages_1):
     assert 'post' in result['/']
     assert '/complex' in result
     assert 'get' in result['/complex']
+    # Each registerRoute call keeps its line number, whichever file registered the path first.
+    assert result['/']['x-atom-usages']['call'] == {
+        'routes/items.ts': [7, 8], 'routes/users.ts': [6, 7]}
 
 
 def test_ts_custom_router_openapi(ts_usages_1):
@@ -1392,3 +1395,16 @@ def test_ts_custom_router_openapi(ts_usages_1):
     assert '/items' in paths
     assert '/users' in paths
     assert '/render' in paths
+
+
+
+
+def test_identify_target_line_nums(java_usages_1):
+    methods = java_usages_1.methods_to_endpoints(java_usages_1._process_methods())
+    targets = java_usages_1._identify_target_line_nums(methods)
+    assert len(targets) == 8
+    assert targets['account-service/src/main/java/com/piggymetrics/account/controller/AccountController.java'] == {
+        '@RequestMapping(path = "/current", method = RequestMethod.PUT)': [30],
+        'principal': [31],
+        'account': [31]
+    }
@@ -1,8 +1,11 @@
 import pytest
 
-from atom_tools.lib.filtering import check_reachable_purl, Filter, filter_flows, parse_filters
+from atom_tools.lib.filtering import (
+    check_reachable_purl, Filter, filter_flows, parse_filters, ReachableIndex)
+from atom_tools.lib.line_index import FlowIndex
 from atom_tools.lib.slices import AtomSlice
-from atom_tools.lib.utils import check_reachable, sort_dict
+from atom_tools.lib.utils import (
+    check_reachable, check_reachable_batch, read_reachable_queries, sort_dict)
 
 
 @pytest.fixture
@@ -117,3 +120,85 @@ def test_check_reachable():
     assert check_reachable(atom_slice.content, '', 'updateUserProfile.ts:400') == False
     assert check_reachable(atom_slice.content, '', 'routes/updateUserProfile.ts:400-600') == False
     assert check_reachable(atom_slice.content, '', 'updateUserProfile.ts:400-600') == False
+
+
+def test_filter_flows():
+    reachables = [{'flows': [{'parentFileName': 'routes/updateUserProfile.ts', 'lineNumber': 29},
+                             {'parentFileName': 'lib/insecurity.ts'}]}]
+    assert filter_flows(reachables, 'updateUserProfile.ts', (29, 29)) == True
+    assert filter_flows(reachables, 'updateUserProfile.ts', (25, 30)) == True
+    assert filter_flows(reachables, 'updateUserProfile.ts', (30, 40)) == False
+    assert filter_flows(reachables, 'insecurity.ts', (400, 600)) == True
+    assert filter_flows(reachables, 'server.ts', (25, 30)) == False
+    assert filter_flows([], 'updateUserProfile.ts', (29, 29)) == False
+    assert filter_flows(reachables, 'updateUserProfile.ts', ()) == True
+    index = FlowIndex(reachables)
+    for name in ('updateUserProfile.ts', 'insecurity.ts', 'server.ts', '.ts'):
+        for ln in ((29, 29), (25, 30), (30, 40), (1, 28), ()):
+            assert filter_flows(reachables, name, ln) == index.touches(name, ln)
+
+
+def test_lazy_filter():
+    results = []
+    for lazy in (False, True):
+        filter_obj = Filter('test/data/java-piggymetrics-usages.json', 'outfile.json', None, lazy)
+        filter_obj.add_filters(parse_filters('fileName=AccountController.java'))
+        results.append({k: sorted(map(repr, v)) for k, v in filter_obj.filter_slice().items()})
+    assert results[0]['objectSlices']
+    assert results[0] == results[1]
+
+
+def test_check_reachable_lazy(tmp_path):
+    slice_file = tmp_path / 'reachables.json'
+    slice_file.write_text(
+        '{"reachables": [{"flows": [{"parentFileName": "routes\\\\updateUserProfile.ts", '
+        '"lineNumber": 29}], "purls": ["pkg:npm/%40colors/colors@1.6.0"]}]}', encoding='utf-8')
+    atom_slice = AtomSlice(slice_file, lazy=True)
+    assert check_reachable(atom_slice.content, '@colors/colors:1.6.0', '') == True
+    assert check_reachable(atom_slice.content, '@colors/colors:1.9.0', '') == False
+    assert check_reachable(atom_slice.content, '', 'routes/updateUserProfile.ts:29') == True
+    assert check_reachable(atom_slice.content, '', 'updateUserProfile.ts:20-30') == True
+    assert check_reachable(atom_slice.content, '', 'updateUserProfile.ts:30-40') == False
+
+
+def test_filter_excludes():
+    filter_obj = Filter('test/data/java-piggymetrics-usages.json', 'outfile.json', None)
+    filter_obj.add_filters(parse_filters('callName=get'))
+    result = filter_obj.filter_slice()
+    assert result['objectSlices']
+    assert len(result['objectSlices']) == len({repr(i) for i in result['objectSlices']})
+
+    filter_obj = Filter('test/data/java-piggymetrics-usages.json', 'outfile.json', None)
+    filter_obj.add_filters(parse_filters('callName=get,fileName!=AccountController.java'))
+    excluded = filter_obj.filter_slice()
+    assert excluded['objectSlices']
+    assert len(excluded['objectSlices']) < len(result['objectSlices'])
+    assert not [i for i in excluded['objectSlices'] if i['fileName'].endswith('AccountController.java')]
+
+
+def test_check_reachable_batch(tmp_path):
+    content = {'reachables': [
+        {'flows': [{'parentFileName': 'routes\\updateUserProfile.ts', 'lineNumber': 29}],
+         'purls': ['pkg:npm/%40colors/colors@1.6.0']},
+        {'flows': [{'parentFileName': 'lib/insecurity.ts', 'lineNumber': 40}],
+         'purls': ['pkg:npm/jsonwebtoken@0.4.0']},
+    ]}
+    index = ReachableIndex(content)
+    assert index.purls == {'colors:1.6.0', '@colors/colors:1.6.0', 'jsonwebtoken:0.4.0'}
+    assert index.check_purl('@colors/colors:1.6.0') and not index.check_purl('colors:1.9.0')
+    assert index.check_location('insecurity.ts:35-45')
+
+    lines = [
+        '# comment', '', 'pkg=colors:1.6.0', '{"pkg": "jsonwebtoken:0.5.0"}',
+        'location=routes/updateUserProfile.ts:29', '{"location": "insecurity.ts:41-50"}',
+        '{"location": "insecurity.ts"}', 'colors:1.6.0', '{"pkg": ', '[1]',
+    ]
+    results = list(check_reachable_batch(content, read_reachable_queries(lines)))
+    assert [i.get('reachable') for i in results] == [True, False, True, False, None, None, None, None]
+    assert results[4]['error'] == 'Invalid location: insecurity.ts'
+    assert results[5]['error'].endswith('on line 8')
+    assert results[6]['error'].startswith('Invalid JSON on line 9')
+    assert results[7]['error'] == 'Expected an object on line 10'
+    for query in ('colors:1.6.0', 'jsonwebtoken:0.5.0'):
+        assert check_reachable(content, query, '') == check_reachable_batch(
+            content, [{'pkg': query}]).__next__()['reachable']
@@ -0,0 +1,49 @@
+import pytest
+from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process
+
+from atom_tools.lib.filtering import Filter, parse_filters
+from atom_tools.lib.fuzzy import FuzzyMatcher, HAS_NUMPY
+from atom_tools.lib.slices import FlatSlice
+
+
+def expected_matches(values, queries, score_cutoff, fn_only=False):
+    matches = []
+    for query in queries:
+        matches.append([
+            v for v in values
+            if fuzz.ratio(default_process(query),
+                          default_process(v.rsplit('/', 1)[-1] if fn_only else v)) >= score_cutoff
+        ])
+    return matches
+
+
+@pytest.mark.parametrize('use_numpy', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not HAS_NUMPY, reason='NumPy is not installed')),
+])
+def test_fuzzy_matcher(use_numpy):
+    slc = FlatSlice('test/data/java-piggymetrics-usages.json')
+    for attribute, fn_only in [('callname', False), ('fullname', False), ('filename', True)]:
+        values = list(slc.attrib_dicts[attribute])
+        matcher = FuzzyMatcher(values, fn_only)
+        queries = values[:3] + ['get', 'AccountController.java', 'com.piggymetrics', '']
+        for score_cutoff in (50, 80, 100):
+            assert matcher.match(queries, score_cutoff, use_numpy) == expected_matches(
+                values, queries, score_cutoff, fn_only)
+    assert FuzzyMatcher([]).match(['a'], 80, use_numpy) == [[]]
+    assert FuzzyMatcher(['a']).match([], 80, use_numpy) == []
+
+
+def test_multiple_fuzzy_filters():
+    def filter_slice(criteria):
+        filter_obj = Filter('test/data/java-piggymetrics-usages.json', 'outfile.json', '80')
+        filter_obj.add_filters(parse_filters(criteria))
+        return sorted(map(repr, filter_obj.filter_slice()['objectSlices']))
+
+    combined = filter_slice('callName=getAccount,callName=saveChanges,fileName=AccountService.java')
+    separate = set()
+    for criteria in ('callName=getAccount', 'callName=saveChanges', 'fileName=AccountService.java'):
+        separate.update(filter_slice(criteria))
+    assert combined
+    assert combined == sorted(separate)
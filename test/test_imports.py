@@ -0,0 +1,55 @@
+import subprocess
+import sys
+
+import pytest
+
+
+# The cumulative import time allowed for each command module, well above the time it takes on a
+# developer machine so that the test only fails when a command starts importing much more.
+IMPORT_BUDGET_US = 500_000
+
+# Modules each command must not import until they are needed.
+FUZZY = 'atom_tools.lib.fuzzy'
+JMESPATH = 'jmespath'
+RUBY = 'atom_tools.lib.ruby_converter'
+SCALA = 'atom_tools.lib.scala_converter'
+
+
+def import_times(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize('module,not_imported', [
+    ('atom_tools.cli.application', [FUZZY, JMESPATH, RUBY, SCALA]),
+    ('atom_tools.cli.commands.check_reachable', [FUZZY, JMESPATH, RUBY, SCALA]),
+    ('atom_tools.cli.commands.filter', [FUZZY, JMESPATH, RUBY, SCALA]),
+    ('atom_tools.cli.commands.query_endpoints', [FUZZY, RUBY, SCALA]),
+    ('atom_tools.cli.commands.convert', [FUZZY, RUBY, SCALA]),
+    ('atom_tools.cli.commands.validate_lines', [FUZZY, RUBY, SCALA]),
+])
+def test_import_time(module, not_imported):
+    times = import_times(module)
+    assert times[module] < IMPORT_BUDGET_US
+    assert not [i for i in not_imported if i in times]
+
+
+def test_lazy_imports_used():
+    code = ('from atom_tools.lib.converter import OpenAPI; import sys; '
+            'OpenAPI("openapi3.1.0", "rb", "test/data/rb-railsgoat-usages.json").convert_usages(); '
+            'from atom_tools.lib.filtering import Filter, parse_filters; '
+            'f = Filter("test/data/java-piggymetrics-usages.json", "", "80"); '
+            'f.add_filters(parse_filters("fileName=AccountController.java")); f.filter_slice(); '
+            'print(" ".join(sorted(sys.modules)))')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    modules = result.stdout.split()
+    assert RUBY in modules and FUZZY in modules
+    assert SCALA not in modules
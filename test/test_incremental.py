@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.incremental import convert_incremental, group_by_file, load_cache
+
+
+SLICE = 'test/data/java-sec-code-usages.json'
+
+
+def converter(usages=SLICE, origin_type='java'):
+    return OpenAPI('openapi3.1.0', origin_type, str(usages))
+
+
+def test_convert_incremental(tmp_path):
+    cache = tmp_path / 'paths.json'
+    full = converter().convert_usages()
+    result = convert_incremental(converter(), cache)
+    assert (result.converted, result.reused, result.removed) == (76, 0, 0)
+    assert result.paths == full
+    result = convert_incremental(converter(), cache)
+    assert (result.converted, result.reused, result.removed) == (0, 76, 0)
+    assert result.paths == full
+
+    with open(SLICE, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+    changed = 'src\\main\\java\\org\\joychou\\controller\\SSRF.java'
+    removed = 'src\\main\\java\\org\\joychou\\controller\\XStreamRce.java'
+    content['objectSlices'] = [i for i in content['objectSlices'] if i['fileName'] != removed]
+    content['userDefinedTypes'] = [
+        i for i in content['userDefinedTypes'] if i['fileName'] != removed]
+    for entry in content['objectSlices']:
+        if entry['fileName'] == changed and entry['lineNumber']:
+            entry['lineNumber'] += 1
+    usages = tmp_path / 'usages.slices.json'
+    usages.write_text(json.dumps(content))
+    result = convert_incremental(converter(usages), cache)
+    assert (result.converted, result.reused, result.removed) == (1, 74, 1)
+    assert result.paths == convert_incremental(converter(usages), tmp_path / 'new.json').paths
+
+
+@pytest.mark.parametrize('usages,origin_type', [
+    ('test/data/js-cdxgen-usages.json', 'js'),
+    ('test/data/js-nodegoat-usages.json', 'js'),
+    ('test/data/ts-custom-router-usages.json', 'ts'),
+    ('test/data/py-breakable-flask-usages.json', 'py'),
+    ('test/data/py-django-goat-usages.json', 'py'),
+])
+def test_convert_incremental_matches_full(tmp_path, usages, origin_type):
+    full = converter(usages, origin_type).convert_usages()
+    result = convert_incremental(converter(usages, origin_type), tmp_path / 'paths.json')
+    assert result.paths == full
+
+
+def test_cache_invalidated(tmp_path):
+    cache = tmp_path / 'paths.json'
+    convert_incremental(converter(), cache)
+    assert len(load_cache(cache, 'java')) == 76
+    assert load_cache(cache, 'js') == {}
+    assert load_cache(tmp_path / 'missing.json', 'java') == {}
+    assert load_cache(cache, 'java', 'flask') == {}
+    # Paths depend on the framework detected for the whole slice, not only on the file entries.
+    changed = converter()
+    changed.usages.custom_attr = 'flask'
+    result = convert_incremental(changed, cache)
+    assert (result.converted, result.reused) == (76, 0)
+    assert len(load_cache(cache, 'java', 'flask')) == 76
+    assert load_cache(cache, 'java') == {}
+    cache.write_text('{')
+    assert load_cache(cache, 'java') == {}
+
+
+def test_group_by_file():
+    content = {
+        'objectSlices': [{'fileName': 'a', 'lineNumber': 1}, {'fileName': 'b'}, {'fileName': 'a'}],
+        'userDefinedTypes': [{'fileName': 'c'}, {'fileName': 'a'}],
+    }
+    files = group_by_file(content)
+    assert list(files) == ['a', 'b', 'c']
+    assert files['a'] == {
+        'objectSlices': [{'fileName': 'a', 'lineNumber': 1}, {'fileName': 'a'}],
+        'userDefinedTypes': [{'fileName': 'a'}],
+    }
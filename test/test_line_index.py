@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.line_index import EndpointIndex, FileLineIndex, FlowIndex, LineIndex
+from atom_tools.lib.utils import output_endpoints
+
+
+@pytest.fixture
+def java_document():
+    document = OpenAPI('openapi3.1.0', 'java', 'test/data/java-sec-code-usages.json').endpoints_to_openapi()
+    return json.loads(json.dumps(document))
+
+
+def test_line_index():
+    index = LineIndex([30, 5, None, 12, 5, 40])
+    assert len(index) == 5
+    assert index.query(5, 12) == [1, 3, 4]
+    assert index.query(13, 29) == []
+    assert index.query(0, 100) == [0, 1, 3, 4, 5]
+    assert LineIndex([30, 5, None, 12, 5, 40], index.order).query(5, 12) == [1, 3, 4]
+
+
+def test_endpoint_index(java_document, tmp_path):
+    index = EndpointIndex.from_openapi(java_document)
+    index.save(tmp_path / 'index.json')
+    loaded = EndpointIndex.load(tmp_path / 'index.json')
+    for line_range in [(), (1, 10), (20, 40), (35, 35), (0, 10000), (50, 20)]:
+        for sparse in (False, True):
+            expected = output_endpoints(java_document, sparse, line_range)
+            assert index.output(sparse, line_range) == expected
+            assert loaded.output(sparse, line_range) == expected
+
+
+def test_file_line_index():
+    index = FileLineIndex([('src/a.ts', 10), ('src/b.ts', 10), ('lib/a.ts', 30), ('src/a.ts', None),
+                           ('src/a.ts', 20)])
+    assert sorted(index.matching_files('a.ts')) == ['lib/a.ts', 'src/a.ts']
+    assert index.query('a.ts', (10, 20)) == [0, 3, 4]
+    assert index.query('src/a.ts', (25, 40)) == [3]
+    assert index.query('lib/a.ts', ()) == [2]
+    assert index.query('c.ts', ()) == []
+    assert index.touches('b.ts', (5, 15))
+    assert not index.touches('b.ts', (11, 15))
+    assert index.touches('src/a.ts', (100, 200))
+
+
+def test_flow_index():
+    reachables = [
+        {'flows': [{'parentFileName': 'routes\\updateUserProfile.ts', 'lineNumber': 29},
+                   {'parentFileName': 'routes\\login.ts', 'lineNumber': 12}]},
+        {'purls': []},
+        {'flows': [{'parentFileName': 'routes\\updateUserProfile.ts', 'lineNumber': 31},
+                   {'parentFileName': 'lib\\insecurity.ts'}]},
+    ]
+    index = FlowIndex(reachables)
+    assert index.query('updateUserProfile.ts', (25, 30)) == [(0, 0)]
+    assert index.query('updateUserProfile.ts', (28, 31)) == [(0, 0), (2, 0)]
+    assert index.query('updateUserProfile.ts', ()) == [(0, 0), (2, 0)]
+    assert index.query('insecurity.ts', (1, 1)) == [(2, 1)]
+    assert index.touches('login.ts', (12, 12))
+    assert not index.touches('login.ts', (13, 400))
+    assert not index.touches('server.ts', ())
+
+
+def test_endpoint_index_file_filter(java_document):
+    index = EndpointIndex.from_openapi(java_document)
+    file_name = 'SQLI.java'
+    filtered = {'paths': {}}
+    for endpoint, values in java_document['paths'].items():
+        calls = {k: v for k, v in values.get('x-atom-usages', {}).get('call', {}).items()
+                 if k.endswith(file_name)}
+        if calls:
+            filtered['paths'][endpoint] = {'x-atom-usages': {'call': calls}}
+    assert filtered['paths']
+    for line_range in [(), (1, 50), (60, 200), (0, 10000)]:
+        for sparse in (False, True):
+            expected = output_endpoints(filtered, sparse, line_range)
+            assert index.output(sparse, line_range, file_name) == expected
+    assert index.output(False, (), 'Missing.java') == ''
+
+
+def test_endpoint_index_invalid(tmp_path):
+    (tmp_path / 'index.json').write_text('{"version": 0}')
+    with pytest.raises(ValueError):
+        EndpointIndex.load(tmp_path / 'index.json')
+    assert EndpointIndex.from_openapi({'paths': {'/a': {'get': {}}}}).output(False, ()) == ''
@@ -0,0 +1,26 @@
+from atom_tools.lib.paths import PathsAccumulator, merge_path_objects
+
+
+def test_paths_accumulator():
+    items = [
+        {'/a/{id}': {
+            'parameters': [{'name': 'id', 'in': 'path', 'required': True}],
+            'get': {'responses': {}},
+            'x-atom-usages': {'call': {'A.java': [3, 5]}}}},
+        {'/a/{id}': {
+            'parameters': [{'name': 'id', 'in': 'path', 'required': True},
+                           {'name': 'q', 'in': 'query'}],
+            'post': {'parameters': [{'name': 'body', 'in': 'query'}]},
+            'x-atom-usages': {'call': {'A.java': [7], 'B.java': [1]}, 'target': {'A.java': 2}}}},
+        {'/b': {'get': {'responses': {'200': {}}}}},
+        {'/a/{id}': {'get': {'responses': {'200': {}}}, 'x-atom-usages': {'call': {'A.java': [9]}}}},
+    ]
+    expected = {}
+    paths = PathsAccumulator()
+    for item in items:
+        paths.add(item)
+    for item in items:
+        expected = merge_path_objects(expected, item) if expected else item
+    assert paths.to_dict() == expected
+    paths.add({'/a/{id}': {'x-atom-usages': {'call': {'A.java': [5, 3, 11]}}}})
+    assert paths.to_dict()['/a/{id}']['x-atom-usages']['call']['A.java'] == [3, 5, 7, 9, 11]
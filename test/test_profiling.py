@@ -0,0 +1,71 @@
+import json
+import pstats
+import subprocess
+import sys
+
+from cleo.testers.application_tester import ApplicationTester
+
+from atom_tools.cli.application import Application
+from atom_tools.lib import profiling
+from atom_tools.lib.converter import OpenAPI
+
+
+def test_phases():
+    profiling.enable()
+    with profiling.phase('outer'):
+        for _ in range(3):
+            with profiling.phase('inner'):
+                pass
+    with profiling.phase('second'):
+        pass
+    with profiling.phase('outer'):
+        with profiling.phase('late'):
+            pass
+    profiling.disable()
+    with profiling.phase('ignored'):
+        pass
+    phases = profiling.get_phases()
+    assert [(p.name, p.depth, p.calls) for p in phases] == [
+        ('outer', 0, 2), ('inner', 1, 3), ('late', 1, 1), ('second', 0, 1)]
+    assert phases[0].wall >= phases[1].wall
+    table = profiling.format_phases(phases).splitlines()
+    assert table[0].startswith('Phase')
+    assert table[3].startswith('  inner')
+
+
+def test_convert_phases():
+    profiling.enable()
+    OpenAPI('openapi3.1.0', 'java', 'test/data/java-piggymetrics-usages.json').convert_usages()
+    profiling.disable()
+    assert [p.name for p in profiling.get_phases() if p.depth == 0] == [
+        'import_slice', '_process_methods', 'methods_to_endpoints', '_identify_target_line_nums',
+        '_process_calls', 'populate_endpoints', '_extract_methods_from_udt']
+
+
+def test_timings_option(tmp_path):
+    tester = ApplicationTester(Application())
+    profile = tmp_path / 'convert.prof'
+    tester.execute(
+        f'convert -i test/data/java-piggymetrics-usages.json -o {tmp_path / "openapi.json"} '
+        f'--profile {profile}')
+    output = tester.io.fetch_error()
+    assert 'convert ' in output
+    assert '  _process_calls ' in output
+    assert pstats.Stats(str(profile)).total_calls > 0
+    assert not profiling.is_enabled()
+    assert 'JMESPath cache:' in output
+
+
+def test_timings_without_queries(tmp_path):
+    # Commands that run no JMESPath queries neither import them nor print their cache statistics.
+    slice_file = tmp_path / 'reachables.json'
+    slice_file.write_text(json.dumps({'reachables': [{'flows': [], 'purls': []}]}))
+    code = ('import sys; from cleo.testers.application_tester import ApplicationTester; '
+            'from atom_tools.cli.application import Application; '
+            't = ApplicationTester(Application()); '
+            f't.execute("check-reachable -i {slice_file} -p colors:1.6.0 --timings"); '
+            'print(t.io.fetch_error()); print("atom_tools.lib.queries" in sys.modules)')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert '  check_reachable ' in result.stdout
+    assert 'JMESPath cache:' not in result.stdout
+    assert result.stdout.split()[-1] == 'False'
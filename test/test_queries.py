@@ -0,0 +1,89 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+
+from atom_tools.lib import queries
+from atom_tools.lib.validator import LineValidator
+
+
+NATIVE_QUERIES = [
+    queries.OBJECT_SLICE_METHODS,
+    queries.OBJECT_SLICE_CALLS,
+    queries.UDT_FIELDS,
+    queries.UDT_PROCEDURES,
+    queries.UDT_ROUTES,
+]
+
+
+@lru_cache(maxsize=None)
+def load_fixture(name):
+    with open(Path('test/data') / name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+FIXTURE_CONTENTS = [
+    *(pytest.param(path.name, id=path.stem)
+      for path in sorted(Path('test/data').glob('*-usages.json'))),
+    pytest.param({
+        'objectSlices': [
+            {'fileName': 'a.py', 'usages': [
+                {'targetObj': {'resolvedMethod': 'target'},
+                 'definedBy': {'resolvedMethod': ['list', 'method']},
+                 'invokedCalls': [
+                     {'resolvedMethod': 'call'}, {'resolvedMethod': ''}, {'resolvedMethod': 0},
+                     {'resolvedMethod': ['s1', 's2']}, 5, [{'resolvedMethod': 'nested'}]],
+                 'argToCalls': [[{'resolvedMethod': 'deep'}]],
+                 'label': 'str'},
+                [{'targetObj': {'resolvedMethod': 'flattened'}, 'invokedCalls': [{'callName': 'x'}]}],
+                None, 7]},
+            None, 5, [{'fileName': 'b.py', 'usages': 'str'}]],
+        'userDefinedTypes': [
+            {'fileName': 'c.py', 'lineNumber': 3,
+             'fields': [{'name': 'get'}, [{'name': '/x'}, 1], {'label': 'y'}],
+             'procedures': [{'resolvedMethod': 'p'}, {'resolvedMethod': None}]},
+            {'fileName': 'd.py', 'fields': {}, 'procedures': None}, 'e', None],
+    }, id='edge-cases'),
+    pytest.param({'objectSlices': {}, 'userDefinedTypes': None}, id='not-lists'),
+]
+
+
+def test_compile_query():
+    queries.clear_cache()
+    assert queries.search('a[].b', {'a': [{'b': 1}, {'b': 2}]}) == [1, 2]
+    assert queries.search('a[].b', {'a': [{'b': 3}]}) == [3]
+    assert queries.compile_query('a[].b') is queries.compile_query('a[].b')
+    info = queries.cache_info()
+    assert (info.hits, info.misses, info.size) == (3, 1, 1)
+    assert info.max_size == queries.MAX_CACHED
+    assert str(info) == f'JMESPath cache: 3 hits, 1 misses, 1/{queries.MAX_CACHED} expressions'
+
+
+def test_cache_reused_across_slices():
+    # The validator's queries are not handled natively, so they are compiled by compile_query.
+    queries.clear_cache()
+    LineValidator('test/data/java-piggymetrics-usages.json', 'test/data', 0, 'java').find_usages()
+    info = queries.cache_info()
+    assert info.misses == 2
+    assert info.hits == 0
+    LineValidator('test/data/java-sec-code-usages.json', 'test/data', 0, 'java').find_usages()
+    info = queries.cache_info()
+    assert info.misses == 2
+    assert info.hits == 2
+
+
+@pytest.mark.parametrize('content', FIXTURE_CONTENTS)
+@pytest.mark.parametrize('expression', NATIVE_QUERIES)
+def test_native_queries(content, expression):
+    if isinstance(content, str):
+        content = load_fixture(content)
+    expected = queries.compile_query(expression).search(content) or []
+    assert list(queries.iter_search(expression, content)) == expected
+    assert list(queries.iter_search(expression, content, native=False)) == expected
+
+
+def test_iter_search_fallback():
+    content = {'objectSlices': [{'fileName': 'a'}, {'fileName': 'b'}]}
+    assert list(queries.iter_search('objectSlices[].fileName', content)) == ['a', 'b']
+    assert list(queries.iter_search('missing[]', content)) == []
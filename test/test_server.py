@@ -0,0 +1,159 @@
+import http.client
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from atom_tools.lib.converter import OpenAPI
+from atom_tools.lib.filtering import Filter, parse_filters
+from atom_tools.lib.server import SliceService, SliceStore, create_server
+from atom_tools.lib.utils import output_endpoints
+
+
+JAVA_SLICE = 'test/data/java-sec-code-usages.json'
+
+
+@pytest.fixture
+def service():
+    return SliceService(SliceStore(max_slices=2))
+
+
+def call(service, method, **params):
+    response = service.handle({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params})
+    assert 'error' not in response, response
+    return response['result']
+
+
+def test_convert_and_query(service):
+    document = OpenAPI('openapi3.1.0', 'java', JAVA_SLICE).endpoints_to_openapi('https://a.b')
+    expected = json.loads(json.dumps(document))
+    assert json.loads(json.dumps(
+        call(service, 'convert', slice=JAVA_SLICE, server='https://a.b'))) == expected
+    for sparse in (False, True):
+        lines = call(service, 'query-endpoints', slice=JAVA_SLICE, filter_lines='20-60',
+                     sparse=sparse)
+        assert lines == output_endpoints(expected, sparse, (20, 60)).splitlines()
+    assert call(service, 'stats')['slices'][0]['converted'] == ['java']
+
+
+def test_filter(service):
+    filter_obj = Filter(JAVA_SLICE, '', None)
+    filter_obj.add_filters(parse_filters('fileName=SQLI.java'))
+    expected = filter_obj.filter_slice()
+    for _ in range(2):
+        assert call(service, 'filter', slice=JAVA_SLICE, criteria='fileName=SQLI.java') == expected
+
+
+def test_check_reachable(service, tmp_path):
+    slice_file = tmp_path / 'reachables.json'
+    slice_file.write_text(json.dumps({'reachables': [
+        {'flows': [{'parentFileName': 'routes/updateUserProfile.ts', 'lineNumber': 29}],
+         'purls': ['pkg:npm/%40colors/colors@1.6.0']}]}))
+    assert call(service, 'check-reachable', slice=str(slice_file), pkg='colors:1.6.0') is True
+    assert call(service, 'check-reachable', slice=str(slice_file),
+                location='updateUserProfile.ts:30') is False
+    assert call(service, 'check-reachable', slice=str(slice_file), queries=[
+        {'pkg': 'colors:1.9.0'}, {'location': 'updateUserProfile.ts:20-30'}, {'location': 'x'}
+    ]) == [{'pkg': 'colors:1.9.0', 'reachable': False},
+           {'location': 'updateUserProfile.ts:20-30', 'reachable': True},
+           {'location': 'x', 'error': 'Invalid location: x'}]
+
+
+def test_errors(service):
+    def error(request):
+        return service.handle(request)['error']['code']
+
+    assert error({'jsonrpc': '2.0', 'id': 1, 'method': 'nope'}) == -32601
+    assert error({'jsonrpc': '2.0', 'id': 1}) == -32600
+    assert error({'jsonrpc': '2.0', 'id': 1, 'method': 'convert', 'params': {}}) == -32602
+    assert error({'jsonrpc': '2.0', 'id': 1, 'method': 'convert',
+                  'params': {'slice': JAVA_SLICE, 'type': 'cobol'}}) == -32602
+    assert error({'jsonrpc': '2.0', 'id': 1, 'method': 'load',
+                  'params': {'slice': 'test/data/missing.json'}}) == -32000
+    for method, params in (('convert', {}), ('filter', {'criteria': 'fileName=a.java'}),
+                           ('check-reachable', {'pkg': 'colors'})):
+        assert error({'jsonrpc': '2.0', 'id': 1, 'method': method,
+                      'params': {'slice': 'test/data/invalid.json', **params}}) == -32000
+    assert service.handle({'jsonrpc': '2.0', 'method': 'stats'}) is None
+    responses = service.handle([{'jsonrpc': '2.0', 'id': 1, 'method': 'stats'},
+                                {'jsonrpc': '2.0', 'id': 2, 'method': 'nope'}])
+    assert [i['id'] for i in responses] == [1, 2]
+
+
+def test_slice_store(tmp_path):
+    store = SliceStore(max_slices=2)
+    files = []
+    for i in range(3):
+        files.append(tmp_path / f'{i}.json')
+        files[-1].write_text('{"objectSlices": []}')
+    first = store.get(str(files[0]))
+    assert store.get(str(files[0])) is first
+    store.get(str(files[1]))
+    store.get(str(files[0]))
+    store.get(str(files[2]))
+    assert [i['slice'] for i in store.info()] == [str(files[0].resolve()), str(files[2].resolve())]
+    files[0].write_text('{"objectSlices": [], "userDefinedTypes": []}')
+    assert store.get(str(files[0])) is not first
+    assert store.unload(str(files[0]))
+    assert not store.unload(str(files[0]))
+    assert len(store) == 1
+    idle = SliceStore(idle_timeout=0.001)
+    idle.get(str(files[1]))
+    threading.Event().wait(0.01)
+    assert idle.info() == []
+
+
+def post(connection, request):
+    body = json.dumps(request)
+    connection.request('POST', '/', body, {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def test_http_server(service):
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        status, body = post(connection, {'jsonrpc': '2.0', 'id': 7, 'method': 'load',
+                                         'params': {'slice': JAVA_SLICE, 'type': 'java'}})
+        assert status == 200
+        assert json.loads(body)['result']['converted'] == ['java']
+        status, body = post(connection, {'jsonrpc': '2.0', 'id': 8, 'method': 'convert',
+                                         'params': {'slice': 'test/data/invalid.json'}})
+        assert json.loads(body)['error'] == {
+            'code': -32000, 'message': 'Could not load slice: test/data/invalid.json'}
+        status, body = post(connection, {'jsonrpc': '2.0', 'method': 'stats'})
+        assert (status, body) == (204, b'')
+        connection.request('POST', '/', b'{', {'Content-Length': '1'})
+        assert json.loads(connection.getresponse().read())['error']['code'] == -32700
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not available')
+def test_unix_socket_server(service, tmp_path):
+    socket_file = str(tmp_path / 'atom-tools.sock')
+    server = create_server(service, unix_socket=socket_file)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    class UnixConnection(http.client.HTTPConnection):
+        def connect(self):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_file)
+
+    try:
+        status, body = post(UnixConnection('localhost'),
+                            {'jsonrpc': '2.0', 'id': 'a', 'method': 'stats'})
+        assert status == 200
+        assert json.loads(body) == {'jsonrpc': '2.0', 'id': 'a',
+                                    'result': {'slices': [], 'max_slices': 2}}
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not os.path.exists(socket_file)
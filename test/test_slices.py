@@ -1,5 +1,14 @@
+import io
+import json
+
 from pytest import fixture
-from atom_tools.lib.slices import AtomSlice
+from atom_tools.lib.slices import (
+    AtomSlice,
+    LazySliceContent,
+    _SliceReader,
+    create_attrib_dicts,
+    import_slice,
+)
 
 
 @fixture
@@ -41,3 +50,89 @@ def test_usages_class(
 
     usages = AtomSlice('test/data/java-sec-code-usages.json', 'java')
     assert usages.content is not None
+
+
+def test_slice_index(java_usages_1):
+    index = java_usages_1.index
+    assert index is java_usages_1.index
+    file_name = 'account-service/src/main/java/com/piggymetrics/account/controller/AccountController.java'
+    assert len(index.entries[file_name]) == len(
+        [i for i in java_usages_1.content['objectSlices'] if i['fileName'] == file_name])
+    calls = index.get_calls(file_name)
+    assert calls
+    assert all(i.get('callName') for i in calls)
+    method = calls[0]['resolvedMethod']
+    assert index.get_calls(file_name, {method}) == [i for i in calls if i['resolvedMethod'] == method]
+    methods = {i['resolvedMethod'] for i in calls}
+    assert len(methods) > 1
+    assert index.get_calls(file_name, methods) == calls
+    subset = sorted(methods)[:2] + ['not.a.method:void()']
+    assert index.get_calls(file_name, subset) == [i for i in calls if i['resolvedMethod'] in subset]
+    assert index.get_calls('does/not/exist.java') == []
+    assert index.get_calls('does/not/exist.java', {method}) == []
+    entry = index.entries[file_name][0]
+    assert index.get_entry(file_name, entry['lineNumber']) is entry
+
+
+def test_stream_slice(tmp_path):
+    for filename in ('test/data/java-piggymetrics-usages.json',
+                     'test/data/py-breakable-flask-usages.json'):
+        streamed = AtomSlice(filename, 'java', stream=True)
+        loaded = AtomSlice(filename, 'java', stream=False)
+        assert streamed.content == loaded.content
+        assert streamed.slice_type == loaded.slice_type
+        assert streamed.custom_attr == loaded.custom_attr
+
+    slice_file = tmp_path / 'reachables.json'
+    slice_file.write_text(
+        '{"reachables": [{"flows": [{"parentFileName": "src\\\\app.js", "code": "a\\\\b"}]}],'
+        ' "objectSlices": []}', encoding='utf-8')
+    content, slice_type, _ = import_slice(slice_file, True)
+    assert slice_type == 'usages'
+    assert content == {
+        'reachables': [{'flows': [{'parentFileName': 'src/app.js', 'code': 'a\\b'}]}],
+        'objectSlices': []
+    }
+
+
+def test_stream_slice_chunk_boundaries():
+    entries = [{'fileName': f'app/views{i}.py', 'code': 'x' * (i * 7), 'lineNumber': i}
+               for i in range(20)]
+    text = json.dumps({'objectSlices': entries})
+    reader = _SliceReader(io.BytesIO(text.encode('utf-8')), chunk_size=64)
+    items = list((key, list(value)) for key, value in reader.iter_items())
+    assert [key for key, _ in items] == ['objectSlices']
+    assert [entry for entry, _ in items[0][1]] == entries
+    assert [json.loads(raw) for _, raw in items[0][1]] == entries
+
+
+def test_lazy_slice():
+    filename = 'test/data/java-piggymetrics-usages.json'
+    lazy = AtomSlice(filename, 'java', lazy=True)
+    loaded = AtomSlice(filename, 'java', stream=True)
+    assert isinstance(lazy.content, LazySliceContent)
+    assert lazy.slice_type == loaded.slice_type
+    assert len(lazy.content['objectSlices']) == len(loaded.content['objectSlices'])
+    assert lazy.content['objectSlices'][3] == loaded.content['objectSlices'][3]
+    assert lazy.content['objectSlices'][-1] == loaded.content['objectSlices'][-1]
+    assert lazy.content.to_dict() == loaded.content
+
+
+def test_create_attrib_dicts():
+    content = {
+        'objectSlices': [
+            {'fileName': 'a.js', 'fullName': 'a.js::program', 'lineNumber': 3,
+             'usages': [{'invokedCalls': [{'callName': 'get', 'lineNumber': 4},
+                                          {'callName': 'get', 'lineNumber': 5}],
+                         'targetObj': {'name': 'req', 'typeFullName': 'ANY'}}]},
+            {'fileName': 'b.js', 'signature': 'void()', 'lineNumber': 4, 'usages': []},
+        ],
+        'userDefinedTypes': [{'fileName': 'a.js', 'fields': [{'name': 'get'}]}],
+    }
+    attribs = create_attrib_dicts(content)
+    assert attribs['filename'] == {'a.js': [(0, 0), (1, 0)], 'b.js': [(0, 1)]}
+    assert attribs['fullname'] == {'a.js::program': [(0, 0)]}
+    assert attribs['callname'] == {'get': [(0, 0)]}
+    assert attribs['name'] == {'req': [(0, 0)], 'get': [(1, 0)]}
+    assert attribs['linenumber'] == {'3': [(0, 0)], '4': [(0, 0), (0, 1)], '5': [(0, 0)]}
+    assert attribs['signature'] == {'void()': [(0, 1)]}
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from atom_tools.lib.sources import SourceCache, SourceLines, decode_line, line_offsets
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'\n',
+    b'a',
+    b'first\nsecond\n',
+    b'first\nsecond\nno newline',
+    b'windows\r\nline endings\r\n\r\n',
+    b'old mac\rline endings\r\r',
+    b'mixed\r\nline\rendings\n\r\n\rlast\r',
+    b'\n\n\nblank lines\n\n',
+    'unicode é中文\nline\n'.encode('utf-8'),
+])
+def test_source_lines(tmp_path, content):
+    path = tmp_path / 'source.txt'
+    path.write_bytes(content)
+    with open(path, 'r', encoding='utf-8') as f:
+        expected = f.readlines()
+    with SourceLines(path) as lines:
+        assert len(lines) == len(expected)
+        assert list(lines) == expected
+        assert lines[1:3] == expected[1:3]
+        if expected:
+            assert lines[-1] == expected[-1]
+        with pytest.raises(IndexError):
+            lines[len(expected)]
+    with SourceLines(path, line_offsets(content)) as lines:
+        assert list(lines) == expected
+
+
+def test_source_lines_invalid_utf8(tmp_path):
+    path = tmp_path / 'source.txt'
+    path.write_bytes(b'valid line\nlatin-1 caf\xe9\nvalid again\n')
+    with SourceLines(path) as lines:
+        assert lines[0] == 'valid line\n'
+        assert lines[1] == 'latin-1 caf�\n'
+        assert lines[2] == 'valid again\n'
+        assert lines.line_bytes(1) == b'latin-1 caf\xe9\n'
+    assert decode_line(b'x\r\n') == 'x\n'
+    assert decode_line(b'x\r') == 'x\n'
+
+
+def test_source_cache(tmp_path):
+    path = tmp_path / 'Source.java'
+    path.write_text('class Source {\r\n    void run() {}\n}', encoding='utf-8')
+    expected = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    cache = SourceCache()
+    for _ in range(2):
+        with cache.open(path) as lines:
+            assert list(lines) == expected
+            assert lines.stripped_line(1) == 'void run() {}'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    path.write_text('class Source {}\n', encoding='utf-8')
+    with cache.open(path) as lines:
+        assert list(lines) == ['class Source {}\n']
+        assert lines.stripped_line(0) == 'class Source {}'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_source_cache_directory(tmp_path):
+    path = tmp_path / 'source.py'
+    path.write_bytes(b'def f():\n    return "caf\xe9"\n')
+    with SourceCache(tmp_path / 'cache').open(path):
+        pass
+    cache = SourceCache(tmp_path / 'cache')
+    with cache.open(path) as lines:
+        assert lines.stripped_line(1) == 'return "caf\ufffd"'
+        assert lines[1] == '    return "caf\ufffd"\n'
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert len(list((tmp_path / 'cache' / 'sources').glob('*.json'))) == 1
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    cache = SourceCache(tmp_path / 'cache')
+    with cache.open(path):
+        pass
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_source_cache_eviction(tmp_path):
+    files = []
+    for i in range(4):
+        files.append(tmp_path / f'source{i}.txt')
+        files[-1].write_text(f'{i}\n' * 100)
+    cache = SourceCache(tmp_path / 'cache', max_memory=2500, max_size=2000)
+    for path in files:
+        cache.open(path).close()
+    assert len(cache._indexes) == 3
+    stored = sorted((tmp_path / 'cache' / 'sources').glob('*.json'), key=os.path.getmtime)
+    assert sum(p.stat().st_size for p in stored) <= 2000
+    assert len(stored) < 4
+    cache.clear()
+    cache.open(files[-1]).close()
+    assert cache.hits == 1
@@ -0,0 +1,143 @@
+import json
+import random
+
+import pytest
+
+from atom_tools.lib import validator as validator_lib
+from atom_tools.lib.sources import SourceCache
+from atom_tools.lib.regex_utils import TokenMatcher
+from atom_tools.lib.validator import LineValidator, line_tokens
+
+
+SOURCE = '''package com.example;
+
+public class Service{n} {{
+    private final Repository repository = new Repository();
+
+    public String find{n}(String id) {{
+        String query = "select * from t" + id;
+        System.out.println(query);
+        return repository.find(query);
+    }}
+}}
+'''
+
+
+@pytest.fixture
+def java_project(tmp_path):
+    object_slices = []
+    for n in range(12):
+        file_name = f'src/main/java/com/example/Service{n}.java'
+        (tmp_path / 'src/main/java/com/example').mkdir(parents=True, exist_ok=True)
+        (tmp_path / file_name).write_text(SOURCE.format(n=n), encoding='utf-8')
+        object_slices.append({
+            'fileName': file_name,
+            'fullName': f'com.example.Service{n}.find{n}:java.lang.String(java.lang.String)',
+            'signature': 'java.lang.String(java.lang.String)',
+            'code': '',
+            'lineNumber': 6,
+            'usages': [{
+                'targetObj': {'name': 'query', 'lineNumber': 7 + n % 3,
+                              'resolvedMethod': 'java.lang.String'},
+                'invokedCalls': [
+                    {'callName': 'missing', 'resolvedMethod': 'com.example.Missing.missing:void()'},
+                    {'callName': 'println', 'lineNumber': 8 + n % 4,
+                     'resolvedMethod': 'java.io.PrintStream.println:void(java.lang.String)'},
+                    {'callName': 'find', 'lineNumber': 9 if n % 5 else 90,
+                     'resolvedMethod': 'com.example.Repository.find:java.lang.String(java.lang.String)'},
+                    # cleanup_usages leaves out the last entry of each file.
+                    {'callName': 'repository', 'lineNumber': 4, 'resolvedMethod': 'com.example.Repository'},
+                ],
+            }],
+        })
+    object_slices.append({'fileName': 'src/main/java/com/example/Gone.java', 'signature': 'void()',
+                          'code': 'gone()', 'lineNumber': 1, 'usages': []})
+    (tmp_path / 'usages.json').write_text(json.dumps({'objectSlices': object_slices, 'userDefinedTypes': []}))
+    return tmp_path
+
+
+def validate(project, jobs=1, interval=5, cache=None):
+    validator = LineValidator(project / 'usages.json', project, interval, 'java', cache)
+    validator.validate_line_numbers(jobs)
+    return validator
+
+
+def test_validate_line_numbers(java_project):
+    validator = validate(java_project)
+    assert validator.matches['matched']
+    assert validator.matches['close']
+    assert validator.unverifiable['missing']
+    assert validator.unverifiable['range']
+    assert validator.problem_files == [java_project / 'src/main/java/com/example/Gone.java']
+    assert 'Accuracy' in validator.get_results()
+
+
+def test_validate_line_numbers_jobs(java_project):
+    expected = validate(java_project)
+    for jobs in (2, 3):
+        validator = validate(java_project, jobs)
+        assert validator.matches == expected.matches
+        assert validator.unverifiable == expected.unverifiable
+        assert validator.problem_files == expected.problem_files
+
+
+@pytest.mark.parametrize('directory', [None, 'cache'])
+def test_validate_line_numbers_cache(java_project, tmp_path, directory):
+    expected = validate(java_project)
+    cache = SourceCache(tmp_path / directory if directory else None)
+    for jobs in (1, 1, 2):
+        validator = validate(java_project, jobs, cache=cache)
+        assert validator.matches == expected.matches
+        assert validator.unverifiable == expected.unverifiable
+    assert (cache.hits, cache.misses) == (12, 12)
+
+
+def test_worker_cache(java_project, tmp_path):
+    # A worker process keeps one source cache for all the files it validates.
+    validator_lib._init_worker(tmp_path / 'cache')
+    args = (java_project, 5, 'java')
+    file = ('src/main/java/com/example/Service0.java', [
+        {'function_name': 'find', 'code': 'find', 'line_number': 9}])
+    for _ in range(2):
+        assert validator_lib._validate_file(args, file).cache is None
+    assert (validator_lib._worker_cache.hits, validator_lib._worker_cache.misses) == (1, 1)
+    validator_lib._init_worker(None)
+    assert validator_lib._worker_cache is None
+
+
+def test_token_matcher():
+    matcher = TokenMatcher(['+', '++', '+=', '= [', '= []', ' in ', 'new ', 'new Set('])
+    assert matcher.hits('i++') == {'+', '++'}
+    assert matcher.hits('x = [] + [y for y in z]') == {'+', '= [', '= []', ' in '}
+    assert matcher.hits('a ++= b') == {'+', '++', '+='}
+    assert matcher.hits('s = new Set(a)') == {'new ', 'new Set('}
+    assert matcher.hits('') == frozenset()
+
+
+def test_line_tokens():
+    rnd = random.Random(0)
+    fragments = list('xaneiwfor()[]=+-.\n ') + line_tokens.tokens
+    for _ in range(2000):
+        line = ''.join(rnd.choice(fragments) for _ in range(rnd.randint(0, 12)))
+        assert line_tokens.hits(line) == {t for t in line_tokens.tokens if t in line}
+
+
+def test_validate_line_numbers_close(java_project):
+    validator = validate(java_project)
+    close = [i for i in validator.matches['close'] if i['function_name'] == 'println']
+    assert close
+    for i in close:
+        assert i['actual_number'] == 8
+        assert i['found_line'] == 'System.out.println(query);'
+
+
+def test_expand_search_window(tmp_path):
+    (tmp_path / 'Window.java').write_text('match\n' + 'other\n' * 8 + 'match\n')
+    entries = [{'function_name': 'match', 'code': '', 'line_number': n} for n in (4, 5, 6, 7, 8)]
+    validator = LineValidator(None, tmp_path, 3, 'java')
+    validator.validate_file('Window.java', entries)
+    assert [i['actual_number'] for i in validator.matches['close']] == [1, 10, 10]
+    assert [i['line_number'] for i in validator.matches['close']] == [4, 7, 8]
+    assert [i['line_number'] for i in validator.matches['unmatched']] == [5, 6]
+    with pytest.raises(ValueError):
+        validator.validate_line_numbers()